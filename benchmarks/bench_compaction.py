@@ -0,0 +1,71 @@
+"""
+Benchmark: layout refinado por data/ação vs. cópia compactada por mês.
+
+Gera um histórico sintético, refina, compacta e compara número de arquivos e
+tempo de varredura (leitura completa e histórico de uma única ação).
+
+Uso:
+    python -m benchmarks.bench_compaction --years 1 3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pyarrow.dataset as ds
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.extraction.csv_converter import convert_csv_to_parquet
+from src.transform.compaction import compact
+from src.transform.refine import REFINED_PARTITIONING, refine_all
+
+
+def count_files(root):
+    return sum(len([n for n in names if n.endswith(".parquet")]) for _, _, names in os.walk(root))
+
+
+def time_scan(make_dataset, ticker, repeat=3):
+    """Best-of-`repeat` seconds for (discovery + full read, discovery + one-ticker read)"""
+    full, single = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        make_dataset().to_table()
+        full.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        make_dataset().to_table(filter=ds.field("ticker") == ticker)
+        single.append(time.perf_counter() - started)
+    return min(full), min(single)
+
+
+def run(years, n_tickers=90):
+    root = tempfile.mkdtemp(prefix="bench-compaction-")
+    try:
+        raw_dir, refined_dir, compact_dir = (os.path.join(root, name) for name in ("raw", "refined", "compact"))
+        for csv_path in write_raw_tree(raw_dir, trading_days_for_years(years), n_tickers):
+            convert_csv_to_parquet(csv_path)
+        refine_all(raw_dir, refined_dir, manifest_path=os.path.join(root, "manifest.sqlite"))
+        compact(refined_dir, compact_dir, manifest_path=os.path.join(root, "manifest.sqlite"))
+
+        ticker = sorted(os.listdir(os.path.join(refined_dir, sorted(os.listdir(refined_dir))[0])))[0][len("ticker="):]
+        refined_times = time_scan(lambda: ds.dataset(refined_dir, partitioning=REFINED_PARTITIONING), ticker)
+        compact_times = time_scan(lambda: ds.dataset(compact_dir, format="parquet"), ticker)
+        refined_files, compact_files = count_files(refined_dir), count_files(compact_dir)
+
+        print(f"\n📊 {years} year(s), ticker filter={ticker}")
+        print(f"   files:        {refined_files:>8} → {compact_files:<6} ({refined_files / compact_files:.0f}x fewer)")
+        print(f"   full scan:    {refined_times[0]:8.3f}s → {compact_times[0]:.3f}s "
+              f"({refined_times[0] / compact_times[0]:.1f}x)")
+        print(f"   single ticker:{refined_times[1]:8.3f}s → {compact_times[1]:.3f}s "
+              f"({refined_times[1] / compact_times[1]:.1f}x)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--tickers", type=int, default=90)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.tickers)
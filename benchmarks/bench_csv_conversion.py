@@ -0,0 +1,72 @@
+"""
+Benchmark: conversão CSV -> Parquet (caminho antigo com pandas/engine='python'
+vs. conversor tipado em src/extraction/csv_converter.py).
+
+Uso:
+    python -m benchmarks.bench_csv_conversion --years 1 5
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.extraction import csv_converter
+
+
+def legacy_convert(csv_path):
+    """The conversion previously inlined in b3_scraper.download_file_colab_fixed"""
+    parquet_path = csv_path.replace(".csv", ".legacy.parquet")
+    df = pd.read_csv(
+        csv_path,
+        sep=';',
+        encoding='latin-1',
+        decimal=',',
+        engine='python',
+        on_bad_lines='skip',
+        skiprows=1,  # otherwise the title line becomes the header and every row is skipped
+    )
+    df.to_parquet(parquet_path)
+    return parquet_path
+
+
+def typed_convert(csv_path):
+    return csv_converter.convert_csv_to_parquet(csv_path, csv_path.replace(".csv", ".typed.parquet"))
+
+
+def run(years, n_tickers=90, workdir=None):
+    root = tempfile.mkdtemp(prefix="bench-csv-", dir=workdir)
+    try:
+        n_days = trading_days_for_years(years)
+        csv_paths = write_raw_tree(root, n_days, n_tickers)
+        results = {}
+        for name, convert in (("legacy", legacy_convert), ("typed", typed_convert)):
+            started = time.perf_counter()
+            outputs = [convert(path) for path in csv_paths]
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                "seconds": elapsed,
+                "ms_per_file": 1000 * elapsed / len(csv_paths),
+                "parquet_bytes": sum(os.path.getsize(p) for p in outputs),
+            }
+        csv_bytes = sum(os.path.getsize(p) for p in csv_paths)
+        print(f"\n📊 {years} year(s): {len(csv_paths)} files, {csv_bytes / 1024 / 1024:.1f} MB of CSV")
+        for name, r in results.items():
+            print(f"   {name:<7} {r['seconds']:8.2f}s  {r['ms_per_file']:7.2f} ms/file  "
+                  f"Parquet={r['parquet_bytes'] / 1024 / 1024:.2f} MB")
+        print(f"   speedup: {results['legacy']['seconds'] / results['typed']['seconds']:.1f}x")
+        return results
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5])
+    parser.add_argument("--tickers", type=int, default=90)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.tickers)
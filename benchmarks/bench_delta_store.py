@@ -0,0 +1,90 @@
+"""
+Benchmark: snapshots + deltas (DeltaStore) vs. CSV e Parquet completos por pregão.
+
+Para um histórico sintético de data/raw (com rebalanceamentos quadrimestrais e
+participações que mudam todo dia), compara o espaço ocupado pelos CSV + Parquet
+diários com o do DeltaStore. Mede a latência de reconstruir um dia: a frio
+(store recém-aberto), no mesmo segmento (em memória) e lendo o Parquet bruto.
+Confere que todos os dias reconstruídos são iguais ao Parquet bruto.
+
+Uso:
+    python -m benchmarks.bench_delta_store --years 1 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.extraction.csv_converter import convert_csv_to_parquet
+from src.query.delta_store import DeltaStore
+from src.transform.partitions import list_raw_partitions
+
+
+def median_ms(function, arguments):
+    timings = []
+    for argument in arguments:
+        started = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def run(years, n_tickers=90, samples=200, snapshot_interval=None):
+    root = tempfile.mkdtemp(prefix="bench-delta-store-")
+    try:
+        raw_dir, store_dir = os.path.join(root, "raw"), os.path.join(root, "delta_store")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for csv_path in write_raw_tree(raw_dir, trading_days_for_years(years), n_tickers):
+                convert_csv_to_parquet(csv_path)
+        partitions = list_raw_partitions(raw_dir)
+        csv_bytes = sum(os.path.getsize(path[:-len(".parquet")] + ".csv") for _, path in partitions)
+        parquet_bytes = sum(os.path.getsize(path) for _, path in partitions)
+
+        store = DeltaStore(store_dir, *([snapshot_interval] if snapshot_interval else []))
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.build(raw_dir)
+        build = time.perf_counter() - started
+        store_bytes = store.size_bytes()
+
+        for day, path in partitions:
+            assert store.get(day).equals(pq.read_table(path)), day
+
+        rng = random.Random(0)
+        sample = [rng.choice(partitions) for _ in range(samples)]
+        cold = median_ms(lambda partition: DeltaStore(store_dir).get(partition[0]), sample)
+        segment = store.segments[len(store.segments) // 2]["dates"]
+        warm = median_ms(store.get, [segment[rng.randrange(len(segment))] for _ in range(samples)])
+        raw = median_ms(lambda partition: pq.read_table(partition[1]), sample)
+
+        print(f"\n📊 {years} year(s): {len(partitions)} days, {len(store.segments)} segments "
+              f"(snapshot every {store.snapshot_interval} days at most)")
+        print(f"   CSV + Parquet       {(csv_bytes + parquet_bytes) / 1024:10.1f} KB")
+        print(f"   Parquet only        {parquet_bytes / 1024:10.1f} KB")
+        print(f"   delta store         {store_bytes / 1024:10.1f} KB  "
+              f"({(csv_bytes + parquet_bytes) / store_bytes:.1f}x smaller than CSV + Parquet, "
+              f"{parquet_bytes / store_bytes:.1f}x than Parquet)")
+        print(f"   reconstruct a day   cold {cold:.2f} ms   same segment {warm:.2f} ms   "
+              f"(raw Parquet read {raw:.2f} ms)")
+        print(f"   build               {build:.2f} s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--snapshot-interval", type=int, default=None)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.tickers, args.samples, args.snapshot_interval)
@@ -0,0 +1,89 @@
+"""
+Benchmark: cache quente (Arrow IPC por memory map) vs. read_refined.
+
+Refina um histórico sintético e mede, para a janela dos últimos N pregões:
+  * primeira carga (lê o refinado e grava a janela);
+  * leitura quente (mediana de --repeat cargas);
+  * read_refined da mesma janela, para comparação;
+  * extensão incremental quando um novo dia é refinado vs. reconstrução completa;
+  * despejo LRU com um orçamento de bytes que comporta só uma janela.
+
+Uso:
+    python -m benchmarks.bench_hot_cache --days 60 --tickers 90
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.synthetic import write_raw_tree
+from src.extraction.csv_converter import convert_csv_to_parquet
+from src.query.hot_cache import HotCache
+from src.query.reader import read_refined
+from src.transform.partitions import list_raw_partitions
+from src.transform.refine import refine_all, refine_partition
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def run(days, n_tickers=90, repeat=200):
+    root = tempfile.mkdtemp(prefix="bench-hot-cache-")
+    try:
+        raw_dir, refined_dir, cache_dir = (os.path.join(root, name) for name in ("raw", "refined", "cache"))
+        history = days + 20
+        with contextlib.redirect_stdout(io.StringIO()):
+            for csv_path in write_raw_tree(raw_dir, history + 1, n_tickers):
+                convert_csv_to_parquet(csv_path)
+            partitions = list_raw_partitions(raw_dir)
+            new_day, new_path = partitions[-1]
+            refine_all(raw_dir, refined_dir, end=partitions[-2][0], manifest_path=os.path.join(root, "manifest.sqlite"))
+
+        cache = HotCache(cache_dir, refined_dir)
+        first, table = timed(lambda: cache.load(days))
+        warm = statistics.median(timed(lambda: cache.load(days))[0] for _ in range(repeat))
+        start, end = table.column("date")[0].as_py(), table.column("date")[-1].as_py()
+        parquet = statistics.median(
+            timed(lambda: read_refined(date_range=(start, end), refined_dir=refined_dir))[0] for _ in range(5)
+        )
+
+        print(f"\n📊 {days} days × {n_tickers} tickers ({table.num_rows} rows, {cache.total_bytes() / 1024:.0f} KB)")
+        print(f"   first load (build window)   {first * 1000:10.2f} ms")
+        print(f"   warm load (memory map)      {warm * 1000:10.3f} ms  {'✅' if warm < 0.001 else '⚠️'} target < 1 ms")
+        print(f"   read_refined same window    {parquet * 1000:10.2f} ms  ({parquet / warm:.0f}x slower)")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            refine_partition(new_day, new_path, refined_dir)
+        extend, _ = timed(lambda: cache.add_day(new_day))
+        rolled = cache.load(days)
+        rebuild_cache = HotCache(os.path.join(root, "rebuild"), refined_dir)
+        rebuild, rebuilt = timed(lambda: rebuild_cache.load(days))
+        assert rolled.column("date")[-1].as_py() == new_day
+        assert rolled.equals(rebuilt), "incremental window differs from a full rebuild"
+        print(f"   add_day (roll forward)      {extend * 1000:10.2f} ms  vs full rebuild {rebuild * 1000:.2f} ms")
+
+        window_bytes = max(w["bytes"] for w in cache._index["windows"].values())
+        small = HotCache(os.path.join(root, "small"), refined_dir, max_bytes=int(window_bytes * 1.5))
+        small.load(days)
+        small.load(days // 2)
+        small.load(days, end=start)
+        print(f"   LRU budget {small.max_bytes / 1024:.0f} KB: {len(small._index['windows'])} window(s) kept "
+              f"of 3 built, {small.total_bytes() / 1024:.0f} KB on disk")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    run(args.days, args.tickers, args.repeat)
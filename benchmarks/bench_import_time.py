@@ -0,0 +1,77 @@
+"""
+Orçamento de tempo de importação (python -X importtime).
+
+Importa cada módulo em um interpretador novo e soma o tempo cumulativo
+informado pelo -X importtime. Falha (código de saída 1) se algum módulo
+passar do orçamento (IMPORT_TIME_BUDGET_MS) ou carregar uma dependência pesada
+que só deveria ser importada no caminho que a usa. As mesmas verificações rodam
+na suíte de testes (tests/test_import_time.py); este script é o relatório.
+
+Uso:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --budget-ms 100 --repeat 5
+"""
+import argparse
+import subprocess
+import sys
+
+from config.settings import IMPORT_TIME_BUDGET_MS, PROJECT_ROOT
+
+# Module -> heavy top-level packages it must not import eagerly
+CHECKS = {
+    "src.extraction.b3_scraper": ["selenium", "pandas", "numpy", "pyarrow", "requests", "zipfile"],
+    "src.extraction.preflight": ["selenium", "pandas", "numpy", "pyarrow", "requests"],
+    "src.transform.partitions": ["pyarrow", "pandas"],
+}
+
+
+def import_profile(module, statement=None):
+    """(cumulative microseconds of `module`, set of top-level packages imported) from a fresh interpreter"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement or f"import {module}"],
+        capture_output=True, text=True, cwd=PROJECT_ROOT,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    cumulative, packages = None, set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative_us.isdigit():
+            continue
+        packages.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative, packages
+
+
+def startup_packages():
+    """Packages the interpreter loads on its own (site, .pth hooks): not the module's fault"""
+    return import_profile(None, "pass")[1]
+
+
+def run(budget_ms=IMPORT_TIME_BUDGET_MS, repeat=3):
+    startup = startup_packages()
+    failures = []
+    for module, forbidden in CHECKS.items():
+        samples = []
+        for _ in range(repeat):
+            cumulative, packages = import_profile(module)
+            samples.append(cumulative)
+        best_ms = min(samples) / 1000
+        eager = sorted(set(forbidden) & (packages - startup))
+        ok = best_ms <= budget_ms and not eager
+        print(f"{'✅' if ok else '❌'} {module}: {best_ms:.1f} ms (budget {budget_ms} ms)"
+              + (f", imports {', '.join(eager)} eagerly" if eager else ""))
+        if not ok:
+            failures.append(module)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(1 if run(args.budget_ms, args.repeat) else 0)
@@ -0,0 +1,91 @@
+"""
+Benchmark: extração em memória (download -> sinks) vs. caminho em disco.
+
+Para N downloads sintéticos (bytes do CSV já em memória, como após o fetch):
+
+    disco    save_raw_content + convert_csv_to_parquet + upload_raw para o S3 local
+    memória  memory_pipeline.ingest para LocalSink + S3Sink (mesmo S3 local)
+
+Mede o tempo e o I/O do processo (rchar/wchar de /proc/self/io). A
+deduplicação fica desligada no caminho em disco para comparar só o transporte.
+
+Uso:
+    python -m benchmarks.bench_memory_pipeline --days 250
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import csv_filename, generate_days, render_csv
+
+
+def io_counters():
+    """(bytes read, bytes written) through syscalls so far, or (None, None) without /proc"""
+    counters = {}
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                name, value = line.split(":")
+                counters[name] = int(value)
+    except OSError:
+        return None, None
+    return counters["rchar"], counters["wchar"]
+
+
+def measure(run):
+    read_before, written_before = io_counters()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    seconds = time.perf_counter() - started
+    read_after, written_after = io_counters()
+    if read_before is None:
+        return seconds, None, None
+    return seconds, read_after - read_before, written_after - written_before
+
+
+def run(days, n_tickers=90, keep_csv=True):
+    from src.extraction import b3_scraper
+    from src.extraction.memory_pipeline import ingest
+    from src.ingestion.s3_uploader import LocalS3Backend, upload_raw
+    from src.ingestion.sinks import LocalSink, S3Sink
+
+    downloads = [(csv_filename(day), render_csv(day, rows)) for day, rows in generate_days(days, n_tickers)]
+    root = tempfile.mkdtemp(prefix="bench-memory-pipeline-")
+    b3_scraper.RAW_DEDUP_ENABLED = False
+    try:
+        def disk_path():
+            raw_dir = os.path.join(root, "disk-raw")
+            for name, content in downloads:
+                b3_scraper.convert_csv_to_parquet(b3_scraper.save_raw_content(content, name, raw_dir))
+            upload_raw(raw_dir, backend=LocalS3Backend(os.path.join(root, "disk-s3")))
+
+        def memory_path():
+            sinks = [LocalSink(os.path.join(root, "memory-raw")),
+                     S3Sink(LocalS3Backend(os.path.join(root, "memory-s3")))]
+            for name, content in downloads:
+                ingest(content, name, sinks, keep_csv)
+
+        print(f"\n📊 {days} downloads × {n_tickers} tickers, local copy + fake S3"
+              f"{'' if keep_csv else ', Parquet only in memory mode'}")
+        disk = measure(disk_path)
+        memory = measure(memory_path)
+        for label, (seconds, read, written) in (("disk (save, re-read, upload)", disk), ("in-memory sinks", memory)):
+            io_text = "" if read is None else f"  read {read / 1024 / 1024:7.2f} MB  written {written / 1024 / 1024:7.2f} MB"
+            print(f"   {label:<30} {seconds:7.2f}s ({seconds / days * 1000:.2f} ms/day){io_text}")
+        print(f"   speedup {disk[0] / memory[0]:.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--no-csv", action="store_true", help="Memory mode writes only the Parquet")
+    args = parser.parse_args()
+    run(args.days, args.tickers, not args.no_csv)
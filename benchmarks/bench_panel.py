@@ -0,0 +1,89 @@
+"""
+Benchmark: painel denso memmap vs. concat + pivot no pandas.
+
+Para um histórico sintético de data/raw, compara o caminho atual (ler todos os
+Parquet diários, concatenar, pivotar e calcular média móvel de 20 dias,
+variação diária e ranking entre ações da participação) com o PanelStore, que
+abre as matrizes por memory map e calcula o mesmo sobre os arrays. Mede
+também a construção do painel e o custo de acrescentar um pregão.
+
+Uso:
+    python -m benchmarks.bench_panel --years 1 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.extraction.csv_converter import PARTICIPATION_COLUMN, TICKER_COLUMN, convert_csv_to_parquet
+from src.query.panel import PanelStore, diff, rank, rolling
+from src.transform.partitions import list_raw_partitions
+
+
+def with_pandas(partitions, window):
+    frames = [pd.read_parquet(path, columns=[TICKER_COLUMN, PARTICIPATION_COLUMN]).assign(date=day)
+              for day, path in partitions]
+    wide = pd.concat(frames).pivot_table(index="date", columns=TICKER_COLUMN, values=PARTICIPATION_COLUMN,
+                                         aggfunc="sum")
+    return (wide.rolling(window).mean(), wide.diff(), wide.rank(axis=1, ascending=False, method="first"))
+
+
+def with_panel(panel_dir, window, tickers):
+    panel = PanelStore(panel_dir)
+    # same column order as the pivot, so ties rank alike
+    values = panel.values("participacao_pct")[:, panel.ticker_index(tickers)]
+    return rolling(values, window), diff(values), rank(values)
+
+
+def run(years, n_tickers=90, window=20):
+    root = tempfile.mkdtemp(prefix="bench-panel-")
+    try:
+        raw_dir, panel_dir = os.path.join(root, "raw"), os.path.join(root, "panel")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for csv_path in write_raw_tree(raw_dir, trading_days_for_years(years), n_tickers):
+                convert_csv_to_parquet(csv_path)
+        partitions = list_raw_partitions(raw_dir)
+
+        panel = PanelStore(panel_dir)
+        started = time.perf_counter()
+        for day, path in partitions[:-1]:
+            panel.append(day, path)
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        panel.append(*partitions[-1])
+        append = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = with_pandas(partitions, window)
+        pandas_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        result = with_panel(panel_dir, window, list(expected[0].columns))
+        panel_seconds = time.perf_counter() - started
+
+        for got, want in zip(result, expected):
+            assert np.allclose(got, want.to_numpy(), equal_nan=True, rtol=1e-4, atol=1e-5)
+
+        print(f"\n📊 {years} year(s): {len(partitions)} days × {len(panel.tickers)} tickers, window {window}")
+        print(f"   pandas concat + pivot + ops  {pandas_seconds * 1000:10.1f} ms")
+        print(f"   panel memmap + ops           {panel_seconds * 1000:10.1f} ms  "
+              f"({pandas_seconds / panel_seconds:.0f}x faster)")
+        print(f"   panel build                  {build:10.2f} s   append one day {append * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--window", type=int, default=20)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.tickers, args.window)
@@ -0,0 +1,245 @@
+"""
+Suíte de benchmarks do pipeline sobre histórico sintético (1, 5 e 20 anos).
+
+Para cada tamanho de histórico gera os CSVs da B3 (benchmarks.synthetic) e
+mede as etapas:
+
+    convert   CSV -> Parquet (csv_converter), ms por arquivo
+    discover  descoberta das partições brutas (list_raw_partitions) e busca de um dia
+    refine    refinamento de todas as partições (refine_all)
+    read      leitura do bruto, do refinado completo e do histórico de uma ação
+
+Segue o formato dos demais benchmarks do repositório (scripts executáveis, sem
+pytest-benchmark/asv, que não são dependências do projeto). O que essas
+ferramentas dariam vem daqui:
+
+    baseline   --save-baseline grava os resultados em BENCHMARK_BASELINE_PATH
+               (versionado, com o baseline de 1 ano já incluído), uma entrada por
+               ambiente (sistema, arquitetura, Python), mesclando os tamanhos
+               medidos em execuções separadas. Sem entrada para o ambiente atual,
+               a comparação usa a de outro ambiente e avisa
+    compare    --compare mede e compara com o baseline do ambiente atual (ou com
+               um JSON de --output/--save-baseline), mostrando todas as métricas;
+               as que ficarem mais lentas que o limite (--threshold,
+               BENCHMARK_REGRESSION_THRESHOLD) são regressões e o script sai com 1
+
+Uso:
+    python -m benchmarks.bench_pipeline --years 1 5 20 --save-baseline
+    python -m benchmarks.bench_pipeline --years 1 --compare
+    python -m benchmarks.bench_pipeline --years 1 --compare results.json
+    python -m benchmarks.bench_pipeline --years 1 5 20 --output results.json
+    python -m benchmarks.bench_pipeline --years 20 --stages convert discover
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+import pyarrow.dataset as ds
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from config.settings import BENCHMARK_BASELINE_PATH, BENCHMARK_REGRESSION_THRESHOLD, PROJECT_ROOT
+from src.extraction import csv_converter
+from src.transform.partitions import list_raw_partitions, raw_partition_path
+from src.transform.refine import REFINED_PARTITIONING, refine_all
+
+STAGES = ("convert", "discover", "refine", "read")
+
+
+def best_of(func, repeat):
+    """Best wall time of `repeat` calls (stdout of the pipeline code is silenced)"""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(years, n_tickers=90, stages=STAGES, repeat=3, workdir=None):
+    """Returns {metric name: seconds} for one history size"""
+    root = tempfile.mkdtemp(prefix="bench-pipeline-", dir=workdir)
+    results = {}
+    try:
+        raw_dir, refined_dir = os.path.join(root, "raw"), os.path.join(root, "refined")
+        n_days = trading_days_for_years(years)
+        started = time.perf_counter()
+        csv_paths = write_raw_tree(raw_dir, n_days, n_tickers)
+        print(f"\n📊 {years} year(s): {n_days} days x {n_tickers} tickers "
+              f"(generated in {time.perf_counter() - started:.1f}s)")
+
+        # Conversion always runs (every later stage reads its Parquet output); repeats overwrite the files
+        def convert_all():
+            for path in csv_paths:
+                csv_converter.convert_csv_to_parquet(path)
+
+        elapsed = best_of(convert_all, repeat if "convert" in stages else 1)
+        if "convert" in stages:
+            results["convert_total"] = elapsed
+            results["convert_per_file"] = elapsed / n_days
+
+        partitions = list_raw_partitions(raw_dir)
+        if "discover" in stages:
+            results["discover_all"] = best_of(lambda: list_raw_partitions(raw_dir), repeat)
+            middle = partitions[len(partitions) // 2][0]
+            results["discover_one_day"] = best_of(lambda: raw_partition_path(middle, raw_dir), repeat)
+
+        if "refine" in stages or "read" in stages:
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                refine_all(raw_dir, refined_dir, max_workers=1, manifest_path=os.path.join(root, "manifest.sqlite"))
+                elapsed = time.perf_counter() - started
+            if "refine" in stages:
+                results["refine_total"] = elapsed
+                results["refine_per_partition"] = elapsed / len(partitions)
+
+        if "read" in stages:
+            raw_files = [path for _, path in partitions]
+            results["read_raw_all"] = best_of(lambda: ds.dataset(raw_files, format="parquet").to_table(), repeat)
+            results["read_refined_all"] = best_of(
+                lambda: ds.dataset(refined_dir, partitioning=REFINED_PARTITIONING).to_table(), repeat
+            )
+            first_day = os.path.join(refined_dir, sorted(os.listdir(refined_dir))[0])
+            ticker = sorted(os.listdir(first_day))[0][len("ticker="):]
+            results["read_refined_one_ticker"] = best_of(
+                lambda: ds.dataset(refined_dir, partitioning=REFINED_PARTITIONING).to_table(
+                    filter=ds.field("ticker") == ticker
+                ),
+                repeat,
+            )
+
+        for name, seconds in results.items():
+            print(f"   {name:<26} {seconds * 1000:12.2f} ms")
+        return results
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def environment():
+    """Key of the machine and interpreter a baseline was measured on"""
+    return f"{platform.system()}-{platform.machine()}-py{platform.python_version()}"
+
+
+def load_baseline(path, tickers):
+    """
+    {size: {metric: seconds}} to compare against: the current environment's entry of a
+    --save-baseline file (another environment's, with a warning, when this one has none),
+    or the results of an --output file. None when there is nothing comparable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    if "results" in data:
+        entry = data
+    else:
+        environments = data.get("environments", {})
+        entry = environments.get(environment())
+        if entry is None:
+            others = [name for name, other in sorted(environments.items()) if other.get("tickers") == tickers]
+            if not others:
+                return None
+            entry = environments[others[0]]
+            print(f"⚠️ No baseline for {environment()}; comparing with {others[0]}, measured on other "
+                  f"hardware (save one here with --save-baseline)")
+    if entry.get("tickers", tickers) != tickers:
+        print(f"⚠️ Baseline in {path} was measured with {entry['tickers']} tickers, not {tickers}")
+        return None
+    return entry["results"]
+
+
+def save_baseline(path, results, tickers, repeat):
+    """Merges `results` into the current environment's entry (other sizes and machines are kept)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {"environments": {}}
+    entry = data["environments"].get(environment())
+    if entry is None or entry.get("tickers") != tickers:
+        entry = {"results": {}}
+    entry.update(tickers=tickers, repeat=repeat, saved_at=datetime.datetime.now().isoformat(timespec="seconds"))
+    entry["results"].update(results)
+    data["environments"][environment()] = entry
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def compare(current, baseline, threshold):
+    """
+    (key, baseline, current, regressed) for every metric measured in both runs; a metric
+    regressed when it is slower than baseline * (1 + threshold)
+    """
+    rows = []
+    for size, metrics in current.items():
+        for name, seconds in metrics.items():
+            before = baseline.get(size, {}).get(name)
+            if before:
+                rows.append((f"{size}/{name}", before, seconds, seconds > before * (1 + threshold)))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", default=None, help="Where the synthetic tree is generated (default: system temp)")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=os.path.join(PROJECT_ROOT, BENCHMARK_BASELINE_PATH),
+                        help="Baseline file used by --save-baseline and a bare --compare")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store the results as this environment's baseline")
+    parser.add_argument("--compare", nargs="?", const="", default=None,
+                        help="Compare with the baseline (or with this JSON from --output/--save-baseline)")
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                        help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    results = {f"{years:g}y": run(years, args.tickers, args.stages, args.repeat, args.workdir) for years in args.years}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "tickers": args.tickers, "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if args.compare is not None:
+        baseline_path = args.compare or args.baseline
+        baseline = load_baseline(baseline_path, args.tickers)
+        if baseline is None:
+            print(f"⚠️ No baseline for {environment()} in {baseline_path}; run with --save-baseline first")
+            sys.exit(1)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n📈 Against {baseline_path} ({environment()})")
+        for key, before, after, regressed in rows:
+            print(f"{'❌' if regressed else '  '} {key:<34} {before * 1000:12.2f} ms → {after * 1000:12.2f} ms  "
+                  f"({after / before:.2f}x)")
+        regressions = [row for row in rows if row[3]]
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) above {args.threshold:.0%}")
+        else:
+            print(f"✅ No regressions above {args.threshold:.0%} in {len(rows)} metrics")
+
+    # Saved after the comparison, so `--compare --save-baseline` checks against the previous baseline
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args.tickers, args.repeat)
+        print(f"💾 Baseline for {environment()} saved to {args.baseline}")
+
+    if args.compare is not None and regressions:
+        sys.exit(1)
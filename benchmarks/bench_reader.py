@@ -0,0 +1,107 @@
+"""
+Benchmark: read_refined (pushdown + projeção + memory map) vs. leitura ingênua.
+
+Consulta típica: `participacao_pct` de 5 ações durante um mês. A leitura
+ingênua faz `pd.read_parquet` do diretório refinado inteiro e filtra no pandas.
+Cada variante roda em um processo próprio, para que o pico de memória
+(ru_maxrss) seja só dela.
+
+Uso:
+    python -m benchmarks.bench_reader --years 1
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from config.settings import PROJECT_ROOT
+
+VARIANTS = ("naive", "read_refined", "read_refined_compact")
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_variant(variant, refined_dir, compact_dir, start, end, tickers):
+    """Runs one variant in this process; returns (seconds, rows, MB of peak RSS above the imports)"""
+    import pandas as pd
+    from src.query.reader import read_refined
+
+    baseline_rss = peak_rss_mb()
+    started = time.perf_counter()
+    if variant == "naive":
+        df = pd.read_parquet(refined_dir)
+        df["date"] = pd.to_datetime(df["date"].astype(str))
+        df = df[(df["date"] >= start) & (df["date"] <= end) & df["ticker"].astype(str).isin(tickers)]
+        rows = len(df[["date", "ticker", "participacao_pct"]])
+    else:
+        source = "compact" if variant == "read_refined_compact" else "refined"
+        df = read_refined(["date", "ticker", "participacao_pct"], (start, end), tickers, refined_dir=refined_dir,
+                          source=source, compact_dir=compact_dir, as_pandas=True)
+        rows = len(df)
+    return time.perf_counter() - started, rows, peak_rss_mb() - baseline_rss
+
+
+def measure(variant, refined_dir, compact_dir, start, end, tickers):
+    """Runs a variant in a fresh interpreter and returns its seconds, rows and peak RSS growth"""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_reader", "--worker", variant, refined_dir, compact_dir,
+         start, end, *tickers],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(years, n_tickers=90):
+    from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+    from src.extraction.csv_converter import convert_csv_to_parquet
+    from src.transform.compaction import compact
+    from src.transform.refine import refine_all
+
+    root = tempfile.mkdtemp(prefix="bench-reader-")
+    try:
+        raw_dir, refined_dir, compact_dir = (os.path.join(root, name) for name in ("raw", "refined", "compact"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for csv_path in write_raw_tree(raw_dir, trading_days_for_years(years), n_tickers):
+                convert_csv_to_parquet(csv_path)
+            refine_all(raw_dir, refined_dir, manifest_path=os.path.join(root, "manifest.sqlite"))
+            compact(refined_dir, compact_dir, manifest_path=os.path.join(root, "manifest.sqlite"))
+
+        dates = sorted(name[len("date="):] for name in os.listdir(refined_dir) if name.startswith("date="))
+        start, end = dates[len(dates) // 2], dates[min(len(dates) // 2 + 21, len(dates) - 1)]
+        first_day = os.path.join(refined_dir, f"date={dates[0]}")
+        tickers = sorted(name[len("ticker="):] for name in os.listdir(first_day))[:5]
+
+        print(f"\n📊 {years} year(s), {len(dates)} days; query {start}..{end}, {len(tickers)} tickers, 1 column")
+        results = {variant: measure(variant, refined_dir, compact_dir, start, end, tickers) for variant in VARIANTS}
+        naive = results["naive"]
+        for variant, r in results.items():
+            print(f"   {variant:<22} {r['seconds'] * 1000:10.1f} ms  peak RSS +{r['rss_mb']:7.1f} MB  "
+                  f"rows {r['rows']:<5} ({naive['seconds'] / r['seconds']:.0f}x faster)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("worker_args", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        refined_dir, compact_dir, start, end, *tickers = args.worker_args
+        seconds, rows, rss_mb = run_variant(args.worker, refined_dir, compact_dir, start, end, tickers)
+        print(json.dumps({"seconds": seconds, "rows": rows, "rss_mb": rss_mb}))
+    else:
+        for years in args.years:
+            run(years, args.tickers)
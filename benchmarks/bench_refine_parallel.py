@@ -0,0 +1,70 @@
+"""
+Benchmark: escalabilidade do refine_all com ProcessPoolExecutor.
+
+Refina o mesmo histórico sintético com 1, 2, 4, ... processos (até o número
+de núcleos, ou a lista de --workers) e mostra vazão (partições/s), speedup e
+eficiência (speedup / processos). Também confere que todas as execuções
+produzem o mesmo número de linhas.
+
+Uso:
+    python -m benchmarks.bench_refine_parallel --years 2
+    python -m benchmarks.bench_refine_parallel --years 5 --workers 1 4 8 16
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.extraction.csv_converter import convert_csv_to_parquet
+from src.transform.refine import refine_all
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    workers, counts = 1, []
+    while workers < cores:
+        counts.append(workers)
+        workers *= 2
+    return counts + [cores]
+
+
+def run(years, workers_list, n_tickers=90):
+    root = tempfile.mkdtemp(prefix="bench-refine-parallel-")
+    try:
+        raw_dir = os.path.join(root, "raw")
+        for csv_path in write_raw_tree(raw_dir, trading_days_for_years(years), n_tickers):
+            convert_csv_to_parquet(csv_path)
+
+        print(f"\n📊 {years} year(s), {os.cpu_count()} core(s)")
+        baseline, expected_rows = None, None
+        for workers in workers_list:
+            refined_dir = os.path.join(root, f"refined-{workers}")
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = refine_all(raw_dir, refined_dir, max_workers=workers,
+                                     manifest_path=os.path.join(root, f"manifest-{workers}.sqlite"))
+            elapsed = time.perf_counter() - started
+            rows = sum(r["rows"] for r in results)
+            expected_rows = expected_rows or rows
+            assert rows == expected_rows, f"{workers} workers refined {rows} rows, expected {expected_rows}"
+            baseline = baseline or elapsed
+            speedup = baseline / elapsed
+            print(f"   workers={workers:<3} {elapsed:7.2f}s  {len(results) / elapsed:7.1f} partitions/s  "
+                  f"speedup {speedup:4.1f}x  efficiency {speedup / workers:4.0%}")
+            shutil.rmtree(refined_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--tickers", type=int, default=90)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.workers or default_workers(), args.tickers)
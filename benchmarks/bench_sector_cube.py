@@ -0,0 +1,85 @@
+"""
+Benchmark: gráfico de setores servido pelo cubo vs. agregação dos dados detalhados.
+
+Para um histórico sintético de data/raw, compara o caminho atual (ler todos os
+Parquet diários, concatenar e agrupar por dia e setor a participação) com a
+consulta ao SectorCube, e confere que os valores batem. Mede também a
+construção do cubo e a atualização incremental quando chega um pregão novo
+(só as linhas daquele dia são reescritas).
+
+Uso:
+    python -m benchmarks.bench_sector_cube --years 1 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.extraction.csv_converter import PARTICIPATION_COLUMN, SECTOR_COLUMN, convert_csv_to_parquet
+from src.query.sector_cube import SectorCube, record_sector_day
+from src.transform.partitions import list_raw_partitions
+
+
+def with_pandas(partitions):
+    frames = [pd.read_parquet(path, columns=[SECTOR_COLUMN, PARTICIPATION_COLUMN]).assign(date=day.isoformat())
+              for day, path in partitions]
+    return pd.concat(frames).pivot_table(index="date", columns=SECTOR_COLUMN, values=PARTICIPATION_COLUMN,
+                                         aggfunc="sum")
+
+
+def run(years, n_tickers=90):
+    root = tempfile.mkdtemp(prefix="bench-sector-cube-")
+    try:
+        raw_dir, cube_path = os.path.join(root, "raw"), os.path.join(root, "sector_cube.sqlite")
+        with contextlib.redirect_stdout(io.StringIO()):
+            csv_paths = write_raw_tree(raw_dir, trading_days_for_years(years) + 1, n_tickers)
+            for csv_path in csv_paths[:-1]:
+                convert_csv_to_parquet(csv_path)
+
+        with SectorCube(cube_path) as cube, contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            cube.build(raw_dir)
+            build = time.perf_counter() - started
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            convert_csv_to_parquet(csv_paths[-1])
+        partitions = list_raw_partitions(raw_dir)
+        started = time.perf_counter()
+        record_sector_day(*partitions[-1], raw_dir, cube_path=cube_path)
+        update = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = with_pandas(partitions)
+        pandas_seconds = time.perf_counter() - started
+        with SectorCube(cube_path) as cube:
+            started = time.perf_counter()
+            result = cube.series("participacao_pct")
+            cube_seconds = time.perf_counter() - started
+
+        assert list(result.index) == list(expected.index)
+        result = result[list(expected.columns)]
+        assert np.allclose(result.to_numpy(), expected.to_numpy(), equal_nan=True, rtol=1e-4, atol=1e-5)
+
+        print(f"\n📊 {years} year(s): {len(partitions)} days × {len(expected.columns)} sectors, {n_tickers} tickers")
+        print(f"   pandas read + concat + groupby  {pandas_seconds * 1000:10.1f} ms")
+        print(f"   sector cube query               {cube_seconds * 1000:10.1f} ms  "
+              f"({pandas_seconds / cube_seconds:.0f}x faster)")
+        print(f"   cube build                      {build:10.2f} s   new day update {update * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--tickers", type=int, default=90)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.tickers)
@@ -0,0 +1,92 @@
+"""
+Benchmark: histórico de uma ação pelo índice por ticker vs. varredura das partições.
+
+Para um histórico sintético de data/raw, compara o caminho atual (abrir todas
+as partições date=* e filtrar a coluna Código) com TickerIndex.read_history,
+que só abre as partições e row groups onde a ação aparece, e confere que as
+linhas batem. Usa uma ação sempre presente na carteira e outra que entra e sai
+nos rebalanceamentos. Mede também a construção do índice, a atualização com
+um pregão novo (acréscimo ao fim de cada código), a regravação de um pregão
+antigo (reordenação completa) e o tamanho do .npz.
+
+Uso:
+    python -m benchmarks.bench_ticker_index --years 1 5
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import trading_days_for_years, write_raw_tree
+from src.catalog.ticker_index import TickerIndex, record_ticker_partition
+from src.extraction.csv_converter import PARTICIPATION_COLUMN, QUANTITY_COLUMN, TICKER_COLUMN, convert_csv_to_parquet
+from src.transform.partitions import list_raw_partitions
+
+COLUMNS = [PARTICIPATION_COLUMN, QUANTITY_COLUMN]
+
+
+def full_scan(partitions, ticker):
+    tables = []
+    for day, path in partitions:
+        table = pq.read_table(path, columns=COLUMNS + [TICKER_COLUMN], filters=[(TICKER_COLUMN, "==", ticker)])
+        tables.append(table.drop_columns([TICKER_COLUMN])
+                      .append_column("date", pa.array([day] * table.num_rows, pa.date32())))
+    return pa.concat_tables(tables)
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def run(years, n_tickers=90):
+    root = tempfile.mkdtemp(prefix="bench-ticker-index-")
+    try:
+        raw_dir, index_path = os.path.join(root, "raw"), os.path.join(root, "ticker_index.npz")
+        with contextlib.redirect_stdout(io.StringIO()):
+            csv_paths = write_raw_tree(raw_dir, trading_days_for_years(years) + 1, n_tickers)
+            for csv_path in csv_paths[:-1]:
+                convert_csv_to_parquet(csv_path)
+
+        index = TickerIndex(index_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, build = timed(index.build, raw_dir)
+            convert_csv_to_parquet(csv_paths[-1])
+        partitions = list_raw_partitions(raw_dir)
+        _, update = timed(record_ticker_partition, *partitions[-1], raw_dir, index_path)
+        _, replace = timed(record_ticker_partition, *partitions[len(partitions) // 2], raw_dir, index_path)
+
+        index = TickerIndex(index_path)
+        presence = np.diff(index.offsets)
+        always, sometimes = index.tickers[np.argmax(presence)], index.tickers[np.argmin(presence)]
+        print(f"\n📊 {years} year(s): {len(partitions)} partitions, {len(index.tickers)} tickers, "
+              f"index {os.path.getsize(index_path) / 1024:.0f} KB")
+        for ticker in (always, sometimes):
+            expected, scan_seconds = timed(full_scan, partitions, ticker)
+            result, index_seconds = timed(index.read_history, ticker, COLUMNS)
+            assert result.equals(expected)
+            print(f"   {ticker} ({result.num_rows}/{len(partitions)} days)")
+            print(f"      full scan        {scan_seconds * 1000:10.1f} ms")
+            print(f"      ticker index     {index_seconds * 1000:10.1f} ms  "
+                  f"({scan_seconds / index_seconds:.1f}x faster)")
+        print(f"   index build {build:.2f} s   new day update {update * 1000:.1f} ms   "
+              f"rewritten day update {replace * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=float, nargs="+", default=[1])
+    parser.add_argument("--tickers", type=int, default=90)
+    args = parser.parse_args()
+    for years in args.years:
+        run(years, args.tickers)
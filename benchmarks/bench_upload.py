@@ -0,0 +1,47 @@
+"""
+Benchmark: upload de data/raw para o S3 (backend local com latência simulada).
+
+Compara o envio serial (1 worker, equivalente ao sync ad hoc) com o paralelo,
+e mede a reexecução, em que todos os objetos já existem e são pulados por ETag.
+
+Uso:
+    python -m benchmarks.bench_upload --days 250 --latency 0.02 --workers 1 8 16
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.synthetic import write_raw_tree
+from src.extraction.csv_converter import convert_csv_to_parquet
+from src.ingestion.s3_uploader import LocalS3Backend, upload_raw
+
+
+def run(days, latency, workers_list, n_tickers=90):
+    root = tempfile.mkdtemp(prefix="bench-upload-")
+    try:
+        raw_dir = os.path.join(root, "raw")
+        for csv_path in write_raw_tree(raw_dir, days, n_tickers):
+            convert_csv_to_parquet(csv_path)
+
+        print(f"\n📊 {days} partitions, {latency * 1000:.0f} ms simulated latency per request")
+        baseline = None
+        for workers in workers_list:
+            backend = LocalS3Backend(os.path.join(root, f"s3-{workers}"), latency=latency)
+            first = upload_raw(raw_dir, backend=backend, max_workers=workers)
+            again = upload_raw(raw_dir, backend=backend, max_workers=workers)
+            baseline = baseline or first["seconds"]
+            print(f"   workers={workers:<3} upload {first['seconds']:7.2f}s ({baseline / first['seconds']:.1f}x)  "
+                  f"re-run {again['seconds']:6.2f}s, {len(again['uploaded'])} re-uploaded")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 16])
+    parser.add_argument("--tickers", type=int, default=90)
+    args = parser.parse_args()
+    run(args.days, args.latency, args.workers, args.tickers)
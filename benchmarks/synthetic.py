@@ -0,0 +1,142 @@
+"""
+Gerador de dados sintéticos no formato dos arquivos IBOVDia_DD-MM-YY.csv da B3.
+
+Reproduz o que importa para desempenho: encoding latin-1, separador `;`,
+milhar `.` e decimal `,`, linha de título, rodapé ("Quantidade Teórica Total",
+"Redutor") e o comportamento da carteira (quantidades teóricas fixas entre os
+rebalanceamentos quadrimestrais, participação variando diariamente com o preço).
+
+Uso:
+    python -m benchmarks.synthetic /tmp/raw --days 252 --tickers 90
+"""
+import argparse
+import datetime
+import os
+import random
+
+SECTORS = [
+    "Bens Indls / Máqs e Equips",
+    "Cons N Básico / Alimentos Processados",
+    "Consumo Cíclico / Comércio",
+    "Financeiro / Intermediários Financeiros",
+    "Materiais Básicos / Mineração",
+    "Petróleo, Gás e Biocombustíveis",
+    "Saúde / Comércio e Distribuição",
+    "Tecnologia da Informação / Programas e Serviços",
+    "Telecomunicação",
+    "Utilidade Pública / Energia Elétrica",
+]
+TYPES = ["ON NM", "PN N1", "ON ED NM", "UNT N2", "PNA N1"]
+REBALANCE_MONTHS = (1, 5, 9)
+
+
+def business_days(start, end):
+    """Weekdays between start and end (inclusive)"""
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += datetime.timedelta(days=1)
+
+
+def _ticker(i):
+    letters = "".join(chr(ord("A") + (i // 26 ** k) % 26) for k in range(3, -1, -1))
+    return f"{letters}{3 + i % 2 * 1}"
+
+
+def generate_days(n_days, n_tickers=90, start=datetime.date(2015, 1, 2), seed=42, universe_factor=1.3):
+    """
+    Yields (date, rows) for `n_days` business days. Each row is
+    (sector, ticker, asset, type, theoretical quantity, participation %).
+    """
+    rng = random.Random(seed)
+    universe = int(n_tickers * universe_factor)
+    meta = [
+        (rng.choice(SECTORS), _ticker(i), f"EMPRESA {i:04d}", rng.choice(TYPES))
+        for i in range(universe)
+    ]
+    prices = [rng.uniform(5, 80) for _ in range(universe)]
+
+    def rebalance():
+        members = sorted(rng.sample(range(universe), n_tickers), key=lambda i: (meta[i][0], meta[i][1]))
+        return members, {i: rng.randint(50_000_000, 5_000_000_000) for i in members}
+
+    members, quantities = rebalance()
+    last_period = None
+    produced = 0
+    for day in business_days(start, datetime.date(2100, 1, 1)):
+        if produced >= n_days:
+            break
+        period = (day.year, max(m for m in REBALANCE_MONTHS if m <= day.month))
+        if last_period is not None and period != last_period:
+            members, quantities = rebalance()
+        last_period = period
+        for i in range(universe):
+            prices[i] *= 1 + rng.gauss(0, 0.015)
+        weights = [quantities[i] * prices[i] for i in members]
+        total = sum(weights)
+        rows = [
+            (meta[i][0], meta[i][1], meta[i][2], meta[i][3], quantities[i], round(100 * w / total, 3))
+            for i, w in zip(members, weights)
+        ]
+        yield day, rows
+        produced += 1
+
+
+def _fmt_int(value):
+    return f"{value:,}".replace(",", ".")
+
+
+def _fmt_dec(value, places=3):
+    return f"{value:,.{places}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def render_csv(day, rows, index="IBOV"):
+    """Renders one day exactly like the B3 download (sector view), encoded as latin-1"""
+    lines = [
+        f"{index} - Carteira do Dia {day.strftime('%d/%m/%y')}",
+        "Setor;Código;Ação;Tipo;Qtde. Teórica;Part. (%);Part. (%)Acum.;",
+    ]
+    cumulative = 0.0
+    for sector, ticker, asset, kind, quantity, part in rows:
+        cumulative += part
+        lines.append(f"{sector};{ticker};{asset};{kind};{_fmt_int(quantity)};{_fmt_dec(part)};{_fmt_dec(cumulative)};")
+    total_quantity = sum(row[4] for row in rows)
+    lines.append(f"Quantidade Teórica Total;{_fmt_int(total_quantity)};100,000;;")
+    lines.append(f"Redutor;{_fmt_dec(16145227.4712, 2)};;;")
+    return ("\n".join(lines) + "\n").encode("latin-1")
+
+
+def csv_filename(day, index="IBOV"):
+    return f"{index}Dia_{day.strftime('%d-%m-%y')}.csv"
+
+
+def write_raw_tree(root, n_days, n_tickers=90, seed=42, index="IBOV", start=datetime.date(2015, 1, 2)):
+    """Writes root/date=YYYY-MM-DD/IBOVDia_DD-MM-YY.csv for `n_days` days and returns the CSV paths"""
+    paths = []
+    for day, rows in generate_days(n_days, n_tickers, start=start, seed=seed):
+        directory = os.path.join(root, f"date={day.isoformat()}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, csv_filename(day, index))
+        with open(path, "wb") as f:
+            f.write(render_csv(day, rows, index))
+        paths.append(path)
+    return paths
+
+
+def trading_days_for_years(years):
+    """~252 trading days per year"""
+    return int(round(years * 252))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="Directory that receives the date=YYYY-MM-DD partitions")
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--tickers", type=int, default=90)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=datetime.date(2015, 1, 2))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--index", default="IBOV")
+    args = parser.parse_args()
+    paths = write_raw_tree(args.root, args.days, args.tickers, args.seed, args.index, args.start)
+    print(f"✅ Wrote {len(paths)} synthetic {args.index} files to {args.root}")
@@ -1,6 +1,10 @@
 """
 Configuration settings for the PipelineBovespa project.
 """
+import os
+
+# Absolute path of the project root (directory containing config/ and src/)
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 # AWS Configuration
 AWS_REGION = "us-east-1"  # Change to your preferred region
@@ -10,15 +14,88 @@ S3_BUCKET_RAW = "bovespa-raw-data"  # Bucket for raw data
 S3_BUCKET_REFINED = "bovespa-refined-data"  # Bucket for refined data
 S3_PREFIX_RAW = "raw/"  # Prefix for raw data
 S3_PREFIX_REFINED = "refined/"  # Prefix for refined data
+S3_UPLOAD_MAX_WORKERS = 8  # Partitions uploaded concurrently
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # Files at least this large use multipart uploads
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024  # Part size (also used to compute the expected multipart ETag)
+S3_MULTIPART_CONCURRENCY = 4  # Parts of one file uploaded concurrently
+RAW_SINKS = ["local"]  # Where the in-memory extraction writes raw partitions: "local", "s3" and/or "fake_s3"
+RAW_SINK_KEEP_CSV = True  # Also write the original CSV next to the Parquet
 
 # Glue Configuration
 GLUE_DATABASE = "bovespa_db"  # Glue catalog database name
 GLUE_JOB_NAME = "bovespa-etl-job"  # Glue job name
+GLUE_TABLE_RAW = "raw"  # Glue table over S3_PREFIX_RAW
+GLUE_TABLE_REFINED = "refined"  # Glue table over S3_PREFIX_REFINED
 
 # Data Configuration
 LOCAL_DATA_DIR = "data"  # Local directory for data storage during development
 RAW_DATA_DIR = f"{LOCAL_DATA_DIR}/raw"  # Raw data directory
 REFINED_DATA_DIR = f"{LOCAL_DATA_DIR}/refined"  # Refined data directory
+REFINED_COMPACT_DIR = f"{LOCAL_DATA_DIR}/refined_compact"  # Refined data compacted into one file per month (query-optimized copy)
+REFINE_MANIFEST_PATH = f"{LOCAL_DATA_DIR}/refine_manifest.sqlite"  # Raw partitions already refined (checksum, rows, timestamp)
+REFINE_MAX_WORKERS = os.cpu_count() or 1  # Processes used by refine_all (full rebuilds); 1 refines serially
+REFINE_SHARDS_PER_WORKER = 4  # Partition list is split into workers x this many contiguous shards
+CATALOG_PATH = f"{LOCAL_DATA_DIR}/catalog.sqlite"  # Local partition catalog (schemas, partitions, row counts, min/max)
+CATALOG_ENABLED = True  # Writers update and readers consult the catalog once a table has been synced
+PREFLIGHT_CACHE_PATH = f"{LOCAL_DATA_DIR}/.preflight.json"  # Last dependency check, keyed by interpreter and package versions
+HOT_CACHE_DIR = f"{LOCAL_DATA_DIR}/hot_cache"  # Arrow IPC windows of the most recent refined days
+HOT_CACHE_DEFAULT_DAYS = 60  # Trading days per window when the caller does not ask for a size
+HOT_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Least recently used windows are evicted above this total
+PANEL_DIR = f"{LOCAL_DATA_DIR}/panel"  # Dense date x ticker matrices (memmapped .bin files) built from data/raw
+SECTOR_CUBE_PATH = f"{LOCAL_DATA_DIR}/sector_cube.sqlite"  # Sector x day aggregates (participation, quantity, constituents)
+TICKER_INDEX_PATH = f"{LOCAL_DATA_DIR}/ticker_index.npz"  # Ticker -> raw partition, row group and row (sorted arrays)
+TICKER_INDEX_LOCK_TIMEOUT = 60  # Seconds to wait for another writer of the ticker index (older locks are broken)
+DELTA_STORE_DIR = f"{LOCAL_DATA_DIR}/delta_store"  # Daily portfolios as periodic full snapshots plus per-day deltas
+DELTA_SNAPSHOT_INTERVAL = 21  # Trading days per segment at most (a new snapshot also starts when the composition changes)
+RAW_DEDUP_ENABLED = True  # Skip conversion/upload of downloads whose data equals the previous snapshot
+RAW_SNAPSHOTS_FILE = "_snapshots.sqlite"  # Content and data hashes of raw downloads, kept inside the raw directory
+FAKE_S3_ROOT = f"{LOCAL_DATA_DIR}/fake_s3"  # Local stand-in bucket for the "fake_s3" sink
 
 # B3 Website Configuration
 B3_URL = "https://sistemaswebb3-listados.b3.com.br/indexPage/day/IBOV?language=pt-br"
+
+# B3 Direct API Configuration (browserless extraction)
+B3_API_BASE_URL = "https://sistemaswebb3-listados.b3.com.br"  # Host behind the indexPage/day/IBOV page
+B3_DEFAULT_INDEX = "IBOV"  # Index code used in the portfolio endpoints
+B3_DEFAULT_SEGMENT = "2"  # "Setor de Atuacao" (option[2] of the #segment dropdown)
+B3_HTTP_TIMEOUT = 30  # Seconds per HTTP request
+B3_HTTP_RETRIES = 3  # Retries for transient HTTP errors (5xx, 429, connection resets)
+B3_HTTP_POOL_SIZE = 10  # Connections kept alive per host
+EXTRACTION_MODE = "direct"  # "direct" (HTTP), "memory" (HTTP, parsed in memory and written to RAW_SINKS) or "selenium" (headless Chrome)
+
+# ChromeDriver Cache Configuration
+DRIVER_CACHE_DIR = os.path.join(PROJECT_ROOT, "drivers", "cache")  # Extracted drivers, keyed by version/platform
+DRIVER_MANIFEST_URL = "https://googlechromelabs.github.io/chrome-for-testing/latest-versions-per-milestone-with-downloads.json"
+DRIVER_MANIFEST_TTL = 24 * 60 * 60  # Seconds before the milestone manifest is fetched again
+DRIVER_LOCK_TIMEOUT = 120  # Seconds to wait for another process holding the cache lock
+
+# Scraper Service Configuration (pooled browser sessions)
+B3_INDEX_PAGE_URL = "https://sistemaswebb3-listados.b3.com.br/indexPage/day/{index}?language=pt-br"
+B3_INDEXES = ["IBOV", "IBXX", "SMLL", "IDIV"]  # Indexes scraped by the scraper service
+B3_SEGMENT_OPTIONS = {"codigo": 1, "setor": 2}  # Segment view name -> option[N] of the #segment dropdown
+B3_DEFAULT_SEGMENT_VIEW = "setor"  # Segment view whose file keeps the plain <INDEX>Dia_DD-MM-YY.csv name
+SCRAPER_POOL_SIZE = 2  # Concurrent browser sessions
+SCRAPER_SESSION_MAX_JOBS = 50  # Jobs served by one browser session before it is recycled
+
+# Parquet Configuration
+PARQUET_COMPRESSION = "zstd"  # Codec for Parquet files written by the pipeline (readable by Athena/Glue)
+PARQUET_COMPRESSION_LEVEL = 3  # zstd level: good ratio without slowing down writes
+PARQUET_ROW_GROUP_SIZE = 128 * 1024  # Rows per row group
+COMPACT_ROW_GROUP_SIZE = 32 * 1024  # Rows per row group in compacted files (~1-2 weeks of IBOV per group)
+
+# Backfill Configuration
+B3_EXTRA_HOLIDAYS = []  # Extra non-trading days ("YYYY-MM-DD") not covered by the built-in calendar
+BACKFILL_MAX_WORKERS = 4  # Concurrent day downloads
+BACKFILL_REQUESTS_PER_SECOND = 2.0  # Global rate limit across workers
+BACKFILL_RETRIES = 3  # Attempts per day before giving up
+
+# Instrumentation Configuration
+METRICS_ENABLED = False  # Stage spans/counters/histograms (BOVESPA_METRICS=1 turns them on per run)
+METRICS_JSONL_PATH = "logs/metrics.jsonl"  # One JSON line per finished span
+METRICS_PROM_PATH = "logs/bovespa_pipeline.prom"  # Prometheus textfile (node_exporter textfile collector)
+METRICS_PREFIX = "bovespa_"  # Prefix of every exported metric name
+
+# Benchmark Configuration
+IMPORT_TIME_BUDGET_MS = 150  # Cumulative `python -X importtime` budget of the lazily importing entry points
+BENCHMARK_BASELINE_PATH = "benchmarks/baselines/pipeline.json"  # bench_pipeline results per machine/interpreter (--save-baseline)
+BENCHMARK_REGRESSION_THRESHOLD = 0.2  # Allowed slowdown against the baseline before a metric is flagged
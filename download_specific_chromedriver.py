@@ -4,14 +4,14 @@ Use este script se estiver enfrentando problemas de compatibilidade entre Chrome
 """
 import os
 import sys
-import zipfile
-import requests
 import shutil
 import platform
 import subprocess
 import winreg
 from pathlib import Path
 
+from src.extraction import driver_cache
+
 def print_section(title):
     """Imprime um título de seção formatado."""
     print("\n" + "="*80)
@@ -118,55 +118,31 @@ def download_specific_chromedriver(version=None):
         print(f"\nTentando baixar ChromeDriver versão {driver_version}...")
         
         try:
-            # URL para o ChromeDriver específico
-            download_url = f"https://chromedriver.storage.googleapis.com/{driver_version}/chromedriver_{platform_name}.zip"
+            # Versões >= 115 só existem no repositório Chrome for Testing
+            if int(driver_version.split(".")[0]) >= 115:
+                download_url = driver_cache.CFT_DOWNLOAD_URL.format(version=driver_version, platform=platform_name)
+            else:
+                download_url = f"https://chromedriver.storage.googleapis.com/{driver_version}/chromedriver_{platform_name}.zip"
             print(f"URL de download: {download_url}")
             
-            # Baixar o arquivo
-            response = requests.get(download_url)
-            
-            if response.status_code == 200:
-                # Salvar e extrair o arquivo
-                zip_path = drivers_dir / "chromedriver_temp.zip"
-                with open(zip_path, "wb") as f:
-                    f.write(response.content)
-                
-                # Extrair o chromedriver do zip
-                with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                    # As estruturas dos arquivos ZIP do ChromeDriver mudaram ao longo do tempo
-                    chromedriver_files = [f for f in zip_ref.namelist() if os.path.basename(f) == chromedriver_filename]
-                    if not chromedriver_files:
-                        chromedriver_files = [f for f in zip_ref.namelist() if chromedriver_filename in f]
-                    
-                    if chromedriver_files:
-                        # Extrair o arquivo do chromedriver
-                        chromedriver_zip_path = chromedriver_files[0]
-                        extracted_path = drivers_dir / chromedriver_filename
-                        
-                        # Remover arquivo existente se houver
-                        if os.path.exists(extracted_path):
-                            os.remove(extracted_path)
-                        
-                        # Extrair o novo chromedriver
-                        with zip_ref.open(chromedriver_zip_path) as source, open(extracted_path, "wb") as target:
-                            shutil.copyfileobj(source, target)
-                        
-                        # Tornar o chromedriver executável em sistemas Unix
-                        if system != "windows":
-                            os.chmod(extracted_path, 0o755)
-                        
-                        print(f"ChromeDriver extraído para: {extracted_path}")
-                        print(f"ChromeDriver versão {driver_version} baixado com sucesso!")
-                        success = True
-                        break
-                    else:
-                        print(f"Não foi possível encontrar o chromedriver no arquivo ZIP")
-                
-                # Remover o arquivo ZIP temporário
-                if os.path.exists(zip_path):
-                    os.remove(zip_path)
+            # Reaproveita o cache compartilhado de drivers (sem download se já estiver lá)
+            cached_path = driver_cache.lookup(driver_version, platform_name=platform_name)
+            if not cached_path:
+                with driver_cache.cache_lock():
+                    cached_path = driver_cache.install_from_url(download_url, driver_version, platform_name=platform_name)
             else:
-                print(f"Falha ao baixar ChromeDriver: HTTP {response.status_code}")
+                print(f"ChromeDriver {driver_version} encontrado no cache: {cached_path}")
+            
+            # Copiar o chromedriver para a pasta drivers
+            extracted_path = drivers_dir / chromedriver_filename
+            if os.path.exists(extracted_path):
+                os.remove(extracted_path)
+            shutil.copy2(cached_path, extracted_path)
+            
+            print(f"ChromeDriver extraído para: {extracted_path}")
+            print(f"ChromeDriver versão {driver_version} baixado com sucesso!")
+            success = True
+            break
         
         except Exception as e:
             print(f"Erro ao baixar/extrair ChromeDriver: {e}")
@@ -0,0 +1,416 @@
+"""
+Catálogo local de partições (espelho do que o Glue Catalog guardaria).
+
+Um arquivo SQLite (CATALOG_PATH) guarda:
+
+    tables      schema (colunas e tipos Hive), chaves de partição, raiz local
+    partitions  valores (date[, ticker]), diretório e arquivo, linhas, bytes e
+                min/max por coluna lidos do rodapé Parquet (sem ler os dados)
+
+As partições são indexadas por (tabela, date, ticker). Resolver um intervalo
+de datas é uma busca no B-tree, O(log n + k), sem listar diretórios. Os
+escritores (conversão para Parquet e refinamento) registram cada partição que
+emitem. `sync` reconstrói uma tabela a partir do disco, uma vez ou para reparar.
+Só depois de sincronizada a tabela é considerada completa; antes disso os
+leitores usam a listagem de diretórios.
+
+`export_to_glue` envia as partições novas/alteradas ao Glue com
+BatchCreatePartition (100 por chamada), com locais em S3_BUCKET_RAW/
+S3_BUCKET_REFINED. Dias brutos deduplicados (.ref.json) apontam para o prefixo
+date= do snapshot original, que é o único enviado ao S3.
+
+Uso:
+    python -m src.catalog.partition_catalog sync raw
+    python -m src.catalog.partition_catalog sync refined
+    python -m src.catalog.partition_catalog list refined --start 2024-01-01 --end 2024-01-31
+    python -m src.catalog.partition_catalog export-glue refined
+"""
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import (
+    B3_DEFAULT_INDEX,
+    CATALOG_ENABLED,
+    CATALOG_PATH,
+    GLUE_DATABASE,
+    GLUE_TABLE_RAW,
+    GLUE_TABLE_REFINED,
+    PROJECT_ROOT,
+    S3_BUCKET_RAW,
+    S3_BUCKET_REFINED,
+    S3_PREFIX_RAW,
+    S3_PREFIX_REFINED,
+)
+from src.extraction.csv_converter import COLUMN_TYPES
+from src.transform.partitions import list_raw_partitions, partition_date, raw_root, refined_root
+from src.transform.refine import PARTITION_COLUMNS, REFINED_SCHEMA
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    name TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    columns TEXT NOT NULL,
+    partition_keys TEXT NOT NULL,
+    synced_at TEXT
+);
+CREATE TABLE IF NOT EXISTS partitions (
+    table_name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    ticker TEXT NOT NULL DEFAULT '',
+    location TEXT NOT NULL,
+    file TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    stats TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    exported_at TEXT,
+    PRIMARY KEY (table_name, date, ticker)
+) WITHOUT ROWID
+"""
+
+HIVE_TYPES = {
+    pa.string(): "string",
+    pa.int64(): "bigint",
+    pa.int32(): "int",
+    pa.float64(): "double",
+    pa.date32(): "date",
+}
+
+PARQUET_INPUT_FORMAT = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+PARQUET_OUTPUT_FORMAT = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+PARQUET_SERDE = "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+GLUE_BATCH_SIZE = 100  # BatchCreatePartition limit
+
+
+def table_definitions():
+    """{table: (data columns, partition keys)} as [(name, hive type)] lists"""
+    refined_columns = [f for f in REFINED_SCHEMA if f.name not in PARTITION_COLUMNS]
+    return {
+        "raw": ([(name, HIVE_TYPES[type_]) for name, type_ in COLUMN_TYPES.items()], [("date", "date")]),
+        "refined": (
+            [(f.name, HIVE_TYPES[f.type]) for f in refined_columns],
+            [(name, HIVE_TYPES[REFINED_SCHEMA.field(name).type]) for name in PARTITION_COLUMNS],
+        ),
+    }
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+
+def _stat_value(value):
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def parquet_file_stats(path):
+    """(rows, {column: [min, max]}) from the Parquet footer; columns without statistics are left out"""
+    metadata = pq.ParquetFile(path).metadata
+    stats = {}
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        for c in range(row_group.num_columns):
+            column = row_group.column(c)
+            statistics = column.statistics
+            if statistics is None or not statistics.has_min_max:
+                continue
+            low, high = _stat_value(statistics.min), _stat_value(statistics.max)
+            name = column.path_in_schema
+            if name in stats:
+                stats[name] = [min(stats[name][0], low), max(stats[name][1], high)]
+            else:
+                stats[name] = [low, high]
+    return metadata.num_rows, stats
+
+
+class PartitionCatalog:
+    """SQLite-backed catalog of the raw and refined partitions"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(PROJECT_ROOT, CATALOG_PATH)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # --- tables ---
+
+    def define_table(self, name, root, synced=False):
+        columns, partition_keys = table_definitions()[name]
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO tables (name, root, columns, partition_keys, synced_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET root = excluded.root, columns = excluded.columns, "
+                "partition_keys = excluded.partition_keys, synced_at = COALESCE(excluded.synced_at, synced_at)",
+                (name, os.path.abspath(root), json.dumps(columns), json.dumps(partition_keys),
+                 _now() if synced else None),
+            )
+
+    def get_table(self, name):
+        row = self.connection.execute(
+            "SELECT root, columns, partition_keys, synced_at FROM tables WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"name": name, "root": row[0], "columns": json.loads(row[1]),
+                "partition_keys": json.loads(row[2]), "synced_at": row[3]}
+
+    def is_complete(self, name, root):
+        """True when `name` was synced from `root`, so its partition list can replace a directory listing"""
+        table = self.get_table(name)
+        return bool(table and table["synced_at"] and table["root"] == os.path.abspath(root))
+
+    # --- partitions ---
+
+    def _upsert(self, table_name, day, ticker, location, path):
+        rows, stats = parquet_file_stats(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO partitions "
+            "(table_name, date, ticker, location, file, row_count, size_bytes, stats, updated_at, exported_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+            (table_name, day.isoformat(), ticker or "", os.path.abspath(location), os.path.abspath(path),
+             rows, os.path.getsize(path), json.dumps(stats, default=str), _now()),
+        )
+
+    def register_raw(self, day, parquet_path):
+        with self.connection:
+            self._upsert("raw", day, None, os.path.dirname(parquet_path), parquet_path)
+
+    def register_refined_date(self, day, date_directory):
+        """Replaces every ticker partition of one refined date (the directory that was just swapped in)"""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM partitions WHERE table_name = 'refined' AND date = ?", (day.isoformat(),)
+            )
+            for entry in sorted(os.scandir(date_directory), key=lambda e: e.name):
+                if not entry.is_dir() or not entry.name.startswith("ticker="):
+                    continue
+                for name in sorted(os.listdir(entry.path)):
+                    if name.endswith(".parquet"):
+                        self._upsert("refined", day, entry.name[len("ticker="):], entry.path,
+                                     os.path.join(entry.path, name))
+
+    def forget(self, table_name, day):
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM partitions WHERE table_name = ? AND date = ?", (table_name, day.isoformat())
+            )
+
+    def partitions(self, table_name, start=None, end=None, tickers=None):
+        """Partitions of `table_name` in [start, end] (and `tickers`), ordered by (date, ticker)"""
+        query = ("SELECT date, ticker, location, file, row_count, size_bytes, stats "
+                 "FROM partitions WHERE table_name = ? AND date >= ? AND date <= ?")
+        params = [table_name, start.isoformat() if start else "", end.isoformat() if end else "9999-12-31"]
+        if tickers:
+            query += f" AND ticker IN ({', '.join('?' * len(tickers))})"
+            params.extend(tickers)
+        query += " ORDER BY date, ticker"
+        return [
+            {
+                "date": datetime.date.fromisoformat(d),
+                "ticker": t or None,
+                "location": location,
+                "file": path,
+                "rows": rows,
+                "size_bytes": size,
+                "stats": json.loads(stats),
+            }
+            for d, t, location, path, rows, size, stats in self.connection.execute(query, params)
+        ]
+
+    def files(self, table_name, start=None, end=None, tickers=None):
+        return [p["file"] for p in self.partitions(table_name, start, end, tickers)]
+
+    def date_range(self, table_name):
+        """(first date, last date) registered for the table, or (None, None)"""
+        low, high = self.connection.execute(
+            "SELECT MIN(date), MAX(date) FROM partitions WHERE table_name = ?", (table_name,)
+        ).fetchone()
+        return (datetime.date.fromisoformat(low) if low else None,
+                datetime.date.fromisoformat(high) if high else None)
+
+    # --- maintenance ---
+
+    def sync(self, table_name, root=None, index=B3_DEFAULT_INDEX):
+        """Rebuilds the table from disk (one directory walk) and marks it complete"""
+        if table_name == "raw":
+            root = root or raw_root(index)
+            with self.connection:
+                self.connection.execute("DELETE FROM partitions WHERE table_name = 'raw'")
+                for day, path in list_raw_partitions(root, index):
+                    self._upsert("raw", day, None, os.path.dirname(path), path)
+        elif table_name == "refined":
+            root = root or refined_root()
+            with self.connection:
+                self.connection.execute("DELETE FROM partitions WHERE table_name = 'refined'")
+            for entry in sorted(os.scandir(root) if os.path.isdir(root) else [], key=lambda e: e.name):
+                day = partition_date(entry.name)
+                if day and entry.is_dir():
+                    self.register_refined_date(day, entry.path)
+        else:
+            raise ValueError(f"Unknown table: {table_name}")
+        self.define_table(table_name, root, synced=True)
+        count = self.connection.execute(
+            "SELECT COUNT(*) FROM partitions WHERE table_name = ?", (table_name,)
+        ).fetchone()[0]
+        print(f"✅ Catalog synced: {table_name} has {count} partitions")
+        return count
+
+    def pending_export(self, table_name):
+        return [
+            (datetime.date.fromisoformat(d), t or None, rows)
+            for d, t, rows in self.connection.execute(
+                "SELECT date, ticker, row_count FROM partitions WHERE table_name = ? AND exported_at IS NULL "
+                "ORDER BY date, ticker",
+                (table_name,),
+            )
+        ]
+
+    def mark_exported(self, table_name, keys):
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE partitions SET exported_at = ? WHERE table_name = ? AND date = ? AND ticker = ?",
+                [(_now(), table_name, day.isoformat(), ticker or "") for day, ticker in keys],
+            )
+
+
+def resolve_raw_partitions(raw_dir=None, start=None, end=None, index=B3_DEFAULT_INDEX, catalog_path=None):
+    """
+    Same result as list_raw_partitions, answered by the catalog when it holds a
+    synced copy of `raw_dir`, and by listing the directories otherwise.
+    """
+    raw_dir = raw_dir or raw_root(index)
+    catalog_file = catalog_path or os.path.join(PROJECT_ROOT, CATALOG_PATH)
+    if CATALOG_ENABLED and os.path.exists(catalog_file):
+        with PartitionCatalog(catalog_file) as catalog:
+            if catalog.is_complete("raw", raw_dir):
+                return [(p["date"], p["file"]) for p in catalog.partitions("raw", start, end)]
+    return list_raw_partitions(raw_dir, index, start, end)
+
+
+def record_partition(table_name, day, path, root, catalog_path=None):
+    """
+    Writer hook: registers a raw Parquet file or a refined date directory written under `root`.
+    Only tables already synced from that same root are updated (scratch/benchmark trees are
+    ignored), and catalog failures never fail the write; the next `sync` repairs them.
+    """
+    catalog_file = catalog_path or os.path.join(PROJECT_ROOT, CATALOG_PATH)
+    if not CATALOG_ENABLED or not os.path.exists(catalog_file):
+        return
+    try:
+        with PartitionCatalog(catalog_file) as catalog:
+            if not catalog.is_complete(table_name, root):
+                return
+            if table_name == "raw":
+                catalog.register_raw(day, path)
+            else:
+                catalog.register_refined_date(day, path)
+    except Exception as e:
+        print(f"⚠️ Could not update the partition catalog for {table_name} {day}: {e}")
+
+
+def glue_partition_input(table, partition, columns):
+    """PartitionInput for one catalog partition, pointing at its S3 location"""
+    if table == "raw":
+        # A dedup reference day has no Parquet of its own in S3 (.ref.json is never uploaded):
+        # its location is the date= prefix of the snapshot it points to
+        snapshot = partition_date(os.path.basename(partition["location"])) or partition["date"]
+        location = f"s3://{S3_BUCKET_RAW}/{S3_PREFIX_RAW}date={snapshot.isoformat()}/"
+        values = [partition["date"].isoformat()]
+    else:
+        location = (f"s3://{S3_BUCKET_REFINED}/{S3_PREFIX_REFINED}date={partition['date'].isoformat()}/"
+                    f"ticker={partition['ticker']}/")
+        values = [partition["date"].isoformat(), partition["ticker"]]
+    return {
+        "Values": values,
+        "StorageDescriptor": {
+            "Columns": [{"Name": name, "Type": type_} for name, type_ in columns],
+            "Location": location,
+            "InputFormat": PARQUET_INPUT_FORMAT,
+            "OutputFormat": PARQUET_OUTPUT_FORMAT,
+            "SerdeInfo": {"SerializationLibrary": PARQUET_SERDE},
+        },
+        "Parameters": {"numRows": str(partition["rows"]), "classification": "parquet"},
+    }
+
+
+def export_to_glue(table, catalog_path=None, glue=None, database=GLUE_DATABASE, glue_table=None):
+    """Creates the not-yet-exported partitions in the Glue Catalog. Returns (created, already existing)"""
+    if glue is None:
+        import boto3
+        glue = boto3.client("glue")
+    glue_table = glue_table or {"raw": GLUE_TABLE_RAW, "refined": GLUE_TABLE_REFINED}[table]
+    columns, _ = table_definitions()[table]
+
+    created = existing = 0
+    with PartitionCatalog(catalog_path) as catalog:
+        pending = catalog.partitions(table)
+        pending_keys = {(day, ticker) for day, ticker, _ in catalog.pending_export(table)}
+        pending = [p for p in pending if (p["date"], p["ticker"]) in pending_keys]
+        for i in range(0, len(pending), GLUE_BATCH_SIZE):
+            batch = pending[i:i + GLUE_BATCH_SIZE]
+            response = glue.batch_create_partition(
+                DatabaseName=database,
+                TableName=glue_table,
+                PartitionInputList=[glue_partition_input(table, p, columns) for p in batch],
+            )
+            failed = set()
+            for error in response.get("Errors", []):
+                values = tuple(error["PartitionValues"])
+                if error["ErrorDetail"]["ErrorCode"] == "AlreadyExistsException":
+                    existing += 1
+                else:
+                    failed.add(values)
+                    print(f"❌ Glue rejected partition {values}: {error['ErrorDetail'].get('ErrorMessage')}")
+            done = []
+            for p in batch:
+                values = (p["date"].isoformat(),) + ((p["ticker"],) if p["ticker"] else ())
+                if values not in failed:
+                    done.append((p["date"], p["ticker"]))
+            catalog.mark_exported(table, done)
+            created += len(done)
+    created -= existing
+    print(f"✅ Glue export of {table}: {created} partitions created, {existing} already existed")
+    return created, existing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local partition catalog")
+    parser.add_argument("command", choices=["sync", "list", "export-glue"])
+    parser.add_argument("table", choices=["raw", "refined"])
+    parser.add_argument("--root", default=None, help="Local directory of the table (sync)")
+    parser.add_argument("--catalog", default=None)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--tickers", nargs="+", default=None)
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        with PartitionCatalog(args.catalog) as catalog:
+            catalog.sync(args.table, args.root)
+    elif args.command == "list":
+        with PartitionCatalog(args.catalog) as catalog:
+            for p in catalog.partitions(args.table, args.start, args.end, args.tickers):
+                ticker = f" ticker={p['ticker']}" if p["ticker"] else ""
+                print(f"date={p['date'].isoformat()}{ticker}  {p['rows']} rows  {p['size_bytes']} bytes  {p['file']}")
+    else:
+        export_to_glue(args.table, args.catalog)
@@ -0,0 +1,320 @@
+"""
+Índice secundário por ação sobre as partições brutas (data/raw/date=*).
+
+Os dados brutos são particionados só por data, então o histórico de uma ação
+("peso da PETR4 nos últimos cinco anos") abria todas as partições e filtrava a
+coluna Código de cada uma. O índice guarda, para cada código, onde ele aparece:
+
+    tickers      códigos ordenados (busca binária)
+    offsets      início das ocorrências de cada código (CSR, len(tickers) + 1)
+    file_id      partição de cada ocorrência (índice em file_dates/file_paths)
+    row_group    row group dentro do Parquet
+    row          linha dentro do row group
+    file_dates   pregão de cada partição (ordinal)
+    file_paths   Parquet de cada partição
+
+As ocorrências de um código ficam em ordem de data, em arrays NumPy gravados num
+único .npz (TICKER_INDEX_PATH, escrita atômica). Uma leitura do histórico abre
+só as partições em que a ação estava na carteira e, em cada uma, só o row group
+listado, decodificando apenas as colunas pedidas. A coluna Código não é lida.
+
+O índice é construído uma vez com `build` e associado àquela raiz de dados
+brutos. Depois, `record_raw_partition` (b3_scraper) chama
+`record_ticker_partition` a cada Parquet bruto gravado, com o .npz travado
+(TICKER_INDEX_PATH + ".lock") durante ler/alterar/gravar, para que escritores
+concorrentes não percam os dias uns dos outros. Um pregão ainda não indexado
+(o mais recente ou um dia antigo vindo do backfill) é inserido na posição da
+sua data em cada código, sem reordenar o histórico; regravar um dia já
+indexado troca as ocorrências daquele dia e reordena tudo. Os dados refinados já são particionados por ticker=
+e resolvidos pelo catálogo de partições, então não passam por este índice.
+
+    index = TickerIndex()
+    table = index.read_history("PETR4", [PARTICIPATION_COLUMN], ("2020-01-01", "2024-12-31"))
+
+Uso:
+    python -m src.catalog.ticker_index build
+    python -m src.catalog.ticker_index show PETR4 --start 2024-01-01
+"""
+import argparse
+import datetime
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config.settings import PROJECT_ROOT, TICKER_INDEX_LOCK_TIMEOUT, TICKER_INDEX_PATH
+from src.extraction.csv_converter import TICKER_COLUMN
+from src.transform.partitions import raw_root
+
+INDEX_ARRAYS = ("tickers", "offsets", "file_id", "row_group", "row", "file_dates", "file_paths")
+
+
+def _ordinal(value):
+    if value is None:
+        return None
+    if not isinstance(value, datetime.date):
+        value = datetime.date.fromisoformat(value)
+    return value.toordinal()
+
+
+def partition_postings(path):
+    """(tickers, row groups, rows) of every ticker occurrence in one raw Parquet file"""
+    parquet = pq.ParquetFile(path)
+    tickers, groups, rows = [], [], []
+    for group in range(parquet.num_row_groups):
+        column = parquet.read_row_group(group, columns=[TICKER_COLUMN]).column(0)
+        positions = np.flatnonzero(pc.is_valid(column).to_numpy(zero_copy_only=False))
+        tickers.append(column.take(positions).to_numpy(zero_copy_only=False).astype(str))
+        groups.append(np.full(len(positions), group, dtype=np.int32))
+        rows.append(positions.astype(np.int32))
+    if not tickers:
+        return np.array([], dtype=str), np.array([], dtype=np.int32), np.array([], dtype=np.int32)
+    return np.concatenate(tickers), np.concatenate(groups), np.concatenate(rows)
+
+
+@contextmanager
+def index_lock(index_path, timeout=TICKER_INDEX_LOCK_TIMEOUT):
+    """Exclusive lock file next to the index for load/modify/save (stale locks are broken after `timeout`)"""
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    lock_path = index_path + ".lock"
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    print("⚠️ Removing stale ticker index lock")
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Could not acquire ticker index lock: {lock_path}")
+            time.sleep(0.01)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+class TickerIndex:
+    """Ticker -> (partition, row group, row) occurrences as sorted NumPy arrays"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(PROJECT_ROOT, TICKER_INDEX_PATH)
+        self.clear()
+        if os.path.exists(self.path):
+            with np.load(self.path) as data:
+                for name in INDEX_ARRAYS:
+                    setattr(self, name, data[name])
+                self.root = str(data["root"])
+
+    def clear(self):
+        self.root = None
+        self.tickers = np.array([], dtype=str)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.file_id = np.array([], dtype=np.int32)
+        self.row_group = np.array([], dtype=np.int32)
+        self.row = np.array([], dtype=np.int32)
+        self.file_dates = np.array([], dtype=np.int32)
+        self.file_paths = np.array([], dtype=str)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, root=np.array(self.root or ""), **{name: getattr(self, name) for name in INDEX_ARRAYS})
+        os.replace(tmp_path, self.path)
+
+    # --- maintenance ---
+
+    def add_partitions(self, partitions):
+        """
+        Indexes [(day, parquet path)], replacing the occurrences of days already in the index.
+        Days not indexed yet are inserted into each ticker's run at their date; replacing an
+        indexed day merges and re-sorts every occurrence.
+        """
+        partitions = sorted(partitions, key=lambda partition: partition[0])
+        if not partitions:
+            return
+        days = [day.toordinal() for day, _ in partitions]
+        if len(set(days)) == len(days) and not np.isin(days, self.file_dates).any():
+            self._add_new_days(partitions)
+        else:
+            self._merge(partitions)
+
+    def _add_new_days(self, partitions):
+        """
+        Days not in the index: only their occurrences are sorted, then each one is inserted at
+        its (ticker, date) position of the sorted arrays (the end of the run for a new latest
+        day), so the existing history is shifted in O(total) but never re-sorted.
+        """
+        first_id = len(self.file_dates)
+        ordinals = np.array([day.toordinal() for day, _ in partitions], dtype=np.int64)
+        postings = [partition_postings(path) for _, path in partitions]
+        tickers = np.concatenate([day_tickers for day_tickers, _, _ in postings])
+        file = np.concatenate([np.full(len(day_tickers), first_id + i, dtype=np.int32)
+                               for i, (day_tickers, _, _) in enumerate(postings)])
+        row_group = np.concatenate([groups for _, groups, _ in postings])
+        row = np.concatenate([rows for _, _, rows in postings])
+
+        merged = np.union1d(self.tickers, tickers)
+        old_codes = np.repeat(np.searchsorted(merged, self.tickers), np.diff(self.offsets)).astype(np.int64)
+        codes = np.searchsorted(merged, tickers).astype(np.int64)
+        dates = ordinals[file - first_id]
+        order = np.lexsort((row, row_group, dates, codes))
+        # runs are sorted by date and the new dates are not in them, so a (ticker, date) key places each occurrence
+        old_keys = (old_codes << 32) | self.file_dates[self.file_id].astype(np.int64)
+        positions = np.searchsorted(old_keys, (codes[order] << 32) | dates[order])
+        for name, values in (("file_id", file), ("row_group", row_group), ("row", row)):
+            setattr(self, name, np.insert(getattr(self, name), positions, values[order]).astype(np.int32))
+        counts = np.bincount(np.concatenate([old_codes, codes]), minlength=len(merged))
+        self.tickers = merged
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.file_dates = np.concatenate([self.file_dates, ordinals.astype(np.int32)])
+        self.file_paths = np.concatenate([self.file_paths, np.array(
+            [os.path.abspath(path) for _, path in partitions], dtype=str)])
+
+    def _merge(self, partitions):
+        """Replaces indexed days: all occurrences are re-sorted in one pass"""
+        file_dates, file_paths = self.file_dates.tolist(), self.file_paths.tolist()
+        known = {ordinal: i for i, ordinal in enumerate(file_dates)}
+        replaced, new_tickers, new_file, new_group, new_row = [], [], [], [], []
+        for day, path in partitions:
+            file_id = known.get(day.toordinal())
+            if file_id is None:
+                file_id = known[day.toordinal()] = len(file_dates)
+                file_dates.append(day.toordinal())
+                file_paths.append(os.path.abspath(path))
+            else:
+                file_paths[file_id] = os.path.abspath(path)
+                replaced.append(file_id)
+            tickers, groups, rows = partition_postings(path)
+            new_tickers.append(tickers)
+            new_file.append(np.full(len(tickers), file_id, dtype=np.int32))
+            new_group.append(groups)
+            new_row.append(rows)
+
+        keep = ~np.isin(self.file_id, replaced)
+        old_tickers = np.repeat(self.tickers, np.diff(self.offsets))[keep]
+        tickers, codes = np.unique(np.concatenate([old_tickers] + new_tickers), return_inverse=True)
+        file = np.concatenate([self.file_id[keep]] + new_file)
+        row_group = np.concatenate([self.row_group[keep]] + new_group)
+        row = np.concatenate([self.row[keep]] + new_row)
+        self.file_dates = np.array(file_dates, dtype=np.int32)
+        self.file_paths = np.array(file_paths, dtype=str)
+
+        order = np.lexsort((row, row_group, self.file_dates[file], codes))
+        self.tickers = tickers
+        self.offsets = np.searchsorted(codes[order], np.arange(len(tickers) + 1)).astype(np.int64)
+        self.file_id, self.row_group, self.row = file[order], row_group[order], row[order]
+
+    def build(self, raw_dir=None):
+        """Indexes every raw partition of `raw_dir` and ties the index to it"""
+        from src.catalog.partition_catalog import resolve_raw_partitions
+        raw_dir = os.path.abspath(raw_dir or raw_root())
+        with index_lock(self.path):
+            self.clear()
+            self.add_partitions(resolve_raw_partitions(raw_dir))
+            self.root = raw_dir
+            self.save()
+        print(f"✅ Ticker index built: {len(self.tickers)} tickers, {len(self.file_id)} occurrences "
+              f"in {len(self.file_dates)} partitions of {raw_dir}")
+        return len(self.file_id)
+
+    # --- lookups ---
+
+    def locate(self, ticker, start=None, end=None):
+        """Positions (into file_id/row_group/row) of `ticker` between start and end, in date order"""
+        i = np.searchsorted(self.tickers, ticker)
+        if i == len(self.tickers) or self.tickers[i] != ticker:
+            return np.array([], dtype=np.int64)
+        positions = np.arange(self.offsets[i], self.offsets[i + 1])
+        dates = self.file_dates[self.file_id[positions]]
+        low, high = _ordinal(start), _ordinal(end)
+        # occurrences are sorted by date, so the range is a slice
+        first = np.searchsorted(dates, low, "left") if low else 0
+        last = np.searchsorted(dates, high, "right") if high else len(dates)
+        return positions[first:last]
+
+    def dates(self, ticker, start=None, end=None):
+        """Trading days on which `ticker` was in the portfolio"""
+        ordinals = self.file_dates[self.file_id[self.locate(ticker, start, end)]]
+        return [datetime.date.fromordinal(int(d)) for d in ordinals]
+
+    def read_history(self, ticker, columns=None, date_range=None):
+        """
+        Rows of `ticker` (optionally only `columns`) from the indexed raw partitions,
+        with a `date` column, reading only the row groups that hold it.
+        """
+        start, end = date_range or (None, None)
+        positions = self.locate(ticker, start, end)
+        file, row_group, row = self.file_id[positions], self.row_group[positions], self.row[positions]
+        # one read per (partition, row group) run
+        boundaries = np.flatnonzero((np.diff(file) != 0) | (np.diff(row_group) != 0)) + 1
+        tables = []
+        for chunk in np.split(np.arange(len(positions)), boundaries):
+            if not len(chunk):
+                continue
+            file_id, group = file[chunk[0]], row_group[chunk[0]]
+            parquet = pq.ParquetFile(str(self.file_paths[file_id]), memory_map=True)
+            table = parquet.read_row_group(int(group), columns=columns).take(row[chunk])
+            day = datetime.date.fromordinal(int(self.file_dates[file_id]))
+            tables.append(table.append_column("date", pa.array([day] * len(chunk), pa.date32())))
+        if not tables:
+            return None
+        return pa.concat_tables(tables)
+
+
+def record_ticker_partition(day, parquet_path, raw_dir, index_path=None):
+    """
+    Writer hook: re-indexes `day` when the project's index exists and was built from
+    `raw_dir`, holding the index lock. Failures never fail the write; `build` repairs the index.
+    """
+    index_file = index_path or os.path.join(PROJECT_ROOT, TICKER_INDEX_PATH)
+    if not os.path.exists(index_file):
+        return
+    try:
+        with index_lock(index_file):
+            index = TickerIndex(index_file)
+            if index.root == os.path.abspath(raw_dir):
+                index.add_partitions([(day, parquet_path)])
+                index.save()
+    except Exception as e:
+        print(f"⚠️ Could not update the ticker index for {day}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-ticker index over the raw partitions")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("ticker", nargs="?")
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--index", default=None)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--columns", nargs="+", default=None)
+    args = parser.parse_args()
+
+    index = TickerIndex(args.index)
+    if args.command == "build":
+        index.build(args.raw_dir)
+    else:
+        if not args.ticker:
+            parser.error("show needs a ticker")
+        history = index.read_history(args.ticker, args.columns, (args.start, args.end))
+        if history is None:
+            print(f"⚠️ {args.ticker} is not in the index")
+        else:
+            print(history.to_pandas().to_string())
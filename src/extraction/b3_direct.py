@@ -0,0 +1,158 @@
+"""
+Extração direta (sem navegador) da carteira do dia dos índices da B3.
+
+A página indexPage/day/IBOV é apenas uma casca Angular sobre os endpoints
+`indexProxy/indexCall/*`. Este módulo chama esses endpoints diretamente com
+sessões `requests` reaproveitadas (pool de conexões + retry), evitando subir
+Chrome/ChromeDriver só para baixar um CSV de ~100 linhas.
+
+O `base_url` é configurável para permitir apontar para um servidor HTTP local
+com fixtures (ex.: `http://127.0.0.1:8000`).
+"""
+import base64
+import json
+import re
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.settings import (
+    B3_API_BASE_URL,
+    B3_DEFAULT_INDEX,
+    B3_DEFAULT_SEGMENT,
+    B3_HTTP_POOL_SIZE,
+    B3_HTTP_RETRIES,
+    B3_HTTP_TIMEOUT,
+)
+
+PORTFOLIO_DAY_PATH = "/indexProxy/indexCall/GetPortfolioDay/"
+DOWNLOAD_PORTFOLIO_DAY_PATH = "/indexProxy/indexCall/GetDownloadPortfolioDay/"
+
+# Data no título do CSV ("IBOV - Carteira do Dia 28/07/25") ou no header do JSON
+_DATE_PATTERN = re.compile(r"(\d{2})/(\d{2})/(\d{2,4})")
+
+# Uma sessão por thread; some junto com a thread (nada a limpar em pools)
+_local = threading.local()
+
+
+class B3DirectError(Exception):
+    """Erro na extração direta via HTTP (resposta inválida ou vazia)."""
+
+
+def get_session(pool_size=B3_HTTP_POOL_SIZE, retries=B3_HTTP_RETRIES):
+    """
+    Retorna uma sessão `requests` compartilhada (uma por thread) com pool de
+    conexões keep-alive e retry com backoff para erros transitórios.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "User-Agent": "Mozilla/5.0 (PipelineBovespa)",
+            "Accept": "application/json, text/plain, */*",
+        })
+        _local.session = session
+    return session
+
+
+def encode_params(params):
+    """Codifica os parâmetros no formato usado pela B3 (JSON compacto em base64 na URL)."""
+    raw = json.dumps(params, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _get(path, params, base_url, session, timeout):
+    url = base_url.rstrip("/") + path + encode_params(params)
+    response = (session or get_session()).get(url, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+
+def fetch_portfolio_day(index=B3_DEFAULT_INDEX, segment=B3_DEFAULT_SEGMENT, page_size=120,
+                        base_url=B3_API_BASE_URL, session=None, timeout=B3_HTTP_TIMEOUT):
+    """Busca a carteira do dia em JSON (endpoint GetPortfolioDay)."""
+    params = {
+        "language": "pt-br",
+        "pageNumber": 1,
+        "pageSize": page_size,
+        "index": index,
+        "segment": segment,
+    }
+    return _get(PORTFOLIO_DAY_PATH, params, base_url, session, timeout).json()
+
+
+def decode_download_payload(body):
+    """
+    Decodifica o corpo do GetDownloadPortfolioDay.
+
+    A B3 devolve o CSV (latin-1) codificado em base64, às vezes entre aspas
+    como uma string JSON. Se o corpo já for o CSV em texto, é devolvido como está.
+    """
+    text = body.strip()
+    if text[:1] == b'"' and text[-1:] == b'"':
+        text = text[1:-1]
+    if b";" in text:
+        return text
+    try:
+        return base64.b64decode(text, validate=True)
+    except ValueError as e:
+        raise B3DirectError(f"Unexpected download payload: {e}")
+
+
+def parse_portfolio_date(text):
+    """Extrai a data (DD/MM/AA ou DD/MM/AAAA) e devolve no formato DD-MM-YY."""
+    match = _DATE_PATTERN.search(text or "")
+    if not match:
+        return None
+    day, month, year = match.groups()
+    return f"{day}-{month}-{year[-2:]}"
+
+
+def portfolio_filename(index, date_token):
+    """Nome igual ao gerado pelo download do navegador: IBOVDia_DD-MM-YY.csv"""
+    return f"{index}Dia_{date_token}.csv"
+
+
+def fetch_portfolio_csv(index=B3_DEFAULT_INDEX, segment=B3_DEFAULT_SEGMENT,
+                        base_url=B3_API_BASE_URL, session=None, timeout=B3_HTTP_TIMEOUT, date=None):
+    """
+    Baixa o CSV da carteira do dia sem navegador.
+
+    `date` (datetime.date) é enviado como "date" no payload para servidores que
+    servem carteiras históricas; quem chama deve conferir a data do arquivo
+    retornado, pois o endpoint público responde sempre com a carteira vigente.
+
+    Returns:
+        tuple: (nome do arquivo no padrão IBOVDia_DD-MM-YY.csv, conteúdo em bytes)
+    """
+    params = {"index": index, "language": "pt-br", "segment": segment}
+    if date is not None:
+        params["date"] = date.isoformat()
+    response = _get(DOWNLOAD_PORTFOLIO_DAY_PATH, params, base_url, session, timeout)
+    content = decode_download_payload(response.content)
+    if not content.strip():
+        raise B3DirectError(f"Empty portfolio CSV for {index}")
+
+    # A primeira linha do CSV traz a data da carteira; se não trouxer,
+    # consulta o header do endpoint JSON (uma chamada pequena, pageSize=1)
+    first_line = content.split(b"\n", 1)[0].decode("latin-1")
+    date_token = parse_portfolio_date(first_line)
+    if not date_token:
+        header = fetch_portfolio_day(index, segment, page_size=1, base_url=base_url,
+                                     session=session, timeout=timeout).get("header") or {}
+        date_token = parse_portfolio_date(header.get("date"))
+    if not date_token:
+        raise B3DirectError(f"Could not determine portfolio date for {index}")
+
+    return portfolio_filename(index, date_token), content
@@ -1,47 +1,39 @@
+"""
+Extração da carteira do dia do IBOV (HTTP direto ou Selenium).
+
+As dependências pesadas (selenium, requests, pyarrow) são importadas apenas
+no caminho que as usa, então importar este módulo para usar os utilitários de
+data/partição é barato e não tem efeitos colaterais. A verificação de
+dependências é explícita: `python -m src.extraction.preflight`.
+"""
 import os
 import time
 import subprocess
-import glob
-import sys
 import platform
 import shutil
 import datetime
 
-def check_dependencies():
-    """
-    Check and fix package dependencies to avoid version incompatibility issues
-    """
-    try:
-        import pandas as pd
-        import numpy as np
-        print(f"✅ Dependencies loaded successfully: numpy {np.__version__}, pandas {pd.__version__}")
-    except ValueError as e:
-        if "numpy.dtype size changed" in str(e):
-            print("⚠️ Detected NumPy/pandas version incompatibility. Attempting to fix...")
-            subprocess.run([sys.executable, "-m", "pip", "install", "--force-reinstall", "numpy==1.23.5"])
-            subprocess.run([sys.executable, "-m", "pip", "install", "--force-reinstall", "pandas==1.5.3"])
-            print("🔄 Dependencies reinstalled. Please restart the script.")
-            sys.exit(1)
-        else:
-            print(f"❌ Unexpected error importing dependencies: {e}")
-            sys.exit(1)
-
-# First check dependencies before importing other modules
-check_dependencies()
-
-# Now import the rest of the modules
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.wait import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
-import pandas as pd
-import requests
-import zipfile
-import io
-import json
+from config.settings import (
+    PROJECT_ROOT,
+    RAW_DATA_DIR,
+    EXTRACTION_MODE,
+    B3_API_BASE_URL,
+    B3_DEFAULT_INDEX,
+    B3_DEFAULT_SEGMENT,
+    B3_INDEX_PAGE_URL,
+    B3_SEGMENT_OPTIONS,
+    DRIVER_CACHE_DIR,
+    RAW_DEDUP_ENABLED,
+)
+from src.extraction.download_watcher import DownloadWatcher
+from src.monitoring import metrics
+
+def check_dependencies(refresh=False):
+    """Cached dependency preflight (see src.extraction.preflight). Returns True when everything imports"""
+    from src.extraction import preflight
+    result = preflight.check_dependencies(refresh=refresh)
+    preflight.report(result)
+    return result["ok"]
 
 def get_chrome_version():
     """Get installed Chrome version using Windows Registry"""
@@ -64,91 +56,228 @@ def get_chrome_version():
             print(f"❌ Fallback version detection failed: {str(e2)}")
             return None
 
-def download_chromedriver(chrome_version, download_path):
-    """Download compatible ChromeDriver from Chrome for Testing repository"""
+def download_chromedriver(chrome_version, cache_dir=DRIVER_CACHE_DIR):
+    """Returns a compatible ChromeDriver from the shared driver cache, downloading it only on a cache miss"""
     try:
         # Get the major version
         major_version = chrome_version.split('.')[0]
         print(f"🔍 Chrome major version: {major_version}")
-        
-        # Get the latest compatible version
-        response = requests.get(f"https://googlechromelabs.github.io/chrome-for-testing/latest-versions-per-milestone-with-downloads.json")
-        response.raise_for_status()
-        versions_data = response.json()
-        
-        # Find the latest stable version for this major version
-        milestone_key = f"{major_version}"
-        if milestone_key not in versions_data["milestones"]:
-            raise ValueError(f"No ChromeDriver found for major version {major_version}")
-        
-        version_info = versions_data["milestones"][milestone_key]
-        chromedriver_version = version_info["version"]
-        print(f"✅ Found compatible ChromeDriver version: {chromedriver_version}")
-        
-        # Find the Windows download URL
-        download_url = None
-        for download in version_info["downloads"]["chromedriver"]:
-            if download["platform"] == "win32":
-                download_url = download["url"]
-                break
-        
-        if not download_url:
-            raise ValueError("No Windows download found for ChromeDriver")
-        
-        print(f"⬇️ Downloading ChromeDriver from: {download_url}")
-        response = requests.get(download_url)
-        response.raise_for_status()
-        
-        # Save and extract the zip file
-        zip_path = os.path.join(download_path, "chromedriver.zip")
-        with open(zip_path, 'wb') as f:
-            f.write(response.content)
-        
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(download_path)
-        
-        # Find the chromedriver.exe in the extracted files
-        chromedriver_path = None
-        for root, dirs, files in os.walk(download_path):
-            if 'chromedriver.exe' in files:
-                chromedriver_path = os.path.join(root, 'chromedriver.exe')
-                break
-        
-        if not chromedriver_path:
-            raise FileNotFoundError("chromedriver.exe not found in downloaded files")
-        
-        print(f"✅ ChromeDriver installed at: {chromedriver_path}")
-        return chromedriver_path
+        with metrics.span("chromedriver_setup", chrome_major=major_version):
+            from src.extraction import driver_cache
+            return driver_cache.get_chromedriver(chrome_version, cache_dir)
         
     except Exception as e:
         print(f"❌ Failed to download ChromeDriver: {str(e)}")
         print("\n💡 Manual solution:")
         print("1. Download ChromeDriver from: https://googlechromelabs.github.io/chrome-for-testing/")
         print(f"2. Select version matching your Chrome ({chrome_version})")
-        print("3. Extract chromedriver.exe to:", download_path)
+        print("3. Run: python -m src.extraction.driver_cache", chrome_version)
         return None
 
-def download_file_colab_fixed():
+def get_base_download_path():
+    """Returns the absolute data/raw directory of the project, creating it if needed"""
+    base_download_path = os.path.join(PROJECT_ROOT, RAW_DATA_DIR)
+    os.makedirs(base_download_path, exist_ok=True)
+    return base_download_path
+
+def parse_filename_date(file_basename):
+    """Strictly parses the date of an <INDEX>Dia_DD-MM-YY[_view].csv name. Returns a datetime.date or None"""
+    try:
+        date_part = os.path.splitext(file_basename)[0].split("_")[1]
+        return datetime.datetime.strptime(date_part, "%d-%m-%y").date()
+    except (IndexError, ValueError):
+        return None
+
+def extract_date_from_filename(file_basename):
+    """Extracts the ISO date (YYYY-MM-DD) from an IBOVDia_DD-MM-YY file name, falling back to today"""
+    parsed_date = parse_filename_date(file_basename)
+    if parsed_date:
+        iso_date = parsed_date.isoformat()
+        print(f"📅 Extracted date: {iso_date}")
+        return iso_date
+    
+    # Fallback to today's date (live downloads only; the backfill never relies on it)
+    iso_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    print(f"⚠️ Could not extract date from filename '{file_basename}', using today's date: {iso_date}")
+    return iso_date
+
+def get_date_directory(base_download_path, iso_date):
+    """Creates (if needed) and returns the date=YYYY-MM-DD partition directory"""
+    date_directory = os.path.join(base_download_path, f"date={iso_date}")
+    os.makedirs(date_directory, exist_ok=True)
+    print(f"📁 Created date directory: {date_directory}")
+    return date_directory
+
+def store_raw_file(downloaded_file, base_download_path):
+    """Moves a downloaded CSV into its date=YYYY-MM-DD partition and returns the new path"""
+    file_basename = os.path.basename(downloaded_file)
+    iso_date = extract_date_from_filename(file_basename)
+    date_directory = get_date_directory(base_download_path, iso_date)
+    
+    # Move the file to the date directory
+    final_csv_path = os.path.join(date_directory, file_basename)
+    shutil.move(downloaded_file, final_csv_path)
+    print(f"📦 Moved CSV to: {final_csv_path}")
+    return final_csv_path
+
+def save_raw_content(content, file_basename, base_download_path, iso_date=None):
+    """Writes downloaded CSV bytes into date=YYYY-MM-DD/ (atomically) and returns the CSV path"""
+    iso_date = iso_date or extract_date_from_filename(file_basename)
+    date_directory = get_date_directory(base_download_path, iso_date)
+    final_csv_path = os.path.join(date_directory, file_basename)
+    
+    # Write to a temporary name first so readers never see a partial CSV
+    tmp_path = final_csv_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, final_csv_path)
+    print(f"📦 Saved CSV to: {final_csv_path}")
+    return final_csv_path
+
+def convert_csv_to_parquet(final_csv_path):
     """
-    Baixa um arquivo do site da B3 usando Google Chrome,
-    converte para Parquet e retorna ambos os caminhos de arquivo
+    Converts a raw IBOVDia CSV into a Parquet file next to it. Returns the Parquet path
+    (the referenced snapshot's when the data did not change) or None
     """
-    is_windows = platform.system() == 'Windows'
+    print("\n🧪 Starting Parquet conversion...")
+    parquet_filename = os.path.basename(final_csv_path).replace('.csv', '.parquet')
+    parquet_path = os.path.join(os.path.dirname(final_csv_path), parquet_filename)
     
-    # Define base project directory - always use project path
-    project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    try:
+        from src.extraction import csv_converter
+        with metrics.span("conversion", file=os.path.basename(final_csv_path)) as span:
+            snapshot = None
+            if RAW_DEDUP_ENABLED:
+                from src.extraction import dedup
+                with metrics.span("dedup"):
+                    snapshot = dedup.deduplicate(final_csv_path, csv_converter.parse_b3_csv)
+            if snapshot and snapshot.status != "new":
+                metrics.increment("dedup_total", result=snapshot.status)
+                span.set(dedup=snapshot.status)
+                print(f"♻️ {dedup.STATUS_MESSAGES[snapshot.status]}: partition resolves to {snapshot.parquet_path}, "
+                      "skipping conversion and upload")
+                record_raw_partition(snapshot.parquet_path, snapshot.day)
+                return snapshot.parquet_path
+            
+            print(f"📄 Trying to read file: {final_csv_path}")
+            with metrics.span("csv_parse"):
+                table = snapshot.table if snapshot else csv_converter.parse_b3_csv(final_csv_path)
+            print(f"📊 CSV loaded successfully: {table.num_rows} rows, {table.num_columns} columns")
+            
+            # Save as Parquet in date directory
+            with metrics.span("parquet_write"):
+                csv_converter.write_parquet(table, parquet_path)
+            print(f"💾 Parquet file saved: {parquet_path}")
+            span.set(rows=table.num_rows)
+        
+        # Size comparison
+        csv_bytes = os.path.getsize(final_csv_path)
+        parquet_bytes = os.path.getsize(parquet_path)
+        metrics.observe("csv_bytes", csv_bytes, metrics.BYTES_BUCKETS)
+        metrics.observe("parquet_bytes", parquet_bytes, metrics.BYTES_BUCKETS)
+        metrics.increment("conversions_total", status="ok")
+        if snapshot:
+            snapshot.commit()
+            metrics.increment("dedup_total", result="new")
+        record_raw_partition(parquet_path)
+        print(f"📦 Size comparison: CSV={csv_bytes / 1024 / 1024:.2f} MB → Parquet={parquet_bytes / 1024 / 1024:.2f} MB")
+        
+        return parquet_path
+        
+    except Exception as e:
+        metrics.increment("conversions_total", status="error")
+        print(f"❌ Conversion failed: {str(e)}")
+        return None
+
+def record_raw_partition(parquet_path, day=None):
+    """
+    Registers the canonical <INDEX>Dia_DD-MM-YY.parquet of a partition in the local catalog
+    and refreshes that day in the sector cube, the ticker index and the delta store
+    (`day` is given when the partition is a reference to an earlier day's file)
+    """
+    from src.catalog.partition_catalog import record_partition
+    from src.catalog.ticker_index import record_ticker_partition
+    from src.query.delta_store import record_delta_partition
+    from src.query.sector_cube import record_sector_day
+    from src.transform.partitions import raw_file_pattern
+    if raw_file_pattern().match(os.path.basename(parquet_path)):
+        day = day or parse_filename_date(os.path.basename(parquet_path))
+        base_download_path = os.path.dirname(os.path.dirname(parquet_path))
+        record_partition("raw", day, parquet_path, base_download_path)
+        record_sector_day(day, parquet_path, base_download_path)
+        record_ticker_partition(day, parquet_path, base_download_path)
+        record_delta_partition(day, parquet_path, base_download_path)
+
+def download_file_direct(index=B3_DEFAULT_INDEX, segment=B3_DEFAULT_SEGMENT, base_url=B3_API_BASE_URL,
+                         session=None, base_download_path=None):
+    """
+    Baixa a carteira do dia direto dos endpoints da B3 (sem navegador),
+    grava em date=YYYY-MM-DD/ (na raiz do índice), converte para Parquet e retorna ambos os caminhos
+    """
+    from src.transform.partitions import index_raw_root
+    base_download_path = base_download_path or index_raw_root(get_base_download_path(), index)
+    print(f"🌐 Fetching {index} portfolio directly from {base_url}...")
+    start_time = time.time()
     
-    # Always use data/raw within the project directory
-    base_download_path = os.path.join(project_dir, "data", "raw")
+    try:
+        with metrics.span("direct_fetch", index=index):
+            from src.extraction.b3_direct import fetch_portfolio_csv
+            file_basename, content = fetch_portfolio_csv(index, segment, base_url=base_url, session=session)
+    except Exception as e:
+        metrics.increment("downloads_total", mode="direct", status="error")
+        print(f"❌ Direct download failed: {str(e)}")
+        return None, None
     
-    # Create base download directory if it doesn't exist
-    os.makedirs(base_download_path, exist_ok=True)
-    print(f"📂 Using base download directory: {base_download_path}")
+    metrics.increment("downloads_total", mode="direct", status="ok")
+    metrics.increment("downloaded_bytes_total", len(content), mode="direct")
+    print(f"✅ Download complete in {time.time() - start_time:.2f}s: {file_basename} ({len(content)} bytes)")
     
-    # Initial download will go to this temporary location
-    temp_download_path = os.path.join(base_download_path, "temp")
-    os.makedirs(temp_download_path, exist_ok=True)
+    with metrics.span("store_raw"):
+        final_csv_path = save_raw_content(content, file_basename, base_download_path)
+    parquet_path = convert_csv_to_parquet(final_csv_path)
+    return final_csv_path, parquet_path
+
+def extract_daily_portfolio(mode=EXTRACTION_MODE, **direct_kwargs):
+    """
+    Ponto de entrada da extração diária.
     
+    mode="direct" usa os endpoints HTTP da B3 e cai para o Selenium em caso de falha;
+    mode="memory" faz o mesmo download, mas converte em memória e grava nos RAW_SINKS
+    (src/extraction/memory_pipeline.py);
+    mode="selenium" usa apenas o navegador headless.
+
+    Returns:
+        tuple: (caminho do CSV, caminho do Parquet). No modo "memory" são os caminhos
+        (ou chaves) do primeiro sink, e o CSV é None quando não é mantido (keep_csv=False)
+    """
+    if mode == "memory":
+        from src.extraction.memory_pipeline import download_to_sinks
+        with metrics.span("extraction", mode="memory"):
+            result = download_to_sinks(**direct_kwargs)
+        if result and result["written"]:
+            # paths (or keys) of the first sink, by suffix: the CSV is only there when it is kept
+            written = next(iter(result["written"].values()))
+            csv_path = next((path for path in written if path.endswith(".csv")), None)
+            parquet_path = next((path for path in written if path.endswith(".parquet")), None)
+            return csv_path, parquet_path
+        metrics.increment("fallbacks_total")
+        print("↩️ Falling back to Selenium extraction...")
+    elif mode == "direct":
+        with metrics.span("extraction", mode="direct"):
+            csv_path, parquet_path = download_file_direct(**direct_kwargs)
+        if csv_path:
+            return csv_path, parquet_path
+        metrics.increment("fallbacks_total")
+        print("↩️ Falling back to Selenium extraction...")
+    elif mode != "selenium":
+        raise ValueError(f"Unknown extraction mode: {mode}")
+    with metrics.span("extraction", mode="selenium"):
+        return download_file_colab_fixed()
+
+def build_chrome_options(download_dir):
+    """Headless Chrome options that save downloads straight into `download_dir`"""
+    from selenium.webdriver.chrome.options import Options
+
     # Configure Chrome options
     chrome_options = Options()
     chrome_options.add_argument("--headless")
@@ -164,86 +293,97 @@ def download_file_colab_fixed():
         chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
         os.environ['WDM_LOG_LEVEL'] = '0'  # Silence webdriver-manager logs
     
-    # Set download preferences to temporary location
+    # Set download preferences to the given location
     prefs = {
-        "download.default_directory": temp_download_path,
+        "download.default_directory": download_dir,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True
     }
     chrome_options.add_experimental_option("prefs", prefs)
+    return chrome_options
+
+def create_webdriver(download_dir):
+    """Starts a headless Chrome WebDriver downloading into `download_dir`. Raises on failure"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    is_windows = platform.system() == 'Windows'
+    chrome_options = build_chrome_options(download_dir)
     
     # Obter versão do Chrome
     chrome_version = get_chrome_version() if is_windows else None
     print(f"🔍 Chrome version: {chrome_version or 'Not detected'}")
 
     print("🚀 Configuring ChromeDriver...")
-    driver = None
-    
-    try:
-        if is_windows and chrome_version:
-            print("🔄 Downloading ChromeDriver for Windows")
-            chromedriver_path = download_chromedriver(chrome_version, temp_download_path)
-            
-            if chromedriver_path:
-                service = Service(executable_path=chromedriver_path)
-                driver = webdriver.Chrome(service=service, options=chrome_options)
-                print("✅ WebDriver initialized with manually installed ChromeDriver.")
-            else:
-                raise Exception("Manual ChromeDriver installation failed")
-        else:
-            # Tentar inicialização padrão para Linux ou quando a detecção falha
-            print("🔄 Trying standard WebDriver initialization")
-            from webdriver_manager.chrome import ChromeDriverManager
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            print("✅ WebDriver initialized successfully.")
+    if is_windows and chrome_version:
+        print("🔄 Downloading ChromeDriver for Windows")
+        chromedriver_path = download_chromedriver(chrome_version)
         
-    except Exception as e:
-        print(f"❌ WebDriver initialization failed: {e}")
-        print("\nTroubleshooting suggestions:")
-        print("1. Install ChromeDriver manually from:")
-        print("   https://googlechromelabs.github.io/chrome-for-testing/")
-        print("2. Make sure Chrome is installed and up to date")
-        return None, None
+        if chromedriver_path:
+            service = Service(executable_path=chromedriver_path)
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+            print("✅ WebDriver initialized with manually installed ChromeDriver.")
+        else:
+            raise Exception("Manual ChromeDriver installation failed")
+    else:
+        # Tentar inicialização padrão para Linux ou quando a detecção falha
+        print("🔄 Trying standard WebDriver initialization")
+        from webdriver_manager.chrome import ChromeDriverManager
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        print("✅ WebDriver initialized successfully.")
+    return driver
 
-    try:
-        # --- Navigate to page ---
-        print("🌐 Accessing IBOVESPA page on B3...")
-        driver.get("https://sistemaswebb3-listados.b3.com.br/indexPage/day/IBOV?language=pt-br")
+def download_portfolio_with_driver(driver, download_dir, index=B3_DEFAULT_INDEX, segment_option=B3_SEGMENT_OPTIONS["setor"]):
+    """
+    Usa um WebDriver já aberto para baixar a carteira do dia de um índice/segmento.
+    Retorna o caminho do arquivo baixado em `download_dir`.
+    """
+    from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.wait import WebDriverWait
+
+    # --- Navigate to page ---
+    print(f"🌐 Accessing {index} page on B3...")
+    with metrics.span("page_load", index=index):
+        driver.get(B3_INDEX_PAGE_URL.format(index=index))
         
         # Wait for page load
         WebDriverWait(driver, 30).until(
             EC.presence_of_element_located((By.ID, "segment"))
         )
-        print("📄 Page loaded successfully")
+    print("📄 Page loaded successfully")
 
-        # --- Select segment ---
-        print("🔽 Selecting 'Setor de Atuação' segment...")
-        
-        # Handle overlays and clicks
-        def select_segment():
-            segment_dropdown = WebDriverWait(driver, 30).until(
-                EC.element_to_be_clickable((By.ID, "segment"))
-            )
-            
-            try:
-                segment_dropdown.click()
-                return True
-            except ElementClickInterceptedException:
-                print("⚠️ Standard click intercepted, using JavaScript click")
-                driver.execute_script("arguments[0].click();", segment_dropdown)
-                return True
-            except Exception:
-                return False
+    # --- Select segment ---
+    print(f"🔽 Selecting segment option {segment_option}...")
+    
+    # Handle overlays and clicks
+    def select_segment():
+        segment_dropdown = WebDriverWait(driver, 30).until(
+            EC.element_to_be_clickable((By.ID, "segment"))
+        )
         
+        try:
+            segment_dropdown.click()
+            return True
+        except ElementClickInterceptedException:
+            print("⚠️ Standard click intercepted, using JavaScript click")
+            driver.execute_script("arguments[0].click();", segment_dropdown)
+            return True
+        except Exception:
+            return False
+    
+    with metrics.span("segment_select", index=index, option=segment_option):
         # Retry mechanism
         max_retries = 3
         for attempt in range(max_retries):
             print(f"↻ Attempt {attempt+1}/{max_retries} to select segment")
+            metrics.increment("segment_select_attempts_total", index=index)
             if select_segment():
                 break
-            
+        
             # Check for blocking overlay
             try:
                 overlay = driver.find_element(By.CLASS_NAME, 'backdrop')
@@ -254,177 +394,75 @@ def download_file_colab_fixed():
             time.sleep(2)
         else:
             raise TimeoutException("Failed to select segment after multiple attempts")
-        
+    
         # Select specific option
         sector_option = WebDriverWait(driver, 20).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="segment"]/option[2]'))
+            EC.element_to_be_clickable((By.XPATH, f'//*[@id="segment"]/option[{segment_option}]'))
         )
         sector_option.click()
         print("✅ Segment selected")
         time.sleep(3)  # Wait for page update
 
-        # --- Download file ---
-        print("💾 Locating and clicking download link...")
-        download_link = WebDriverWait(driver, 30).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="divContainerIframeB3"]/div/div[1]/form/div[2]/div/div[2]/div/div/div[1]/div[2]/p/a'))
-        )
-        
-        # List existing files before download
-        existing_files = set(glob.glob(os.path.join(temp_download_path, "*")))
-        print(f"📂 Existing files: {len(existing_files)} files")
+    # --- Download file ---
+    print("💾 Locating and clicking download link...")
+    download_link = WebDriverWait(driver, 30).until(
+        EC.element_to_be_clickable((By.XPATH, '//*[@id="divContainerIframeB3"]/div/div[1]/form/div[2]/div/div[2]/div/div/div[1]/div[2]/p/a'))
+    )
+    
+    # Start watching before the click so no filesystem event is missed
+    with metrics.span("download", index=index) as span, DownloadWatcher(download_dir) as watcher:
+        print(f"📂 Existing files: {len(watcher.existing_files)} files")
         
         # Click download link
         download_link.click()
         print(f"⬇️ Download started at {time.strftime('%H:%M:%S')}")
-        start_time = time.time()
 
         # --- Wait for download completion ---
         print("⏳ Waiting for download to complete...")
+        downloaded_file = watcher.wait(max_wait=300)
+        span.set(file=os.path.basename(downloaded_file), backend=watcher.metrics.get("backend"))
+        metrics.increment("downloads_total", mode="selenium", status="ok")
+        metrics.increment("downloaded_bytes_total", watcher.metrics["size"], mode="selenium")
+        metrics.observe("download_first_byte_seconds", watcher.metrics["time_to_first_byte"])
+        return downloaded_file
+
+def download_file_colab_fixed():
+    """
+    Baixa um arquivo do site da B3 usando Google Chrome,
+    converte para Parquet e retorna ambos os caminhos de arquivo
+    """
+    # Always use data/raw within the project directory
+    base_download_path = get_base_download_path()
+    print(f"📂 Using base download directory: {base_download_path}")
+    
+    # Initial download will go to this temporary location
+    temp_download_path = os.path.join(base_download_path, "temp")
+    os.makedirs(temp_download_path, exist_ok=True)
+    
+    driver = None
+    
+    try:
+        with metrics.span("driver_setup"):
+            driver = create_webdriver(temp_download_path)
+    except Exception as e:
+        print(f"❌ WebDriver initialization failed: {e}")
+        print("\nTroubleshooting suggestions:")
+        print("1. Install ChromeDriver manually from:")
+        print("   https://googlechromelabs.github.io/chrome-for-testing/")
+        print("2. Make sure Chrome is installed and up to date")
+        return None, None
+
+    try:
+        downloaded_file = download_portfolio_with_driver(driver, temp_download_path)
         
-        # Wait for new file to appear
-        max_wait = 300  # 5-minute timeout
-        downloaded_file = None
-        last_size = 0
-        stable_count = 0
-        
-        while time.time() - start_time < max_wait:
-            current_files = set(glob.glob(os.path.join(temp_download_path, "*")))
-            new_files = current_files - existing_files
-            
-            # Check partial downloads
-            partial_files = [f for f in new_files if f.endswith('.crdownload')]
-            completed_files = [f for f in new_files if not f.endswith('.crdownload')]
-            
-            if completed_files:
-                # Prioritize IBOVDia.csv if exists
-                ibov_files = [f for f in completed_files if "IBOVDia" in f]
-                if ibov_files:
-                    candidate = ibov_files[0]
-                else:
-                    candidate = completed_files[0]
-                
-                current_size = os.path.getsize(candidate)
-                
-                # Check if size is stable
-                if current_size > 0:
-                    if current_size == last_size:
-                        stable_count += 1
-                        print(f"📊 File size stable: {current_size} bytes ({stable_count}/3)")
-                    else:
-                        stable_count = 0
-                        print(f"📈 File growing: {current_size} bytes")
-                    
-                    last_size = current_size
-                    
-                    # Consider download complete if size stable for 3 checks
-                    if stable_count >= 3:
-                        downloaded_file = candidate
-                        print(f"✅ Download complete! Final size: {current_size} bytes")
-                        break
-                else:
-                    print(f"⚠️ File found but empty: {candidate}")
-            
-            if partial_files:
-                partial_file = partial_files[0]
-                try:
-                    size = os.path.getsize(partial_file)
-                    print(f"⏱️ Partial download: {size} bytes")
-                except:
-                    print("⏱️ Partial download in progress")
-            
-            elif not new_files:
-                elapsed = int(time.time() - start_time)
-                print(f"🕒 Waiting for download to start... ({elapsed}s)")
-            
-            time.sleep(2)
-        else:
-            # Final check after timeout
-            current_files = set(glob.glob(os.path.join(temp_download_path, "*")))
-            new_files = current_files - existing_files
-            completed_files = [f for f in new_files if not f.endswith('.crdownload')]
-            
-            if completed_files:
-                candidate = completed_files[0]
-                if os.path.getsize(candidate) > 0:
-                    downloaded_file = candidate
-                    print(f"✅ File downloaded after timeout: {candidate}")
-                else:
-                    raise Exception(f"Downloaded file is empty: {candidate}")
-            else:
-                raise Exception(f"Download timeout after {max_wait} seconds - No file downloaded")
-        
-        # Extract date from the filename (format: IBOVDia_DD-MM-YY)
-        file_basename = os.path.basename(downloaded_file)
-        
-        # Handle different possible date formats in filenames
-        try:
-            if "_" in file_basename:
-                # Try to extract date from IBOVDia_28-07-25 format
-                date_part = file_basename.split("_")[1].split(".")[0]
-                
-                # Convert from DD-MM-YY to YYYY-MM-DD format
-                day, month, short_year = date_part.split("-")
-                year = f"20{short_year}"  # Assuming 20XX for the year
-                iso_date = f"{year}-{month}-{day}"
-            else:
-                # If no date in filename, use today's date
-                today = datetime.datetime.now()
-                iso_date = today.strftime("%Y-%m-%d")
-                
-            print(f"📅 Extracted date: {iso_date}")
-        except Exception as e:
-            print(f"⚠️ Could not extract date from filename: {e}")
-            # Fallback to today's date
-            today = datetime.datetime.now()
-            iso_date = today.strftime("%Y-%m-%d")
-            
-        # Create date directory structure
-        date_directory = os.path.join(base_download_path, f"date={iso_date}")
-        os.makedirs(date_directory, exist_ok=True)
-        print(f"📁 Created date directory: {date_directory}")
-        
-        # Move the file to the date directory
-        final_csv_path = os.path.join(date_directory, file_basename)
-        shutil.move(downloaded_file, final_csv_path)
-        print(f"📦 Moved CSV to: {final_csv_path}")
-            
-        # --- Convert to Parquet ---
-        print("\n🧪 Starting Parquet conversion...")
-        parquet_filename = os.path.basename(final_csv_path).replace('.csv', '.parquet')
-        parquet_path = os.path.join(date_directory, parquet_filename)
-        
-        try:
-            print(f"📄 Trying to read file: {final_csv_path}")
-            df = pd.read_csv(
-                final_csv_path, 
-                sep=';', 
-                encoding='latin-1', 
-                decimal=',',
-                engine='python',
-                on_bad_lines='skip'
-            )
-            
-            if df.empty:
-                raise ValueError("Empty DataFrame after reading CSV")
-                
-            print(f"📊 CSV loaded successfully: {df.shape[0]} rows, {df.shape[1]} columns")
-            
-            # Save as Parquet in date directory
-            df.to_parquet(parquet_path)
-            print(f"💾 Parquet file saved: {parquet_path}")
-            
-            # Size comparison
-            csv_size = os.path.getsize(final_csv_path) / 1024 / 1024
-            parquet_size = os.path.getsize(parquet_path) / 1024 / 1024
-            print(f"📦 Size comparison: CSV={csv_size:.2f} MB → Parquet={parquet_size:.2f} MB")
-            
-            return final_csv_path, parquet_path
-            
-        except Exception as e:
-            print(f"❌ Conversion failed: {str(e)}")
-            return final_csv_path, None
+        # Move into the date partition and convert to Parquet
+        with metrics.span("store_raw"):
+            final_csv_path = store_raw_file(downloaded_file, base_download_path)
+        parquet_path = convert_csv_to_parquet(final_csv_path)
+        return final_csv_path, parquet_path
 
     except Exception as e:
+        metrics.increment("downloads_total", mode="selenium", status="error")
         print(f"❌ Error occurred: {str(e)}")
         screenshot_path = os.path.join(temp_download_path, "error_screenshot.png")
         driver.save_screenshot(screenshot_path)
@@ -437,89 +475,18 @@ def download_file_colab_fixed():
 
 def wait_for_download_completion(download_dir, existing_files, max_wait=300):
     """Waits for file download to complete and returns the downloaded file path"""
-    start_time = time.time()
-    downloaded_file = None
-    last_size = 0
-    stable_count = 0
-    
-    while time.time() - start_time < max_wait:
-        # Get current files and identify new ones
-        current_files = set(glob.glob(os.path.join(download_dir, "*")))
-        new_files = current_files - existing_files
-        
-        # Check for partial and completed downloads
-        partial_files = [f for f in new_files if f.endswith('.crdownload') or f.endswith('.tmp')]
-        completed_files = [f for f in new_files if not (f.endswith('.crdownload') or f.endswith('.tmp'))]
-        
-        # If there are completed files, check size stability
-        if completed_files:
-            # Prioritize IBOVDia.csv if exists
-            ibov_files = [f for f in completed_files if "IBOVDia" in f]
-            if ibov_files:
-                candidate = ibov_files[0]
-            else:
-                candidate = completed_files[0]
-            
-            current_size = os.path.getsize(candidate)
-            
-            # Check if size is stable
-            if current_size > 0:
-                if current_size == last_size:
-                    stable_count += 1
-                    print(f"📊 File size stable: {current_size} bytes ({stable_count}/3)")
-                else:
-                    stable_count = 0
-                    print(f"📈 File growing: {current_size} bytes")
-                
-                last_size = current_size
-                
-                # Consider download complete if size stable for 3 checks
-                if stable_count >= 3:
-                    downloaded_file = candidate
-                    print(f"✅ Download complete! Final size: {current_size} bytes")
-                    break
-            else:
-                print(f"⚠️ File found but empty: {candidate}")
-        
-        if partial_files:
-            partial_file = partial_files[0]
-            try:
-                size = os.path.getsize(partial_file)
-                print(f"⏱️ Partial download: {size} bytes")
-            except:
-                print("⏱️ Partial download in progress")
-        
-        elif not new_files:
-            elapsed = int(time.time() - start_time)
-            print(f"🕒 Waiting for download to start... ({elapsed}s)")
-        
-        time.sleep(2)
-    else:
-        # Final check after timeout
-        current_files = set(glob.glob(os.path.join(download_dir, "*")))
-        new_files = current_files - existing_files
-        completed_files = [f for f in new_files if not f.endswith('.crdownload')]
-        
-        if completed_files:
-            candidate = completed_files[0]
-            if os.path.getsize(candidate) > 0:
-                downloaded_file = candidate
-                print(f"✅ File downloaded after timeout: {candidate}")
-            else:
-                raise Exception(f"Downloaded file is empty: {candidate}")
-        else:
-            raise Exception(f"Download timeout after {max_wait} seconds - No file downloaded")
-    
-    # Return the downloaded file path
-    return downloaded_file
+    with DownloadWatcher(download_dir, existing_files=existing_files) as watcher:
+        return watcher.wait(max_wait=max_wait)
 
 
 if __name__ == "__main__":
-    csv_path, parquet_path = download_file_colab_fixed()
+    if not check_dependencies():
+        raise SystemExit(1)
+    csv_path, parquet_path = extract_daily_portfolio()
 
-    if csv_path and parquet_path:
+    if parquet_path:
         print("\n🎉 Process completed successfully!")
-        print(f"CSV path: {csv_path}")
+        print(f"CSV path: {csv_path or 'not kept (in-memory pipeline)'}")
         print(f"Parquet path: {parquet_path}")
     elif csv_path:
         print("\n⚠️ CSV downloaded but conversion failed")
@@ -0,0 +1,213 @@
+"""
+Backfill histórico: extrai um intervalo de datas em paralelo.
+
+Para cada pregão do calendário B3 entre `start` e `end` que ainda não tem
+partição completa em data/raw (CSV + Parquet), baixa o arquivo com paralelismo
+limitado, retry com backoff e limite global de requisições por segundo, e grava
+no mesmo layout date=YYYY-MM-DD/<INDEX>Dia_DD-MM-YY.csv/.parquet, na raiz do
+índice (data/raw, ou data/raw/index=<INDEX> fora do índice padrão). Só os
+downloads são paralelos: gravação, conversão, deduplicação e os ganchos de
+escrita rodam na thread principal, em ordem de data.
+
+Reexecutar é incremental e idempotente: partições completas são puladas,
+partições só com CSV são apenas convertidas, e toda escrita é atômica.
+
+O `fetcher` é plugável: recebe um `datetime.date` e devolve (nome do arquivo,
+bytes). O padrão usa o cliente HTTP direto (`b3_direct`); arquivos cuja data não
+bate com o dia pedido são descartados, nunca gravados na partição errada.
+
+Uso:
+    python -m src.extraction.backfill 2024-01-01 2024-12-31 --workers 4 --rate 2
+"""
+import argparse
+import datetime
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import (
+    B3_API_BASE_URL,
+    B3_DEFAULT_INDEX,
+    B3_DEFAULT_SEGMENT,
+    BACKFILL_MAX_WORKERS,
+    BACKFILL_REQUESTS_PER_SECOND,
+    BACKFILL_RETRIES,
+)
+from src.extraction import b3_direct, b3_scraper
+from src.extraction.trading_calendar import trading_days
+from src.transform.partitions import REFERENCE_SUFFIX, index_raw_root
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, shared by all worker threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DateMismatchError(Exception):
+    """O servidor devolveu a carteira de outro dia."""
+
+
+def direct_fetcher(index=B3_DEFAULT_INDEX, segment=B3_DEFAULT_SEGMENT, base_url=B3_API_BASE_URL):
+    """Default fetcher backed by the browserless HTTP client"""
+    def fetch(day):
+        return b3_direct.fetch_portfolio_csv(index, segment, base_url=base_url, date=day)
+    return fetch
+
+
+def partition_state(base_download_path, day, index=B3_DEFAULT_INDEX):
+    """
+    'complete' (CSV + Parquet, or a dedup reference to an earlier snapshot),
+    'csv_only' or 'missing' for the day's partition
+    """
+    date_directory = os.path.join(base_download_path, f"date={day.isoformat()}")
+    pattern = os.path.join(date_directory, f"{index}Dia_{day.strftime('%d-%m-%y')}")
+    has_csv = os.path.exists(pattern + ".csv")
+    has_parquet = os.path.exists(pattern + ".parquet")
+    if (has_csv and has_parquet) or os.path.exists(pattern + REFERENCE_SUFFIX):
+        return "complete"
+    return "csv_only" if has_csv else "missing"
+
+
+def existing_partitions(base_download_path):
+    """Dates that already have a date= directory under data/raw"""
+    found = set()
+    for path in glob.glob(os.path.join(base_download_path, "date=*")):
+        try:
+            found.add(datetime.date.fromisoformat(os.path.basename(path)[len("date="):]))
+        except ValueError:
+            continue
+    return found
+
+
+def plan_backfill(start, end, base_download_path, index=B3_DEFAULT_INDEX):
+    """Returns (days to download, days that only need conversion)"""
+    present = existing_partitions(base_download_path)
+    to_download, to_convert = [], []
+    for day in trading_days(start, end):
+        if day not in present:
+            to_download.append(day)
+            continue
+        state = partition_state(base_download_path, day, index)
+        if state == "missing":
+            to_download.append(day)
+        elif state == "csv_only":
+            to_convert.append(day)
+    return to_download, to_convert
+
+
+def _fetch_day(day, fetcher, limiter, retries):
+    """Downloads one day with retries (worker threads); nothing is written here"""
+    last_error = None
+    for attempt in range(retries):
+        limiter.wait()
+        try:
+            file_basename, content = fetcher(day)
+            file_date = b3_scraper.parse_filename_date(file_basename)
+            if file_date != day:
+                raise DateMismatchError(f"requested {day}, got {file_basename}")
+            return {"date": day, "status": "fetched", "file_basename": file_basename, "content": content}
+        except DateMismatchError as e:
+            # Retrying will not change the answer
+            return {"date": day, "status": "unavailable", "error": str(e)}
+        except Exception as e:
+            last_error = e
+            if attempt == retries - 1:
+                print(f"⚠️ {day} attempt {attempt+1}/{retries} failed: {e}")
+                break
+            backoff = min(2 ** attempt, 30)
+            print(f"⚠️ {day} attempt {attempt+1}/{retries} failed: {e} (retrying in {backoff}s)")
+            time.sleep(backoff)
+    return {"date": day, "status": "failed", "error": str(last_error)}
+
+
+def _store_day(fetched, base_download_path):
+    """Saves and converts one fetched day (main thread, in date order)"""
+    day = fetched["date"]
+    if fetched["status"] != "fetched":
+        return fetched
+    try:
+        csv_path = b3_scraper.save_raw_content(fetched["content"], fetched["file_basename"], base_download_path,
+                                               day.isoformat())
+    except Exception as e:
+        return {"date": day, "status": "failed", "error": str(e)}
+    parquet_path = b3_scraper.convert_csv_to_parquet(csv_path)
+    if not parquet_path:
+        return {"date": day, "status": "failed", "error": f"conversion failed for {csv_path}",
+                "csv_path": csv_path}
+    return {"date": day, "status": "downloaded", "csv_path": csv_path, "parquet_path": parquet_path}
+
+
+def backfill(start, end, fetcher=None, base_download_path=None, index=B3_DEFAULT_INDEX,
+             max_workers=BACKFILL_MAX_WORKERS, rate=BACKFILL_REQUESTS_PER_SECOND, retries=BACKFILL_RETRIES):
+    """
+    Downloads every missing trading day between start and end (inclusive).
+
+    Returns a list of result dicts with "date" and "status"
+    ("downloaded", "converted", "unavailable" or "failed").
+    """
+    base_download_path = base_download_path or index_raw_root(b3_scraper.get_base_download_path(), index)
+    fetcher = fetcher or direct_fetcher(index)
+    to_download, to_convert = plan_backfill(start, end, base_download_path, index)
+    print(f"🗓️ Backfill {start} → {end}: {len(to_download)} days to download, "
+          f"{len(to_convert)} to convert, everything else already present")
+
+    results = []
+    limiter = RateLimiter(rate)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {day: executor.submit(_fetch_day, day, fetcher, limiter, retries) for day in to_download}
+        # Only the downloads are concurrent. Saving and converting happen here, one day at a time
+        # in date order, so dedup decisions and the writer hooks (catalog, sector cube, ticker
+        # index, delta store) see exactly the sequence of a serial run
+        for day in sorted(to_download + to_convert):
+            if day in futures:
+                results.append(_store_day(futures[day].result(), base_download_path))
+                continue
+            csv_path = os.path.join(base_download_path, f"date={day.isoformat()}",
+                                    f"{index}Dia_{day.strftime('%d-%m-%y')}.csv")
+            parquet_path = b3_scraper.convert_csv_to_parquet(csv_path)
+            results.append({"date": day, "status": "converted" if parquet_path else "failed",
+                            "csv_path": csv_path, "parquet_path": parquet_path})
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(f"📊 Backfill finished in {elapsed:.1f}s: {counts}")
+    return sorted(results, key=lambda r: r["date"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill historical B3 portfolio partitions")
+    parser.add_argument("start", type=datetime.date.fromisoformat)
+    parser.add_argument("end", type=datetime.date.fromisoformat)
+    parser.add_argument("--index", default=B3_DEFAULT_INDEX)
+    parser.add_argument("--base-url", default=B3_API_BASE_URL)
+    parser.add_argument("--workers", type=int, default=BACKFILL_MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=BACKFILL_REQUESTS_PER_SECOND)
+    parser.add_argument("--retries", type=int, default=BACKFILL_RETRIES)
+    args = parser.parse_args()
+
+    backfill(
+        args.start,
+        args.end,
+        fetcher=direct_fetcher(args.index, base_url=args.base_url),
+        index=args.index,
+        max_workers=args.workers,
+        rate=args.rate,
+        retries=args.retries,
+    )
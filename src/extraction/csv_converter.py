@@ -0,0 +1,170 @@
+"""
+Conversão tipada dos arquivos IBOVDia_*.csv da B3 para Parquet.
+
+Formato do arquivo baixado (latin-1, separador `;`, decimal `,`, milhar `.`):
+
+    IBOV - Carteira do Dia 28/07/25                               <- título
+    Setor;Código;Ação;Tipo;Qtde. Teórica;Part. (%);Part. (%)Acum.; <- cabeçalho
+    Bens Indls / Máqs e Equips;WEGE3;WEG;ON NM;1.234.567;2,345;2,345;
+    ...
+    Quantidade Teórica Total;101.234.567.890;100,000;;            <- rodapé
+    Redutor;16.145.227,47;;;                                      <- rodapé
+
+Título e rodapé são removidos explicitamente (em vez de `on_bad_lines='skip'`),
+o corpo é lido pelo leitor CSV multithread do pyarrow e as colunas numéricas são
+convertidas de forma vetorizada, com schema explícito.
+"""
+import io
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from config.settings import (
+    PARQUET_COMPRESSION,
+    PARQUET_COMPRESSION_LEVEL,
+    PARQUET_ROW_GROUP_SIZE,
+)
+
+SOURCE_ENCODING = "latin-1"
+
+# Column names as published by B3
+SECTOR_COLUMN = "Setor"
+TICKER_COLUMN = "Código"
+ASSET_COLUMN = "Ação"
+TYPE_COLUMN = "Tipo"
+QUANTITY_COLUMN = "Qtde. Teórica"
+PARTICIPATION_COLUMN = "Part. (%)"
+CUMULATIVE_PARTICIPATION_COLUMN = "Part. (%)Acum."
+
+COLUMN_TYPES = {
+    SECTOR_COLUMN: pa.string(),
+    TICKER_COLUMN: pa.string(),
+    ASSET_COLUMN: pa.string(),
+    TYPE_COLUMN: pa.string(),
+    QUANTITY_COLUMN: pa.int64(),
+    PARTICIPATION_COLUMN: pa.float64(),
+    CUMULATIVE_PARTICIPATION_COLUMN: pa.float64(),
+}
+
+# Low-cardinality columns that benefit from Parquet dictionary encoding
+DICTIONARY_COLUMNS = [SECTOR_COLUMN, TICKER_COLUMN, ASSET_COLUMN, TYPE_COLUMN]
+
+FOOTER_PREFIXES = ("Quantidade Teórica Total", "Redutor")
+
+
+class B3CsvFormatError(ValueError):
+    """O arquivo não tem o formato esperado da carteira do dia."""
+
+
+def clean_b3_csv(raw_bytes):
+    """
+    Removes title, footer and blank lines and the trailing `;` of every line.
+
+    Returns:
+        tuple: (header as list of column names, body as UTF-8 bytes without header)
+    """
+    text = raw_bytes.decode(SOURCE_ENCODING) if isinstance(raw_bytes, bytes) else raw_bytes
+    header = None
+    body = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.endswith(";"):
+            line = line[:-1]
+        if header is None:
+            # Everything before the header (the "Carteira do Dia" title) is skipped
+            fields = [field.strip() for field in line.split(";")]
+            if TICKER_COLUMN in fields:
+                header = fields
+            continue
+        if line.startswith(FOOTER_PREFIXES):
+            continue
+        body.append(line)
+
+    if header is None:
+        raise B3CsvFormatError(f"Header with '{TICKER_COLUMN}' column not found")
+    return header, ("\n".join(body) + "\n").encode("utf-8")
+
+
+def _skip_invalid_row(row):
+    print(f"⚠️ Skipping malformed CSV row {row.number}: {row.text!r}")
+    return "skip"
+
+
+def _to_number(column, target_type):
+    """'1.234.567,89' -> 1234567.89 (vectorized on the Arrow string column)"""
+    column = pc.replace_substring(column, ".", "")
+    column = pc.replace_substring(column, ",", ".")
+    return pc.cast(column, target_type)
+
+
+def parse_b3_csv(source):
+    """
+    Parses a B3 portfolio CSV (path or raw bytes) into a typed Arrow table.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            source = f.read()
+    header, body = clean_b3_csv(source)
+
+    table = pacsv.read_csv(
+        io.BytesIO(body),
+        read_options=pacsv.ReadOptions(column_names=header),
+        parse_options=pacsv.ParseOptions(delimiter=";", quote_char=False, invalid_row_handler=_skip_invalid_row),
+        convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+    if table.num_rows == 0:
+        raise B3CsvFormatError("No portfolio rows found in CSV")
+
+    columns = []
+    for name in table.column_names:
+        column = table.column(name)
+        target_type = COLUMN_TYPES.get(name, pa.string())
+        if pa.types.is_string(target_type):
+            column = pc.utf8_trim_whitespace(column)
+        else:
+            column = _to_number(column, target_type)
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def _write_table(table, where, compression, compression_level, row_group_size):
+    pq.write_table(
+        table,
+        where,
+        compression=compression,
+        compression_level=compression_level,
+        use_dictionary=[name for name in DICTIONARY_COLUMNS if name in table.column_names],
+        write_statistics=True,
+        row_group_size=row_group_size,
+    )
+
+
+def write_parquet(table, parquet_path, compression=PARQUET_COMPRESSION,
+                  compression_level=PARQUET_COMPRESSION_LEVEL, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """Writes the table with dictionary encoding on ticker/sector and row-group statistics (atomic rename)"""
+    tmp_path = parquet_path + ".tmp"
+    _write_table(table, tmp_path, compression, compression_level, row_group_size)
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+
+def parquet_bytes(table, compression=PARQUET_COMPRESSION,
+                  compression_level=PARQUET_COMPRESSION_LEVEL, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """Same file as write_parquet, serialized into memory. Returns a pyarrow.Buffer"""
+    sink = pa.BufferOutputStream()
+    _write_table(table, sink, compression, compression_level, row_group_size)
+    return sink.getvalue()
+
+
+def convert_csv_to_parquet(csv_path, parquet_path=None):
+    """Converts a raw IBOVDia CSV into a typed Parquet file. Returns the Parquet path"""
+    parquet_path = parquet_path or os.path.splitext(csv_path)[0] + ".parquet"
+    return write_parquet(parse_b3_csv(csv_path), parquet_path)
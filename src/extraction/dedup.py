@@ -0,0 +1,291 @@
+"""
+Deduplicação dos downloads brutos por hash de conteúdo e hash dos dados.
+
+A carteira teórica do IBOV só muda nos rebalanceamentos, então downloads
+consecutivos costumam trazer os mesmos dados. Para cada <INDEX>Dia_DD-MM-YY.csv
+são registrados, em <raw>/_snapshots.sqlite:
+
+    content_sha256   SHA-256 dos bytes baixados
+    data_sha256      SHA-256 da tabela tipada, ordenada e sem o título (que traz a data)
+
+Na conversão:
+
+  * mesmo conteúdo já registrado para o dia -> nada a fazer ("unchanged");
+  * mesmos dados do snapshot anterior -> o CSV baixado fica na partição (é o
+    caminho que os chamadores devolvem), mas no lugar do Parquet ela guarda
+    <INDEX>Dia_DD-MM-YY.ref.json, apontando para o Parquet do snapshot
+    original ("reference"). Sem Parquet novo não há upload nem evento S3, então
+    o Glue não roda. A descoberta de partições (src/transform/partitions.py)
+    resolve a referência;
+  * caso contrário a conversão segue normalmente ("new").
+
+Reescrever um dia que outros referenciam com dados diferentes primeiro
+materializa o Parquet antigo no primeiro desses dias e redireciona os demais.
+
+Uso:
+    python -m src.extraction.dedup          # registra os hashes das partições já existentes
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+
+import pyarrow as pa
+
+from config.settings import RAW_SNAPSHOTS_FILE
+from src.transform.partitions import REFERENCE_SUFFIX
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    idx TEXT NOT NULL,
+    date TEXT NOT NULL,
+    file TEXT NOT NULL,
+    content_sha256 TEXT NOT NULL,
+    data_sha256 TEXT NOT NULL,
+    ref_date TEXT,
+    recorded_at TEXT NOT NULL,
+    PRIMARY KEY (idx, date)
+)
+"""
+
+CANONICAL_CSV = re.compile(r"^(?P<index>[A-Z0-9]+)Dia_(?P<date>\d{2}-\d{2}-\d{2})\.csv$")
+SNAPSHOT_FIELDS = ("date", "file", "content_sha256", "data_sha256", "ref_date")
+STATUS_MESSAGES = {
+    "unchanged": "Same download already stored for this day",
+    "reference": "Same data as the previous snapshot",
+}
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def data_hash(table):
+    """SHA-256 of the typed rows in a canonical order, independent of the file's title line and layout"""
+    keys = [(name, "ascending") for name in table.column_names]
+    table = table.sort_by(keys).combine_chunks().replace_schema_metadata(None)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return hashlib.sha256(sink.getvalue()).hexdigest()
+
+
+class SnapshotStore:
+    """Content and data hashes of every raw partition of one raw directory"""
+
+    def __init__(self, raw_dir):
+        self.raw_dir = raw_dir
+        self.connection = sqlite3.connect(os.path.join(raw_dir, RAW_SNAPSHOTS_FILE), timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _fetch(self, query, params):
+        row = self.connection.execute(query, params).fetchone()
+        return dict(zip(SNAPSHOT_FIELDS, row)) if row else None
+
+    def get(self, index, day):
+        return self._fetch(
+            "SELECT date, file, content_sha256, data_sha256, ref_date FROM snapshots WHERE idx = ? AND date = ?",
+            (index, day.isoformat()),
+        )
+
+    def latest_before(self, index, day):
+        return self._fetch(
+            "SELECT date, file, content_sha256, data_sha256, ref_date FROM snapshots "
+            "WHERE idx = ? AND date < ? ORDER BY date DESC LIMIT 1",
+            (index, day.isoformat()),
+        )
+
+    def referencing(self, index, day):
+        """Dates whose partition is a reference to `day`'s Parquet"""
+        rows = self.connection.execute(
+            "SELECT date FROM snapshots WHERE idx = ? AND ref_date = ? ORDER BY date", (index, day.isoformat())
+        )
+        return [datetime.date.fromisoformat(d) for d, in rows]
+
+    def record(self, index, day, file, content_sha256, data_sha256, ref_date=None):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO snapshots "
+                "(idx, date, file, content_sha256, data_sha256, ref_date, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (index, day.isoformat(), file, content_sha256, data_sha256,
+                 ref_date.isoformat() if ref_date else None,
+                 datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")),
+            )
+
+
+class Snapshot:
+    """Outcome of `deduplicate`: status, the Parquet that holds the day, and (for "new") the parsed table"""
+
+    def __init__(self, status, day, index, parquet_path, content_sha256, data_sha256, table=None, raw_dir=None):
+        self.status = status
+        self.day = day
+        self.index = index
+        self.parquet_path = parquet_path
+        self.content_sha256 = content_sha256
+        self.data_sha256 = data_sha256
+        self.table = table
+        self.raw_dir = raw_dir
+
+    def commit(self):
+        """Records a "new" snapshot once its Parquet has been written"""
+        reference = _reference_path(os.path.dirname(self.parquet_path), self.index, self.day)
+        if os.path.exists(reference):
+            os.remove(reference)
+        with SnapshotStore(self.raw_dir) as store:
+            store.record(self.index, self.day, _relative(self.parquet_path, self.raw_dir),
+                         self.content_sha256, self.data_sha256)
+
+
+def _relative(path, raw_dir):
+    return os.path.relpath(path, raw_dir).replace(os.sep, "/")
+
+
+def _reference_path(date_directory, index, day):
+    return os.path.join(date_directory, f"{index}Dia_{day.strftime('%d-%m-%y')}{REFERENCE_SUFFIX}")
+
+
+def write_reference(date_directory, index, day, target_path, ref_date, content_sha256, data_sha256):
+    """Writes the .ref.json (atomically) pointing at `target_path`, relative to the partition"""
+    path = _reference_path(date_directory, index, day)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "target": os.path.relpath(target_path, date_directory).replace(os.sep, "/"),
+            "ref_date": ref_date.isoformat(),
+            "content_sha256": content_sha256,
+            "data_sha256": data_sha256,
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _remove_if_exists(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _detach_references(store, index, day, raw_dir):
+    """
+    Before `day`'s Parquet is overwritten, copies it into the first partition that
+    references it and points the remaining references there.
+    """
+    referrers = store.referencing(index, day)
+    if not referrers:
+        return
+    current = store.get(index, day)
+    source = os.path.join(raw_dir, current["file"])
+    heir = referrers[0]
+    heir_directory = os.path.join(raw_dir, f"date={heir.isoformat()}")
+    heir_path = os.path.join(heir_directory, f"{index}Dia_{heir.strftime('%d-%m-%y')}.parquet")
+    shutil.copyfile(source, heir_path + ".tmp")
+    os.replace(heir_path + ".tmp", heir_path)
+    _remove_if_exists(_reference_path(heir_directory, index, heir))
+    heir_snapshot = store.get(index, heir)
+    store.record(index, heir, _relative(heir_path, raw_dir), heir_snapshot["content_sha256"],
+                 heir_snapshot["data_sha256"])
+    for other in referrers[1:]:
+        snapshot = store.get(index, other)
+        other_directory = os.path.join(raw_dir, f"date={other.isoformat()}")
+        write_reference(other_directory, index, other, heir_path, heir,
+                        snapshot["content_sha256"], snapshot["data_sha256"])
+        store.record(index, other, _relative(heir_path, raw_dir), snapshot["content_sha256"],
+                     snapshot["data_sha256"], heir)
+
+
+def deduplicate(csv_path, parse):
+    """
+    Checks a freshly stored canonical CSV against the recorded snapshots. Returns a
+    Snapshot, or None for files that are not the canonical <INDEX>Dia_DD-MM-YY.csv.
+
+    `parse` turns the CSV bytes into a typed table (csv_converter.parse_b3_csv).
+    """
+    match = CANONICAL_CSV.match(os.path.basename(csv_path))
+    if not match:
+        return None
+    index = match.group("index")
+    day = datetime.datetime.strptime(match.group("date"), "%d-%m-%y").date()
+    date_directory = os.path.dirname(csv_path)
+    raw_dir = os.path.dirname(date_directory)
+    parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+    with open(csv_path, "rb") as f:
+        content = f.read()
+    content_sha256 = content_hash(content)
+
+    with SnapshotStore(raw_dir) as store:
+        current = store.get(index, day)
+        if current and current["content_sha256"] == content_sha256:
+            existing = os.path.join(raw_dir, current["file"])
+            if os.path.exists(existing):
+                return Snapshot("unchanged", day, index, existing, content_sha256, current["data_sha256"])
+
+        table = parse(content)
+        data_sha256 = data_hash(table)
+        if current and current["data_sha256"] == data_sha256 and os.path.exists(os.path.join(raw_dir, current["file"])):
+            # re-download of the same day with cosmetic differences only
+            store.record(index, day, current["file"], content_sha256, data_sha256,
+                         datetime.date.fromisoformat(current["ref_date"]) if current["ref_date"] else None)
+            return Snapshot("unchanged", day, index, os.path.join(raw_dir, current["file"]),
+                            content_sha256, data_sha256)
+
+        previous = store.latest_before(index, day)
+        target = os.path.join(raw_dir, previous["file"]) if previous else None
+        if previous and previous["data_sha256"] == data_sha256 and os.path.exists(target):
+            _detach_references(store, index, day, raw_dir)
+            ref_date = datetime.date.fromisoformat(previous["ref_date"] or previous["date"])
+            write_reference(date_directory, index, day, target, ref_date, content_sha256, data_sha256)
+            _remove_if_exists(parquet_path)
+            store.record(index, day, previous["file"], content_sha256, data_sha256, ref_date)
+            return Snapshot("reference", day, index, target, content_sha256, data_sha256)
+
+        _detach_references(store, index, day, raw_dir)
+    return Snapshot("new", day, index, parquet_path, content_sha256, data_sha256, table, raw_dir)
+
+
+def seed(raw_dir, index):
+    """Records hashes for partitions converted before deduplication existed (files are left as they are)"""
+    import pyarrow.parquet as pq
+    from src.transform.partitions import list_raw_partitions
+
+    recorded = 0
+    with SnapshotStore(raw_dir) as store:
+        for day, parquet_path in list_raw_partitions(raw_dir, index):
+            if store.get(index, day):
+                continue
+            csv_path = os.path.splitext(parquet_path)[0] + ".csv"
+            if not os.path.exists(csv_path):
+                continue
+            with open(csv_path, "rb") as f:
+                content_sha256 = content_hash(f.read())
+            store.record(index, day, _relative(parquet_path, raw_dir), content_sha256,
+                         data_hash(pq.read_table(parquet_path)))
+            recorded += 1
+    print(f"✅ Recorded hashes for {recorded} existing {index} partitions in {raw_dir}")
+    return recorded
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from config.settings import B3_DEFAULT_INDEX
+    from src.transform.partitions import raw_root
+
+    parser = argparse.ArgumentParser(description="Record content/data hashes of existing raw partitions")
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--index", default=B3_DEFAULT_INDEX)
+    args = parser.parse_args()
+    seed(args.raw_dir or raw_root(args.index), args.index)
@@ -0,0 +1,239 @@
+"""
+Detecção de conclusão de downloads do navegador.
+
+O Chrome grava o download em um arquivo parcial (`.crdownload`/`.tmp`) e o
+renomeia para o nome final quando termina. Em Linux o `DownloadWatcher` usa
+inotify (via ctypes, sem dependências extras) para perceber esse rename ou o
+fechamento do arquivo no instante em que acontece. Nas demais plataformas, ou se
+inotify não estiver disponível, cai para um polling curto no diretório.
+
+Uso:
+    with DownloadWatcher(temp_download_path) as watcher:
+        download_link.click()
+        downloaded_file = watcher.wait(max_wait=300)
+    print(watcher.metrics)
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+PARTIAL_SUFFIXES = ('.crdownload', '.tmp')
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class DownloadTimeoutError(TimeoutError):
+    """Nenhum download concluído dentro do tempo limite."""
+
+
+def _load_inotify():
+    """Returns the libc handle if inotify is usable on this platform, else None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def is_partial(path, partial_suffixes=PARTIAL_SUFFIXES):
+    return path.endswith(partial_suffixes)
+
+
+def pick_candidate(paths, prefer="IBOVDia"):
+    """Prioritizes files containing `prefer` (e.g. IBOVDia) among completed downloads"""
+    paths = sorted(paths)
+    preferred = [p for p in paths if prefer and prefer in os.path.basename(p)]
+    return (preferred or paths or [None])[0]
+
+
+class DownloadWatcher:
+    """
+    Observa um diretório de downloads e retorna o arquivo assim que ele é concluído.
+
+    Métricas disponíveis em `self.metrics` após `wait()`:
+        backend             "inotify" ou "polling"
+        time_to_first_byte  segundos entre start() e o primeiro byte gravado
+        time_to_complete    segundos entre start() e a conclusão do arquivo
+        size                tamanho final em bytes
+    """
+
+    def __init__(self, download_dir, existing_files=None, prefer="IBOVDia",
+                 partial_suffixes=PARTIAL_SUFFIXES, poll_interval=0.25, use_inotify=True):
+        self.download_dir = download_dir
+        self.prefer = prefer
+        self.partial_suffixes = partial_suffixes
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.existing_files = set(existing_files) if existing_files is not None else None
+        self.metrics = {}
+        self._fd = None
+        self._start_time = None
+        self._first_byte_time = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _list_files(self):
+        try:
+            return {entry.path for entry in os.scandir(self.download_dir) if entry.is_file()}
+        except FileNotFoundError:
+            return set()
+
+    def start(self):
+        """Registers the watch and snapshots existing files. Call right before triggering the download."""
+        if self.existing_files is None:
+            self.existing_files = self._list_files()
+
+        libc = _load_inotify() if self.use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                mask = IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+                if libc.inotify_add_watch(fd, os.fsencode(self.download_dir), mask) >= 0:
+                    self._fd = fd
+                else:
+                    os.close(fd)
+
+        self.metrics = {"backend": "inotify" if self._fd is not None else "polling"}
+        self._start_time = time.perf_counter()
+        self._first_byte_time = None
+        return self
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _mark_first_byte(self):
+        if self._first_byte_time is None:
+            self._first_byte_time = time.perf_counter()
+
+    def _finish(self, path):
+        now = time.perf_counter()
+        self._mark_first_byte()
+        size = os.path.getsize(path)
+        self.metrics.update({
+            "time_to_first_byte": round(self._first_byte_time - self._start_time, 4),
+            "time_to_complete": round(now - self._start_time, 4),
+            "size": size,
+        })
+        print(f"✅ Download complete! Final size: {size} bytes "
+              f"(TTFB {self.metrics['time_to_first_byte']:.2f}s, "
+              f"total {self.metrics['time_to_complete']:.2f}s, {self.metrics['backend']})")
+        return path
+
+    def _scan(self, last_sizes):
+        """
+        Polling check. A non-partial new file is complete when no partial file is
+        pending and its size did not change since the previous scan.
+        """
+        new_files = self._list_files() - self.existing_files
+        partial_files = [f for f in new_files if is_partial(f, self.partial_suffixes)]
+        completed_files = [f for f in new_files if not is_partial(f, self.partial_suffixes)]
+
+        sizes = {}
+        for path in new_files:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:
+                continue
+        if any(sizes.values()):
+            self._mark_first_byte()
+
+        candidate = pick_candidate([f for f in completed_files if sizes.get(f)], self.prefer)
+        if candidate and not partial_files and last_sizes.get(candidate) == sizes[candidate]:
+            return candidate, sizes
+        return None, sizes
+
+    def _read_events(self, timeout):
+        """Blocks up to `timeout` seconds and yields (mask, path) inotify events"""
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, mask, _, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            if name:
+                yield mask, os.path.join(self.download_dir, os.fsdecode(name))
+
+    def wait(self, max_wait=300):
+        """Waits until a new download is complete and returns its path"""
+        if self._start_time is None:
+            self.start()
+        deadline = self._start_time + max_wait
+
+        # The file may already be there (e.g. a very small download). A file found
+        # here is only accepted once a later scan sees the same size, so with inotify
+        # an idle wait also rescans: finished files produce no further events
+        last_sizes = {}
+        candidate, last_sizes = self._scan(last_sizes)
+        if candidate:
+            return self._finish(candidate)
+
+        completed = set()
+        while time.perf_counter() < deadline:
+            remaining = deadline - time.perf_counter()
+            if self._fd is None:
+                time.sleep(min(self.poll_interval, max(remaining, 0)))
+                candidate, last_sizes = self._scan(last_sizes)
+                if candidate:
+                    return self._finish(candidate)
+                continue
+
+            events = list(self._read_events(min(remaining, self.poll_interval)))
+            if not events:
+                candidate, last_sizes = self._scan(last_sizes)
+                if candidate:
+                    return self._finish(candidate)
+            for mask, path in events:
+                if path in self.existing_files:
+                    continue
+                if mask & (IN_MODIFY | IN_CLOSE_WRITE):
+                    self._mark_first_byte()
+                if is_partial(path, self.partial_suffixes):
+                    continue
+                # Chrome renames the partial file once the download is done;
+                # direct writers close the final file
+                if mask & (IN_MOVED_TO | IN_CLOSE_WRITE) and os.path.exists(path) and os.path.getsize(path) > 0:
+                    completed.add(path)
+            if completed:
+                return self._finish(pick_candidate(completed, self.prefer))
+
+        # Final check after timeout
+        candidate, _ = self._scan(last_sizes)
+        completed_files = [f for f in self._list_files() - self.existing_files
+                           if not is_partial(f, self.partial_suffixes)]
+        if candidate or completed_files:
+            candidate = candidate or pick_candidate(completed_files, self.prefer)
+            if os.path.getsize(candidate) > 0:
+                print(f"✅ File downloaded after timeout: {candidate}")
+                return self._finish(candidate)
+            raise Exception(f"Downloaded file is empty: {candidate}")
+        raise DownloadTimeoutError(f"Download timeout after {max_wait} seconds - No file downloaded")
@@ -0,0 +1,252 @@
+"""
+Cache persistente de ChromeDriver, compartilhado entre execuções e processos.
+
+Layout em DRIVER_CACHE_DIR:
+    manifest.json                              manifesto de milestones (com TTL)
+    index.json                                 {"<platform>/<chave>": {...}} -> driver instalado
+    .lock                                      trava entre processos concorrentes
+    <platform>/<major>/<versão>/<sha256[:16]>/  driver extraído (endereçado pelo conteúdo do zip)
+
+Um warm start (driver já no índice e presente em disco) não faz nenhuma
+requisição HTTP; o manifesto só é consultado em cache miss.
+"""
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+
+from config.settings import (
+    DRIVER_CACHE_DIR,
+    DRIVER_LOCK_TIMEOUT,
+    DRIVER_MANIFEST_TTL,
+    DRIVER_MANIFEST_URL,
+)
+
+CFT_DOWNLOAD_URL = "https://storage.googleapis.com/chrome-for-testing-public/{version}/{platform}/chromedriver-{platform}.zip"
+
+# Tempo (s) e modo ("warm"/"cold") da última chamada a get_chromedriver
+last_timing = {}
+
+
+def detect_platform():
+    """Returns (Chrome for Testing platform name, chromedriver binary name) for this machine"""
+    system = platform.system().lower()
+    machine = platform.machine().lower()
+    if system == "windows":
+        return ("win64" if machine.endswith("64") else "win32"), "chromedriver.exe"
+    if system == "darwin":
+        return ("mac-arm64" if machine == "arm64" else "mac-x64"), "chromedriver"
+    return "linux64", "chromedriver"
+
+
+@contextmanager
+def cache_lock(cache_dir=DRIVER_CACHE_DIR, timeout=DRIVER_LOCK_TIMEOUT):
+    """Exclusive lock file shared by concurrent scraper runs (stale locks are broken after `timeout`)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    lock_path = os.path.join(cache_dir, ".lock")
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    print("⚠️ Removing stale driver cache lock")
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Could not acquire driver cache lock: {lock_path}")
+            time.sleep(0.2)
+    try:
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    """Atomic JSON write (temp file + os.replace)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _index_key(platform_name, version):
+    return f"{platform_name}/{version}"
+
+
+def lookup(chrome_version, cache_dir=DRIVER_CACHE_DIR, platform_name=None):
+    """
+    Returns the cached driver path for a Chrome version without touching the network,
+    matching the exact full version first and then the major version.
+    """
+    platform_name = platform_name or detect_platform()[0]
+    index = _read_json(os.path.join(cache_dir, "index.json")) or {}
+    major_version = str(chrome_version).split(".")[0]
+    for key in (_index_key(platform_name, chrome_version), _index_key(platform_name, major_version)):
+        entry = index.get(key)
+        if entry and os.path.isfile(os.path.join(cache_dir, entry["path"])):
+            return os.path.join(cache_dir, entry["path"])
+    return None
+
+
+def load_manifest(cache_dir=DRIVER_CACHE_DIR, ttl=DRIVER_MANIFEST_TTL, session=None):
+    """Returns the milestone manifest, fetching it only when the cached copy is older than `ttl`"""
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    cached = _read_json(manifest_path)
+    if cached and time.time() - cached.get("fetched_at", 0) < ttl:
+        return cached["data"]
+
+    import requests
+    print("🔍 Fetching Chrome for Testing milestone manifest...")
+    response = (session or requests).get(DRIVER_MANIFEST_URL, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_json(manifest_path, {"fetched_at": time.time(), "data": data})
+    return data
+
+
+def resolve_download(chrome_version, manifest, platform_name):
+    """Finds the (driver version, download url) for the Chrome major version in the manifest"""
+    major_version = str(chrome_version).split(".")[0]
+    if major_version not in manifest.get("milestones", {}):
+        raise ValueError(f"No ChromeDriver found for major version {major_version}")
+    version_info = manifest["milestones"][major_version]
+    for download in version_info["downloads"]["chromedriver"]:
+        if download["platform"] == platform_name:
+            return version_info["version"], download["url"]
+    raise ValueError(f"No {platform_name} download found for ChromeDriver {version_info['version']}")
+
+
+def install_from_zip(content, driver_version, chrome_version=None, cache_dir=DRIVER_CACHE_DIR, platform_name=None):
+    """
+    Extracts the chromedriver binary from zip bytes into its content-addressed
+    directory and registers it in the index. Must be called with the lock held.
+    """
+    platform_name = platform_name or detect_platform()[0]
+    binary_name = "chromedriver.exe" if platform_name.startswith("win") else "chromedriver"
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    major_version = str(driver_version).split(".")[0]
+    relative_dir = os.path.join(platform_name, major_version, str(driver_version), digest)
+    target_dir = os.path.join(cache_dir, relative_dir)
+    target_path = os.path.join(target_dir, binary_name)
+
+    if not os.path.isfile(target_path):
+        with zipfile.ZipFile(io.BytesIO(content)) as zip_ref:
+            members = [m for m in zip_ref.namelist() if os.path.basename(m) == binary_name]
+            if not members:
+                raise FileNotFoundError(f"{binary_name} not found in downloaded zip")
+            # Extract next to the final location, then rename in one step
+            staging_dir = tempfile.mkdtemp(dir=cache_dir, prefix=".staging-")
+            try:
+                staged_path = os.path.join(staging_dir, binary_name)
+                with zip_ref.open(members[0]) as source, open(staged_path, "wb") as target:
+                    shutil.copyfileobj(source, target)
+                if not binary_name.endswith(".exe"):
+                    os.chmod(staged_path, os.stat(staged_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+                os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+                os.replace(staging_dir, target_dir)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+    index_path = os.path.join(cache_dir, "index.json")
+    index = _read_json(index_path) or {}
+    entry = {
+        "path": os.path.join(relative_dir, binary_name),
+        "driver_version": str(driver_version),
+        "sha256": digest,
+        "installed_at": time.time(),
+    }
+    index[_index_key(platform_name, driver_version)] = entry
+    index[_index_key(platform_name, major_version)] = entry
+    if chrome_version:
+        index[_index_key(platform_name, chrome_version)] = entry
+    _write_json(index_path, index)
+    return target_path
+
+
+def install_from_url(url, driver_version, chrome_version=None, cache_dir=DRIVER_CACHE_DIR,
+                     platform_name=None, session=None):
+    """Downloads a chromedriver zip and installs it into the cache (lock must be held)"""
+    import requests
+    print(f"⬇️ Downloading ChromeDriver from: {url}")
+    response = (session or requests).get(url, timeout=120)
+    response.raise_for_status()
+    return install_from_zip(response.content, driver_version, chrome_version, cache_dir, platform_name)
+
+
+def get_chromedriver(chrome_version, cache_dir=DRIVER_CACHE_DIR, platform_name=None, session=None):
+    """
+    Returns a chromedriver path compatible with `chrome_version`.
+
+    Warm start: served from index.json with no network access.
+    Cold start: manifest (respecting TTL) + zip download, under the cache lock.
+    """
+    start_time = time.perf_counter()
+    platform_name = platform_name or detect_platform()[0]
+
+    driver_path = lookup(chrome_version, cache_dir, platform_name)
+    mode = "warm"
+    if not driver_path:
+        with cache_lock(cache_dir):
+            # Another process may have installed it while we waited for the lock
+            driver_path = lookup(chrome_version, cache_dir, platform_name)
+            if not driver_path:
+                mode = "cold"
+                manifest = load_manifest(cache_dir, session=session)
+                driver_version, url = resolve_download(chrome_version, manifest, platform_name)
+                print(f"✅ Found compatible ChromeDriver version: {driver_version}")
+                driver_path = install_from_url(url, driver_version, chrome_version, cache_dir,
+                                               platform_name, session=session)
+
+    last_timing.clear()
+    last_timing.update({"mode": mode, "seconds": round(time.perf_counter() - start_time, 4)})
+    print(f"✅ ChromeDriver ({mode} start, {last_timing['seconds']:.3f}s): {driver_path}")
+    return driver_path
+
+
+def benchmark(chrome_version, cache_dir=None):
+    """Measures cold-start vs warm-start time using a throwaway cache directory"""
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="driver-cache-bench-")
+    get_chromedriver(chrome_version, cache_dir)
+    cold = dict(last_timing)
+    get_chromedriver(chrome_version, cache_dir)
+    warm = dict(last_timing)
+    print(f"📊 Cold start: {cold['seconds']:.3f}s | Warm start: {warm['seconds']:.4f}s")
+    return {"cold": cold["seconds"], "warm": warm["seconds"], "cache_dir": cache_dir}
+
+
+if __name__ == "__main__":
+    # Uso: python -m src.extraction.driver_cache <chrome_version> [--benchmark]
+    if len(sys.argv) < 2:
+        print("Usage: python -m src.extraction.driver_cache <chrome_version> [--benchmark]")
+        sys.exit(1)
+    if "--benchmark" in sys.argv:
+        benchmark(sys.argv[1])
+    else:
+        get_chromedriver(sys.argv[1])
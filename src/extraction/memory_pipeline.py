@@ -0,0 +1,113 @@
+"""
+Extração em memória: download -> parse -> Parquet -> sinks, sem passar pelo disco.
+
+No caminho padrão o CSV é gravado em data/raw, relido para o parse, o Parquet
+é gravado ao lado e os dois são lidos de novo pelo upload. Aqui os bytes
+baixados vão direto para o parser (csv_converter.parse_b3_csv aceita bytes), o
+Parquet é serializado num buffer, e a partição (CSV opcional + Parquet canônico
+por último) é entregue a cada sink de src/ingestion/sinks.py numa única
+passada. Os tamanhos vêm dos buffers, sem os.path.getsize. Os sinks padrão
+gravam na raiz do índice (data/raw/index=<INDEX> e raw/index=<INDEX>/ fora do
+índice padrão).
+
+A deduplicação por hash (src/extraction/dedup.py) continua no caminho em disco.
+Aqui, objetos idênticos aos já existentes no S3 são pulados pelo ETag.
+
+Uso:
+    python -m src.extraction.memory_pipeline                       # RAW_SINKS de config/settings.py
+    python -m src.extraction.memory_pipeline --sinks local fake_s3 --no-csv
+"""
+import argparse
+import time
+
+from config.settings import (
+    B3_API_BASE_URL,
+    B3_DEFAULT_INDEX,
+    B3_DEFAULT_SEGMENT,
+    RAW_SINK_KEEP_CSV,
+    RAW_SINKS,
+    S3_PREFIX_RAW,
+)
+from src.monitoring import metrics
+
+
+def ingest(content, file_basename, sinks, keep_csv=RAW_SINK_KEEP_CSV, iso_date=None):
+    """
+    Parses downloaded CSV bytes and writes the partition to every sink.
+    Returns {"date", "rows", "csv_bytes", "parquet_bytes", "written": {sink name: paths/keys}}
+    """
+    import datetime
+
+    from src.extraction import csv_converter
+    from src.extraction.b3_scraper import extract_date_from_filename
+
+    day = datetime.date.fromisoformat(iso_date or extract_date_from_filename(file_basename))
+    with metrics.span("conversion", file=file_basename, mode="memory") as span:
+        with metrics.span("csv_parse"):
+            table = csv_converter.parse_b3_csv(content)
+        with metrics.span("parquet_write"):
+            parquet = csv_converter.parquet_bytes(table)
+        span.set(rows=table.num_rows)
+    metrics.observe("csv_bytes", len(content), metrics.BYTES_BUCKETS)
+    metrics.observe("parquet_bytes", parquet.size, metrics.BYTES_BUCKETS)
+    metrics.increment("conversions_total", status="ok")
+
+    files = [(file_basename, content)] if keep_csv else []
+    files.append((file_basename.replace(".csv", ".parquet"), parquet))
+    written = {}
+    for sink in sinks:
+        with metrics.span("sink_write", sink=sink.name):
+            written[sink.name] = sink.write_partition(day, files)
+    print(f"💾 {file_basename}: {table.num_rows} rows, CSV={len(content) / 1024:.1f} KB → "
+          f"Parquet={parquet.size / 1024:.1f} KB, written to {', '.join(written) or 'no sinks'}")
+    return {
+        "date": day,
+        "rows": table.num_rows,
+        "csv_bytes": len(content),
+        "parquet_bytes": parquet.size,
+        "written": written,
+    }
+
+
+def index_sinks(names, index=B3_DEFAULT_INDEX):
+    """Sinks writing under the index's raw root (data/raw, or data/raw/index=<INDEX> and raw/index=<INDEX>/)"""
+    from src.ingestion.sinks import build_sinks
+    from src.transform.partitions import index_raw_prefix, raw_root
+    return build_sinks(names, raw_root(index), prefix=index_raw_prefix(S3_PREFIX_RAW, index))
+
+
+def download_to_sinks(sinks=None, keep_csv=RAW_SINK_KEEP_CSV, index=B3_DEFAULT_INDEX, segment=B3_DEFAULT_SEGMENT,
+                      base_url=B3_API_BASE_URL, session=None):
+    """Fetches the day's portfolio through the direct API and ingests it. Returns the ingest result or None"""
+    sinks = index_sinks(RAW_SINKS, index) if sinks is None else sinks
+    print(f"🌐 Fetching {index} portfolio directly from {base_url} (in-memory pipeline)...")
+    started = time.time()
+    try:
+        with metrics.span("direct_fetch", index=index):
+            from src.extraction.b3_direct import fetch_portfolio_csv
+            file_basename, content = fetch_portfolio_csv(index, segment, base_url=base_url, session=session)
+    except Exception as e:
+        metrics.increment("downloads_total", mode="memory", status="error")
+        print(f"❌ Direct download failed: {str(e)}")
+        return None
+    metrics.increment("downloads_total", mode="memory", status="ok")
+    metrics.increment("downloaded_bytes_total", len(content), mode="memory")
+    print(f"✅ Download complete in {time.time() - started:.2f}s: {file_basename} ({len(content)} bytes)")
+    try:
+        return ingest(content, file_basename, sinks, keep_csv)
+    except Exception as e:
+        metrics.increment("conversions_total", status="error")
+        print(f"❌ In-memory conversion failed: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the day's portfolio and write it to the sinks in memory")
+    parser.add_argument("--sinks", nargs="+", default=RAW_SINKS, choices=["local", "s3", "fake_s3"])
+    parser.add_argument("--no-csv", action="store_true", help="Write only the Parquet")
+    parser.add_argument("--index", default=B3_DEFAULT_INDEX)
+    parser.add_argument("--base-url", default=B3_API_BASE_URL)
+    args = parser.parse_args()
+    result = download_to_sinks(index_sinks(args.sinks, args.index), not args.no_csv, args.index, base_url=args.base_url)
+    if result is None:
+        raise SystemExit(1)
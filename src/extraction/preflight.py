@@ -0,0 +1,154 @@
+"""
+Verificação explícita das dependências da extração (antes feita na importação do b3_scraper).
+
+Importa numpy/pandas/pyarrow/selenium/requests em um subprocesso, então uma
+instalação quebrada (ex.: "numpy.dtype size changed") não derruba o processo
+que chamou. O resultado é guardado em PREFLIGHT_CACHE_PATH, indexado pelo
+interpretador e pelas versões instaladas. As versões vêm dos metadados, sem
+importar nada. Enquanto nada mudar, a verificação custa só a leitura do cache.
+
+A reinstalação forçada das versões fixadas só acontece com --fix.
+
+Uso:
+    python -m src.extraction.preflight            # verifica (usa o cache)
+    python -m src.extraction.preflight --refresh  # ignora o cache
+    python -m src.extraction.preflight --fix      # reinstala numpy/pandas se incompatíveis
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from importlib import metadata
+
+from config.settings import PREFLIGHT_CACHE_PATH, PROJECT_ROOT
+
+# Distribution name -> module imported by the check
+REQUIRED_PACKAGES = {
+    "numpy": "numpy",
+    "pandas": "pandas",
+    "pyarrow": "pyarrow",
+    "requests": "requests",
+    "selenium": "selenium",
+}
+# Pins reinstalled by --fix when numpy and pandas are binary-incompatible
+PINNED_VERSIONS = {"numpy": "1.23.5", "pandas": "1.5.3"}
+
+_CHECK_SCRIPT = """
+import importlib, json, sys
+results = {}
+for module in sys.argv[1:]:
+    try:
+        importlib.import_module(module)
+        results[module] = None
+    except Exception as e:
+        results[module] = f"{type(e).__name__}: {e}"
+print(json.dumps(results))
+"""
+
+_session_result = None
+
+
+def installed_versions():
+    """{distribution: version or None}, read from package metadata (nothing is imported)"""
+    versions = {}
+    for distribution in REQUIRED_PACKAGES:
+        try:
+            versions[distribution] = metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            versions[distribution] = None
+    return versions
+
+
+def environment_key():
+    return json.dumps({"python": sys.executable, "version": sys.version, "packages": installed_versions()},
+                      sort_keys=True)
+
+
+def _cache_path():
+    return os.path.join(PROJECT_ROOT, PREFLIGHT_CACHE_PATH)
+
+
+def _load_cache(key):
+    try:
+        with open(_cache_path(), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return cached.get("result") if cached.get("key") == key else None
+
+
+def _save_cache(key, result):
+    path = _cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "result": result}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_import_check(modules=None):
+    """{module: None if it imports cleanly, else the error}, imported in a fresh interpreter"""
+    modules = list(modules or REQUIRED_PACKAGES.values())
+    completed = subprocess.run(
+        [sys.executable, "-c", _CHECK_SCRIPT, *modules],
+        capture_output=True, text=True, cwd=PROJECT_ROOT,
+    )
+    if completed.returncode != 0:
+        return {module: completed.stderr.strip() or "import check failed" for module in modules}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def check_dependencies(refresh=False):
+    """
+    Returns {"ok": bool, "versions": {...}, "errors": {module: error}}.
+    Cached per interpreter and installed versions; `refresh` forces a new check.
+    """
+    global _session_result
+    if _session_result is not None and not refresh:
+        return _session_result
+    key = environment_key()
+    result = None if refresh else _load_cache(key)
+    if result is None:
+        errors = {module: error for module, error in run_import_check().items() if error}
+        result = {"ok": not errors, "versions": installed_versions(), "errors": errors}
+        _save_cache(key, result)
+    _session_result = result
+    return result
+
+
+def needs_numpy_fix(result):
+    return any("numpy.dtype size changed" in error for error in result["errors"].values())
+
+
+def fix_dependencies():
+    """Reinstalls the pinned numpy/pandas versions (the fix that used to run on import)"""
+    for distribution, version in PINNED_VERSIONS.items():
+        subprocess.run([sys.executable, "-m", "pip", "install", "--force-reinstall", f"{distribution}=={version}"],
+                       check=True)
+
+
+def report(result):
+    versions = ", ".join(f"{name} {version or 'missing'}" for name, version in result["versions"].items())
+    if result["ok"]:
+        print(f"✅ Dependencies loaded successfully: {versions}")
+    else:
+        print(f"❌ Dependency check failed ({versions})")
+        for module, error in result["errors"].items():
+            print(f"   {module}: {error}")
+        if needs_numpy_fix(result):
+            print("⚠️ Detected NumPy/pandas version incompatibility. Run: python -m src.extraction.preflight --fix")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the extraction dependencies")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the cached result")
+    parser.add_argument("--fix", action="store_true", help="Reinstall pinned numpy/pandas if they are incompatible")
+    args = parser.parse_args()
+    result = check_dependencies(refresh=args.refresh)
+    report(result)
+    if not result["ok"] and args.fix and needs_numpy_fix(result):
+        fix_dependencies()
+        result = check_dependencies(refresh=True)
+        report(result)
+    sys.exit(0 if result["ok"] else 1)
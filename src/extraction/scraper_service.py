@@ -0,0 +1,224 @@
+"""
+Serviço de scraping com pool de sessões de navegador reaproveitáveis.
+
+Cada sessão mantém um `webdriver.Chrome` aberto e um diretório de download
+exclusivo (data/raw/temp/session-N), de forma que vários jobs (índice, segmento)
+rodem em paralelo sem pagar a inicialização do Chrome a cada arquivo.
+
+Os arquivos do índice padrão vão para data/raw/date=YYYY-MM-DD/; os dos demais
+índices para data/raw/index=<INDEX>/date=YYYY-MM-DD/ (ver
+`src.transform.partitions.index_raw_root`), fora das partições do IBOV.
+
+Uso:
+    with ScraperService(pool_size=3) as service:
+        results = service.run([("IBOV", "setor"), ("IBOV", "codigo"), ("SMLL", "setor")])
+
+Ou pela linha de comando:
+    python -m src.extraction.scraper_service --pool-size 3 IBOV:setor SMLL:setor IDIV:codigo
+"""
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import (
+    B3_DEFAULT_SEGMENT_VIEW,
+    B3_INDEXES,
+    B3_SEGMENT_OPTIONS,
+    SCRAPER_POOL_SIZE,
+    SCRAPER_SESSION_MAX_JOBS,
+)
+from src.extraction import b3_scraper
+from src.transform.partitions import index_raw_root
+
+
+def segment_filename(file_basename, segment_view):
+    """
+    Keeps the browser name (IBOVDia_DD-MM-YY.csv) for the default segment view and
+    appends the view otherwise (IBOVDia_DD-MM-YY_codigo.csv), so views of the same
+    index and day do not overwrite each other inside date=YYYY-MM-DD/.
+    """
+    if segment_view == B3_DEFAULT_SEGMENT_VIEW:
+        return file_basename
+    stem, extension = os.path.splitext(file_basename)
+    return f"{stem}_{segment_view}{extension}"
+
+
+class BrowserSession:
+    """Um WebDriver de vida longa com diretório de download próprio"""
+
+    def __init__(self, session_id, download_dir):
+        self.session_id = session_id
+        self.download_dir = download_dir
+        self.jobs_served = 0
+        os.makedirs(download_dir, exist_ok=True)
+        started = time.perf_counter()
+        self.driver = b3_scraper.create_webdriver(download_dir)
+        self.startup_seconds = time.perf_counter() - started
+
+    def download(self, index, segment_view):
+        segment_option = B3_SEGMENT_OPTIONS[segment_view]
+        downloaded_file = b3_scraper.download_portfolio_with_driver(
+            self.driver, self.download_dir, index=index, segment_option=segment_option
+        )
+        self.jobs_served += 1
+        target = os.path.join(self.download_dir, segment_filename(os.path.basename(downloaded_file), segment_view))
+        if target != downloaded_file:
+            os.replace(downloaded_file, target)
+        return target
+
+    def close(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"⚠️ Error closing session {self.session_id}: {e}")
+
+
+class SessionPool:
+    """
+    Pool de até `size` sessões. Sessões são criadas sob demanda, devolvidas ao
+    pool após cada job e recicladas depois de `max_jobs` jobs ou de um erro.
+    """
+
+    def __init__(self, size=SCRAPER_POOL_SIZE, base_dir=None, max_jobs=SCRAPER_SESSION_MAX_JOBS):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.base_dir = base_dir or os.path.join(b3_scraper.get_base_download_path(), "temp")
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._free_slots = list(range(size))
+        self.startup_seconds = []
+
+    def acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                slot = self._free_slots.pop(0) if self._free_slots else None
+            if slot is not None:
+                break
+            # Every slot is busy: wait for a session to come back (or a slot to be freed)
+            try:
+                return self._idle.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        try:
+            session = BrowserSession(slot, os.path.join(self.base_dir, f"session-{slot}"))
+        except Exception:
+            with self._lock:
+                self._free_slots.append(slot)
+            raise
+        with self._lock:
+            self.startup_seconds.append(session.startup_seconds)
+        print(f"🧩 Browser session {slot} started in {session.startup_seconds:.1f}s")
+        return session
+
+    def release(self, session, discard=False):
+        if discard or session.jobs_served >= self.max_jobs:
+            session.close()
+            with self._lock:
+                self._free_slots.append(session.session_id)
+            return
+        self._idle.put(session)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class ScraperService:
+    """Executa jobs (índice, segmento) em paralelo sobre um SessionPool"""
+
+    def __init__(self, pool_size=SCRAPER_POOL_SIZE, base_download_path=None, retries=1):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.base_download_path = base_download_path or b3_scraper.get_base_download_path()
+        self.pool = SessionPool(pool_size, os.path.join(self.base_download_path, "temp"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def _run_job(self, job):
+        index, segment_view = job
+        started = time.perf_counter()
+        result = {"index": index, "segment": segment_view, "csv_path": None, "parquet_path": None, "error": None}
+        for attempt in range(self.retries + 1):
+            try:
+                session = self.pool.acquire()
+            except Exception as e:
+                print(f"❌ Could not start a browser session for {index}/{segment_view}: {e}")
+                result["error"] = str(e)
+                continue
+            try:
+                downloaded_file = session.download(index, segment_view)
+            except Exception as e:
+                # A broken browser is not reused; the retry gets a fresh session
+                print(f"❌ {index}/{segment_view} failed on session {session.session_id} (attempt {attempt+1}): {e}")
+                result["error"] = str(e)
+                self.pool.release(session, discard=True)
+                continue
+            self.pool.release(session)
+            raw_dir = index_raw_root(self.base_download_path, index)
+            result["csv_path"] = b3_scraper.store_raw_file(downloaded_file, raw_dir)
+            result["parquet_path"] = b3_scraper.convert_csv_to_parquet(result["csv_path"])
+            result["error"] = None
+            break
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    def run(self, jobs):
+        """Runs all (index, segment_view) jobs and returns one result dict per job, in order"""
+        jobs = list(jobs)
+        for _, segment_view in jobs:
+            if segment_view not in B3_SEGMENT_OPTIONS:
+                raise ValueError(f"Unknown segment view: {segment_view}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            results = list(executor.map(self._run_job, jobs))
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(1 for r in results if r["csv_path"])
+        files_per_minute = succeeded / elapsed * 60 if elapsed else 0.0
+        print(f"📊 {succeeded}/{len(jobs)} files in {elapsed:.1f}s with {self.pool_size} sessions "
+              f"({files_per_minute:.1f} files/min, {len(self.pool.startup_seconds)} browser starts)")
+        return results
+
+
+def parse_jobs(args):
+    """Parses INDEX[:segment] arguments (default: every configured index with the default view)"""
+    if not args:
+        return [(index, B3_DEFAULT_SEGMENT_VIEW) for index in B3_INDEXES]
+    jobs = []
+    for arg in args:
+        index, _, segment_view = arg.partition(":")
+        jobs.append((index.upper(), segment_view or B3_DEFAULT_SEGMENT_VIEW))
+    return jobs
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    pool_size = SCRAPER_POOL_SIZE
+    if "--pool-size" in argv:
+        position = argv.index("--pool-size")
+        pool_size = int(argv[position + 1])
+        del argv[position:position + 2]
+
+    with ScraperService(pool_size=pool_size) as service:
+        results = service.run(parse_jobs(argv))
+    for result in results:
+        status = "✅" if result["csv_path"] else "❌"
+        print(f"{status} {result['index']}/{result['segment']}: {result['csv_path'] or result['error']}")
@@ -0,0 +1,76 @@
+"""
+Calendário de pregões da B3.
+
+Feriados nacionais (fixos e móveis, derivados da Páscoa), véspera de Natal e
+último dia útil do ano (sem pregão), e feriados de São Paulo que fechavam a
+bolsa até 2021 (25/01, 09/07, 20/11). A partir de 2024 o 20/11 é feriado
+nacional. Datas extras podem ser adicionadas em B3_EXTRA_HOLIDAYS.
+"""
+import datetime
+from functools import lru_cache
+
+from config.settings import B3_EXTRA_HOLIDAYS
+
+FIXED_HOLIDAYS = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 24), (12, 25)]
+SAO_PAULO_HOLIDAYS = [(1, 25), (7, 9), (11, 20)]  # B3 closed on these until 2021
+LAST_SAO_PAULO_HOLIDAY_YEAR = 2021
+FIRST_NATIONAL_BLACK_CONSCIOUSNESS_YEAR = 2024
+
+
+def easter(year):
+    """Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+@lru_cache(maxsize=None)
+def holidays(year):
+    """Set of dates without trading session in `year`"""
+    days = {datetime.date(year, month, day) for month, day in FIXED_HOLIDAYS}
+    if year <= LAST_SAO_PAULO_HOLIDAY_YEAR:
+        days.update(datetime.date(year, month, day) for month, day in SAO_PAULO_HOLIDAYS)
+    if year >= FIRST_NATIONAL_BLACK_CONSCIOUSNESS_YEAR:
+        days.add(datetime.date(year, 11, 20))
+
+    easter_day = easter(year)
+    for offset in (-48, -47, -2, 60):  # Carnaval (seg/ter), Sexta-feira Santa, Corpus Christi
+        days.add(easter_day + datetime.timedelta(days=offset))
+
+    # Último dia útil do ano não tem pregão
+    last_day = datetime.date(year, 12, 31)
+    while last_day.weekday() >= 5 or last_day in days:
+        last_day -= datetime.timedelta(days=1)
+    days.add(last_day)
+
+    days.update(datetime.date.fromisoformat(d) for d in B3_EXTRA_HOLIDAYS if d.startswith(str(year)))
+    return frozenset(days)
+
+
+def is_trading_day(day):
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def trading_days(start, end):
+    """Trading days between start and end (inclusive), in order"""
+    day = start
+    one_day = datetime.timedelta(days=1)
+    while day <= end:
+        if is_trading_day(day):
+            yield day
+        day += one_day
+
+
+def previous_trading_day(day):
+    day -= datetime.timedelta(days=1)
+    while not is_trading_day(day):
+        day -= datetime.timedelta(days=1)
+    return day
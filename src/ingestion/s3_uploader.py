@@ -0,0 +1,289 @@
+"""
+Upload das partições brutas locais (data/raw/date=*) para o S3.
+
+Espelha data/raw em s3://S3_BUCKET_RAW/S3_PREFIX_RAW mantendo o layout
+date=YYYY-MM-DD/<arquivo>. Partições são enviadas em paralelo e arquivos
+grandes usam multipart. Objetos cujo ETag remoto já bate com o MD5 local
+(ou com o ETag multipart calculado com o mesmo tamanho de parte) são pulados.
+Por isso, reexecutar o upload só envia o que mudou.
+
+Ordem dentro de cada partição: os demais arquivos (CSV, visões por segmento)
+são enviados antes e o Parquet canônico <INDEX>Dia_DD-MM-YY.parquet por
+último. Com a notificação do bucket filtrada pelo sufixo `.parquet`, o
+`lambda_handler` dispara uma vez por partição e encontra a partição completa.
+Se nada mudou na partição, nada é escrito e a Lambda não dispara.
+
+Outros índices (--index SMLL) espelham a sua raiz data/raw/index=<INDEX> em
+S3_PREFIX_RAW + index=<INDEX>/, fora das partições do índice padrão.
+
+O backend é plugável: `Boto3Backend` fala com o S3 e `LocalS3Backend` grava em
+um diretório (bucket/key) com os mesmos ETags. O backend local serve para
+desenvolvimento e benchmarks offline.
+
+Uso:
+    python -m src.ingestion.s3_uploader [--start 2024-01-01] [--end 2024-12-31] [--workers 8]
+    python -m src.ingestion.s3_uploader --local-root /tmp/fake-s3   # sem AWS
+"""
+import argparse
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config.settings import (
+    AWS_REGION,
+    B3_DEFAULT_INDEX,
+    S3_BUCKET_RAW,
+    S3_MULTIPART_CHUNKSIZE,
+    S3_MULTIPART_CONCURRENCY,
+    S3_MULTIPART_THRESHOLD,
+    S3_PREFIX_RAW,
+    S3_UPLOAD_MAX_WORKERS,
+)
+from src.transform.partitions import REFERENCE_SUFFIX, index_raw_prefix, partition_date, raw_file_pattern, raw_root
+
+
+def bytes_etag(data, threshold=S3_MULTIPART_THRESHOLD, chunk_size=S3_MULTIPART_CHUNKSIZE):
+    """compute_etag for an in-memory object"""
+    view = memoryview(data)
+    if len(view) < threshold:
+        return hashlib.md5(view).hexdigest()
+    part_digests = [hashlib.md5(view[i:i + chunk_size]).digest() for i in range(0, len(view), chunk_size)]
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+def compute_etag(path, threshold=S3_MULTIPART_THRESHOLD, chunk_size=S3_MULTIPART_CHUNKSIZE):
+    """
+    ETag S3 would report for `path` uploaded with this threshold/part size:
+    plain MD5 below the threshold, md5(concatenated part MD5s)-<parts> above it.
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if size < threshold:
+            digest = hashlib.md5()
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
+        part_digests = [hashlib.md5(chunk).digest() for chunk in iter(lambda: f.read(chunk_size), b"")]
+    return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+class Boto3Backend:
+    """S3 through boto3; multipart above S3_MULTIPART_THRESHOLD via the managed transfer"""
+
+    def __init__(self, client=None, region=AWS_REGION, threshold=S3_MULTIPART_THRESHOLD,
+                 chunk_size=S3_MULTIPART_CHUNKSIZE, concurrency=S3_MULTIPART_CONCURRENCY):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        self.client = client or boto3.client("s3", region_name=region)
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.transfer_config = TransferConfig(
+            multipart_threshold=threshold,
+            multipart_chunksize=chunk_size,
+            max_concurrency=concurrency,
+        )
+
+    def list_etags(self, bucket, prefix):
+        """{key: etag} for every object under prefix (one paginated listing instead of a HEAD per file)"""
+        etags = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                etags[obj["Key"]] = obj["ETag"].strip('"')
+        return etags
+
+    def upload(self, path, bucket, key):
+        self.client.upload_file(path, bucket, key, Config=self.transfer_config)
+
+    def put(self, data, bucket, key):
+        """Uploads an in-memory object (multipart above the threshold, like upload)"""
+        self.client.upload_fileobj(io.BytesIO(data), bucket, key, Config=self.transfer_config)
+
+
+class LocalS3Backend:
+    """
+    Filesystem stand-in for S3: objects live in root/<bucket>/<key> and their
+    ETags in root/.etags/<bucket>/<key>. `latency` adds a fixed delay per request
+    to mimic network round trips. `puts` keeps the order in which keys were written.
+    """
+
+    def __init__(self, root, latency=0.0, threshold=S3_MULTIPART_THRESHOLD, chunk_size=S3_MULTIPART_CHUNKSIZE):
+        self.root = root
+        self.latency = latency
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.puts = []
+        self._lock = threading.Lock()
+
+    def _object_path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split("/"))
+
+    def _etag_path(self, bucket, key):
+        return os.path.join(self.root, ".etags", bucket, *key.split("/"))
+
+    def list_etags(self, bucket, prefix):
+        if self.latency:
+            time.sleep(self.latency)
+        etags = {}
+        etag_root = os.path.join(self.root, ".etags", bucket)
+        # only walk the directory the prefix points into (e.g. raw/date=2024-01-02/)
+        start = os.path.join(etag_root, *prefix.split("/")[:-1])
+        for directory, _, names in os.walk(start):
+            for name in names:
+                key = os.path.relpath(os.path.join(directory, name), etag_root).replace(os.sep, "/")
+                if key.startswith(prefix):
+                    with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+                        etags[key] = f.read().strip()
+        return etags
+
+    def _write_atomic(self, target, write):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{uuid.uuid4().hex[:8]}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, target)
+
+    def upload(self, path, bucket, key):
+        etag = compute_etag(path, self.threshold, self.chunk_size)
+        self._store(os.path.getsize(path), etag, bucket, key, lambda tmp: shutil.copyfile(path, tmp))
+
+    def put(self, data, bucket, key):
+        def write_object(tmp):
+            with open(tmp, "wb") as f:
+                f.write(data)
+
+        self._store(len(data), bytes_etag(data, self.threshold, self.chunk_size), bucket, key, write_object)
+
+    def _store(self, size, etag, bucket, key, write_object):
+        parts = 1 if size < self.threshold else -(-size // self.chunk_size)
+        if self.latency:
+            time.sleep(self.latency * parts)
+        self._write_atomic(self._object_path(bucket, key), write_object)
+
+        def write_etag(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(etag)
+
+        self._write_atomic(self._etag_path(bucket, key), write_etag)
+        with self._lock:
+            self.puts.append(key)
+
+
+def local_partitions(raw_dir, start=None, end=None):
+    """
+    Sorted list of (date, [file paths]) for date= directories of raw_dir in [start, end].
+    Dedup references stay local: their data is already in S3 under the snapshot's date.
+    """
+    partitions = []
+    try:
+        entries = list(os.scandir(raw_dir))
+    except FileNotFoundError:
+        return partitions
+    for entry in entries:
+        day = partition_date(entry.name)
+        if day is None or not entry.is_dir():
+            continue
+        if (start and day < start) or (end and day > end):
+            continue
+        files = sorted(
+            os.path.join(entry.path, name) for name in os.listdir(entry.path)
+            if not name.startswith(".") and not name.endswith((".tmp", REFERENCE_SUFFIX))
+        )
+        if files:
+            partitions.append((day, files))
+    return sorted(partitions)
+
+
+def order_partition_files(files, index=B3_DEFAULT_INDEX):
+    """Puts the canonical Parquet (the object that triggers the Lambda) last"""
+    trigger = raw_file_pattern(index)
+    return sorted(files, key=lambda path: (bool(trigger.match(os.path.basename(path))), path))
+
+
+def object_key(path, raw_dir, prefix=S3_PREFIX_RAW):
+    """data/raw/date=2024-01-02/IBOVDia_02-01-24.parquet -> raw/date=2024-01-02/IBOVDia_02-01-24.parquet"""
+    return prefix + os.path.relpath(path, raw_dir).replace(os.sep, "/")
+
+
+def _upload_partition(backend, bucket, files, raw_dir, prefix, remote_etags, index):
+    uploaded, skipped, uploaded_bytes = [], [], 0
+    for path in order_partition_files(files, index):
+        key = object_key(path, raw_dir, prefix)
+        remote = remote_etags.get(key)
+        if remote and remote == compute_etag(path, backend.threshold, backend.chunk_size):
+            skipped.append(key)
+            continue
+        backend.upload(path, bucket, key)
+        uploaded.append(key)
+        uploaded_bytes += os.path.getsize(path)
+    return uploaded, skipped, uploaded_bytes
+
+
+def upload_raw(raw_dir=None, bucket=S3_BUCKET_RAW, prefix=None, backend=None, start=None, end=None,
+               max_workers=S3_UPLOAD_MAX_WORKERS, index=B3_DEFAULT_INDEX):
+    """
+    Mirrors local raw partitions to s3://bucket/prefix, skipping objects whose ETag already matches.
+
+    Returns a dict with uploaded/skipped keys, failed partitions, bytes and seconds.
+    """
+    raw_dir = raw_dir or raw_root(index)
+    prefix = prefix if prefix is not None else index_raw_prefix(S3_PREFIX_RAW, index)
+    backend = backend or Boto3Backend()
+    partitions = local_partitions(raw_dir, start, end)
+
+    started = time.perf_counter()
+    remote_etags = backend.list_etags(bucket, prefix)
+    uploaded, skipped, failed = [], [], []
+    uploaded_bytes = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_upload_partition, backend, bucket, files, raw_dir, prefix, remote_etags, index): day
+            for day, files in partitions
+        }
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                partition_uploaded, partition_skipped, partition_bytes = future.result()
+            except Exception as e:
+                print(f"❌ Upload of date={day.isoformat()} failed: {e}")
+                failed.append(day)
+                continue
+            uploaded.extend(partition_uploaded)
+            skipped.extend(partition_skipped)
+            uploaded_bytes += partition_bytes
+
+    elapsed = time.perf_counter() - started
+    throughput = uploaded_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    print(f"✅ Uploaded {len(uploaded)} objects ({uploaded_bytes / 1024:.1f} KB, {throughput:.1f} MB/s), "
+          f"skipped {len(skipped)} unchanged, {len(failed)} partitions failed, in {elapsed:.2f}s")
+    return {
+        "uploaded": sorted(uploaded),
+        "skipped": sorted(skipped),
+        "failed": sorted(failed),
+        "bytes": uploaded_bytes,
+        "seconds": elapsed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload local raw partitions to S3")
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--bucket", default=S3_BUCKET_RAW)
+    parser.add_argument("--prefix", default=None, help="Default: S3_PREFIX_RAW, plus index=<INDEX>/ for other indexes")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--workers", type=int, default=S3_UPLOAD_MAX_WORKERS)
+    parser.add_argument("--index", default=B3_DEFAULT_INDEX)
+    parser.add_argument("--local-root", default=None, help="Write to this directory instead of S3")
+    args = parser.parse_args()
+    backend = LocalS3Backend(args.local_root) if args.local_root else Boto3Backend()
+    result = upload_raw(args.raw_dir, args.bucket, args.prefix, backend, args.start, args.end, args.workers,
+                        args.index)
+    if result["failed"]:
+        raise SystemExit(1)
@@ -0,0 +1,87 @@
+"""
+Destinos das partições brutas geradas em memória (src/extraction/memory_pipeline.py).
+
+Cada sink recebe a partição inteira, uma lista ordenada de (nome, bytes) com o
+Parquet canônico por último, e a grava de uma vez:
+
+    LocalSink   data/raw/date=YYYY-MM-DD/<nome>  (escrita atômica, registra no catálogo)
+    S3Sink      s3://bucket/prefix/date=YYYY-MM-DD/<nome> via Boto3Backend ou
+                LocalS3Backend ("fake S3"). Objetos com ETag igual ao remoto
+                não são reenviados.
+
+    sinks = build_sinks(["local", "fake_s3"])
+"""
+import os
+import uuid
+
+from config.settings import FAKE_S3_ROOT, PROJECT_ROOT, S3_BUCKET_RAW, S3_PREFIX_RAW
+from src.ingestion.s3_uploader import Boto3Backend, LocalS3Backend, bytes_etag
+from src.transform.partitions import raw_root
+
+
+class LocalSink:
+    """Writes partitions under a local raw directory"""
+
+    name = "local"
+
+    def __init__(self, raw_dir=None):
+        self.raw_dir = raw_dir or raw_root()
+
+    def write_partition(self, day, files):
+        """Writes every (name, data) into date=<day>/. Returns the written paths"""
+        date_directory = os.path.join(self.raw_dir, f"date={day.isoformat()}")
+        os.makedirs(date_directory, exist_ok=True)
+        paths = []
+        for name, data in files:
+            path = os.path.join(date_directory, name)
+            tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        from src.extraction.b3_scraper import record_raw_partition
+        for path in paths:
+            if path.endswith(".parquet"):
+                record_raw_partition(path, day)
+        return paths
+
+
+class S3Sink:
+    """Puts partitions into a bucket through an s3_uploader backend (real or local stand-in)"""
+
+    def __init__(self, backend, bucket=S3_BUCKET_RAW, prefix=S3_PREFIX_RAW, name="s3"):
+        self.backend = backend
+        self.bucket = bucket
+        self.prefix = prefix
+        self.name = name
+        self.skipped = 0
+
+    def write_partition(self, day, files):
+        """Puts every (name, data) in order, skipping objects whose ETag already matches. Returns the keys"""
+        partition_prefix = f"{self.prefix}date={day.isoformat()}/"
+        remote_etags = self.backend.list_etags(self.bucket, partition_prefix)
+        keys = []
+        for name, data in files:
+            key = partition_prefix + name
+            keys.append(key)
+            if remote_etags.get(key) == bytes_etag(data, self.backend.threshold, self.backend.chunk_size):
+                self.skipped += 1
+                continue
+            self.backend.put(data, self.bucket, key)
+        return keys
+
+
+def build_sinks(names, raw_dir=None, bucket=S3_BUCKET_RAW, prefix=S3_PREFIX_RAW, fake_s3_root=None):
+    """Sinks for "local", "s3" and "fake_s3" (LocalS3Backend under FAKE_S3_ROOT)"""
+    sinks = []
+    for name in names:
+        if name == "local":
+            sinks.append(LocalSink(raw_dir))
+        elif name == "s3":
+            sinks.append(S3Sink(Boto3Backend(), bucket, prefix))
+        elif name == "fake_s3":
+            root = fake_s3_root or os.path.join(PROJECT_ROOT, FAKE_S3_ROOT)
+            sinks.append(S3Sink(LocalS3Backend(root), bucket, prefix, name="fake_s3"))
+        else:
+            raise ValueError(f"Unknown sink: {name}")
+    return sinks
@@ -2,61 +2,268 @@ import boto3
 import os
 import json
 import logging
+import random
+import time
+from urllib.parse import unquote_plus
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize Glue client
-glue_client = boto3.client('glue')
+# Glue client, created on first use so the module can be imported (and tested) without AWS credentials
+glue_client = None
+
+# Retry settings for ConcurrentRunsExceededException
+MAX_START_ATTEMPTS = int(os.environ.get('GLUE_MAX_START_ATTEMPTS', '5'))
+BASE_BACKOFF_SECONDS = float(os.environ.get('GLUE_BASE_BACKOFF_SECONDS', '1'))
+# Object versions (key + eTag/sequencer) claimed by a run are not re-submitted for this long
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', str(6 * 60 * 60)))
+
+CONCURRENCY_ERROR_CODES = ('ConcurrentRunsExceededException', 'ThrottlingException')
+
+
+def get_glue_client():
+    global glue_client
+    if glue_client is None:
+        glue_client = boto3.client('glue')
+    return glue_client
+
+
+class InMemoryIdempotencyStore:
+    """Idempotency store kept in the Lambda container (survives warm invocations only)"""
+
+    def __init__(self):
+        self.claims = {}
+
+    def claim(self, key, ttl=IDEMPOTENCY_TTL_SECONDS):
+        now = time.time()
+        expires_at = self.claims.get(key)
+        if expires_at and expires_at > now:
+            return False
+        self.claims[key] = now + ttl
+        return True
+
+    def release(self, key):
+        self.claims.pop(key, None)
+
+
+class LocalFileIdempotencyStore(InMemoryIdempotencyStore):
+    """Idempotency store persisted as JSON (e.g. under /tmp, or a local directory in development)"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.claims = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.claims = {}
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.claims, f)
+        os.replace(tmp_path, self.path)
+
+    def claim(self, key, ttl=IDEMPOTENCY_TTL_SECONDS):
+        claimed = super().claim(key, ttl)
+        if claimed:
+            self._save()
+        return claimed
+
+    def release(self, key):
+        super().release(key)
+        self._save()
+
+
+class DynamoDBIdempotencyStore:
+    """
+    Idempotency store backed by a DynamoDB table with partition key `pk` (string)
+    and TTL attribute `expires_at`. Claims use a conditional put, so concurrent
+    Lambda invocations never both win the same key.
+    """
+
+    def __init__(self, table_name, client=None):
+        self.table_name = table_name
+        self.client = client or boto3.client('dynamodb')
+
+    def claim(self, key, ttl=IDEMPOTENCY_TTL_SECONDS):
+        now = int(time.time())
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={'pk': {'S': key}, 'expires_at': {'N': str(now + ttl)}},
+                ConditionExpression='attribute_not_exists(pk) OR expires_at < :now',
+                ExpressionAttributeValues={':now': {'N': str(now)}},
+            )
+            return True
+        except Exception as e:
+            if _error_code(e) == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def release(self, key):
+        self.client.delete_item(TableName=self.table_name, Key={'pk': {'S': key}})
+
+
+_default_store = None
+
+
+def get_idempotency_store():
+    """Builds the store selected by IDEMPOTENCY_BACKEND (memory, local or dynamodb)"""
+    global _default_store
+    if _default_store is None:
+        backend = os.environ.get('IDEMPOTENCY_BACKEND', 'memory')
+        if backend == 'dynamodb':
+            _default_store = DynamoDBIdempotencyStore(os.environ['IDEMPOTENCY_TABLE'])
+        elif backend == 'local':
+            _default_store = LocalFileIdempotencyStore(
+                os.environ.get('IDEMPOTENCY_FILE', '/tmp/glue_trigger_idempotency.json')
+            )
+        else:
+            _default_store = InMemoryIdempotencyStore()
+    return _default_store
+
+
+def _error_code(error):
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def extract_s3_objects(event):
+    """
+    Returns the unique (bucket, key, version) of every record in the event, in order.
+    `version` is the object's eTag (or the event sequencer when there is none), so a
+    changed re-upload of the same key is a new object.
+    Accepts plain S3 notifications and S3 notifications delivered through SQS.
+    """
+    objects = []
+    seen = set()
+    for record in event.get('Records', []):
+        if 's3' in record:
+            s3_records = [record]
+        elif 'body' in record:
+            s3_records = json.loads(record['body']).get('Records', [])
+        else:
+            continue
+        for s3_record in s3_records:
+            bucket = s3_record['s3']['bucket']['name']
+            s3_object = s3_record['s3']['object']
+            key = unquote_plus(s3_object['key'])
+            version = s3_object.get('eTag') or s3_object.get('sequencer') or ''
+            if (bucket, key, version) not in seen:
+                seen.add((bucket, key, version))
+                objects.append((bucket, key, version))
+    return objects
+
+
+def partition_of(key):
+    """'raw/date=2024-01-02/IBOVDia_02-01-24.parquet' -> 'date=2024-01-02' (or the key itself)"""
+    for segment in key.split('/'):
+        if segment.startswith('date='):
+            return segment
+    return key
+
+
+def start_job_run_with_backoff(glue, job_name, arguments, context=None):
+    """Starts the Glue job, backing off on concurrency/throttling errors while the Lambda has time left"""
+    for attempt in range(MAX_START_ATTEMPTS):
+        try:
+            return glue.start_job_run(JobName=job_name, Arguments=arguments)
+        except Exception as e:
+            if _error_code(e) not in CONCURRENCY_ERROR_CODES or attempt == MAX_START_ATTEMPTS - 1:
+                raise
+            delay = BASE_BACKOFF_SECONDS * (2 ** attempt) * (0.5 + random.random())
+            if context is not None and context.get_remaining_time_in_millis() < (delay + 5) * 1000:
+                raise
+            logger.warning(f"{_error_code(e)} starting {job_name}, retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1}/{MAX_START_ATTEMPTS})")
+            time.sleep(delay)
+
 
 # Lambda handler function
-def lambda_handler(event, context):
+def lambda_handler(event, context, glue=None, store=None):
     """
     AWS Lambda function that triggers a Glue job when new data is added to S3.
-    
+
+    Every record of the (possibly batched) notification is processed. Object versions
+    (key + eTag) already claimed by a run are skipped, and the remaining keys of each
+    bucket are coalesced into a single job run with the list of partitions.
+
+    If a job run cannot be started, the claims of its keys are released and the error
+    is raised, so Lambda (or SQS) redelivers the event. Keys of runs that did start
+    keep their claims and are skipped on the redelivery.
+
     Parameters:
-    event (dict): Event data from S3 trigger
+    event (dict): Event data from S3 trigger (or SQS carrying S3 notifications)
     context (LambdaContext): Lambda context object
-    
+    glue: optional Glue client (a stub in tests)
+    store: optional idempotency store
+
     Returns:
-    dict: Response with status of Glue job execution
+    dict: Response with the started job runs
     """
+    glue = glue or get_glue_client()
+    store = store or get_idempotency_store()
+    claimed = []
     try:
         logger.info("Received S3 event: " + json.dumps(event))
-        
-        # Extract bucket and key from the S3 event
-        bucket = event['Records'][0]['s3']['bucket']['name']
-        key = event['Records'][0]['s3']['object']['key']
-        logger.info(f"Bucket: {bucket}, Key: {key}")
-        
+
         # Get the Glue job name from environment variable or use default
         glue_job_name = os.environ.get('GLUE_JOB_NAME', 'bovespa-etl-job')
-        
-        # Start the Glue job
-        response = glue_client.start_job_run(
-            JobName=glue_job_name,
-            Arguments={
-                '--S3_BUCKET': bucket,
-                '--S3_KEY': key
-            }
-        )
-        
-        job_run_id = response['JobRunId']
-        logger.info(f"Started Glue job {glue_job_name} with run ID: {job_run_id}")
-        
+
+        # Extract every object version of the batch and drop the ones already claimed
+        objects = extract_s3_objects(event)
+        new_objects = []
+        for bucket, key, version in objects:
+            claim_key = f"{glue_job_name}/{bucket}/{key}/{version}"
+            if store.claim(claim_key):
+                claimed.append(claim_key)
+                new_objects.append((bucket, key))
+        skipped = len(objects) - len(new_objects)
+        logger.info(f"{len(objects)} objects in event, {len(new_objects)} new, {skipped} already in flight")
+
+        keys_by_bucket = {}
+        for bucket, key in new_objects:
+            keys_by_bucket.setdefault(bucket, {})[key] = None
+
+        job_runs = []
+        for bucket, keys in keys_by_bucket.items():
+            keys = list(keys)
+            partitions = sorted({partition_of(key) for key in keys})
+            response = start_job_run_with_backoff(
+                glue,
+                glue_job_name,
+                {
+                    '--S3_BUCKET': bucket,
+                    '--S3_KEY': keys[0],
+                    '--S3_KEYS': json.dumps(keys),
+                    '--PARTITIONS': ','.join(partitions),
+                },
+                context,
+            )
+            job_run_id = response['JobRunId']
+            logger.info(f"Started Glue job {glue_job_name} with run ID: {job_run_id} "
+                        f"for {len(partitions)} partitions in {bucket}")
+            job_runs.append({'bucket': bucket, 'jobRunId': job_run_id, 'partitions': partitions})
+            # These keys now belong to a running job; keep their claims even if a later bucket fails
+            claimed = [c for c in claimed if not c.startswith(f"{glue_job_name}/{bucket}/")]
+
         return {
             'statusCode': 200,
             'body': json.dumps({
-                'message': f'Successfully started Glue job {glue_job_name}',
-                'jobRunId': job_run_id
+                'message': f'Successfully started Glue job {glue_job_name}' if job_runs
+                           else 'No new objects to process',
+                'jobRunId': job_runs[0]['jobRunId'] if job_runs else None,
+                'jobRuns': job_runs,
+                'skippedKeys': skipped
             })
         }
     except Exception as e:
+        # Release the claims so a redelivery of this event can start the job
+        for key in claimed:
+            try:
+                store.release(key)
+            except Exception as release_error:
+                logger.error(f"Could not release idempotency key {key}: {release_error}")
         logger.error(f"Error starting Glue job: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'message': f'Error starting Glue job: {str(e)}'
-            })
-        }
+        raise
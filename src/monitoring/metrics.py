@@ -0,0 +1,292 @@
+"""
+Instrumentação leve da extração: spans, contadores e histogramas.
+
+    from src.monitoring import metrics
+
+    with metrics.span("page_load", index="IBOV"):
+        driver.get(url)
+    metrics.increment("downloads_total", status="ok")
+    metrics.observe("csv_bytes", os.path.getsize(path))
+
+Cada span encerrado vira uma linha JSON em METRICS_JSONL_PATH (nome, labels,
+início, duração, status e span pai). Contadores e histogramas são
+acumulados em memória. `flush()` grava METRICS_PROM_PATH no formato textfile do
+Prometheus (node_exporter --collector.textfile), com troca atômica. O flush
+também roda ao fim do processo.
+
+Desligado (padrão, ou BOVESPA_METRICS=0), `span()` devolve um context manager
+vazio compartilhado e `increment`/`observe` retornam na primeira linha, então
+o custo é de uma chamada de função.
+
+Uso:
+    BOVESPA_METRICS=1 python -m src.extraction.b3_scraper
+    python -m src.monitoring.metrics --overhead        # custo por span ligado/desligado
+"""
+import argparse
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+
+from config.settings import METRICS_ENABLED, METRICS_JSONL_PATH, METRICS_PREFIX, METRICS_PROM_PATH, PROJECT_ROOT
+
+# Prometheus client default buckets (seconds), extended for slow page loads and downloads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else repr(bound)), total
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Times a stage; nested spans record their parent"""
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.parent = None
+
+    def set(self, **labels):
+        """Adds labels known only after the stage started (e.g. the file that was downloaded)"""
+        self.labels.update(labels)
+
+    def __enter__(self):
+        stack = self.registry._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        self.registry._stack().pop()
+        status = "error" if exc_type else "ok"
+        self.registry._finish_span(self, duration, status, exc)
+        return False
+
+
+class MetricsRegistry:
+    """Holds counters/histograms and writes the JSON-lines and Prometheus outputs"""
+
+    def __init__(self, enabled=False, jsonl_path=None, prom_path=None, prefix=METRICS_PREFIX):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._jsonl = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _emit(self, record):
+        if not self.jsonl_path:
+            return
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._jsonl is None:
+                os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+                self._jsonl = open(self.jsonl_path, "a", encoding="utf-8", buffering=1)
+            self._jsonl.write(line)
+
+    def _observe(self, name, value, labels, buckets):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def _finish_span(self, span, duration, status, exc):
+        self._observe("span_seconds", duration, {"span": span.name, "status": status}, DEFAULT_BUCKETS)
+        record = {
+            "type": "span",
+            "name": span.name,
+            "labels": span.labels,
+            "start": span.started_at,
+            "duration": round(duration, 6),
+            "status": status,
+            "parent": span.parent,
+            "pid": os.getpid(),
+        }
+        if exc is not None:
+            record["error"] = str(exc)
+        self._emit(record)
+
+    def span(self, name, **labels):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, labels)
+
+    def increment(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        self._observe(name, value, labels, buckets)
+
+    def render_prometheus(self):
+        """Counters and histograms in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            for name in sorted({name for (name, _), _ in counters}):
+                lines.append(f"# TYPE {self.prefix}{name} counter")
+                for (counter_name, label_key), value in counters:
+                    if counter_name == name:
+                        lines.append(f"{self.prefix}{name}{_format_labels(label_key)} {value}")
+            for name in sorted({name for (name, _), _ in histograms}):
+                lines.append(f"# TYPE {self.prefix}{name} histogram")
+                for (histogram_name, label_key), histogram in histograms:
+                    if histogram_name != name:
+                        continue
+                    for bound, total in histogram.cumulative():
+                        lines.append(f"{self.prefix}{name}_bucket{_format_labels(label_key, [('le', bound)])} {total}")
+                    lines.append(f"{self.prefix}{name}_sum{_format_labels(label_key)} {histogram.sum}")
+                    lines.append(f"{self.prefix}{name}_count{_format_labels(label_key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Writes the Prometheus textfile atomically (node_exporter never reads a partial file)"""
+        if not self.enabled:
+            return
+        if self.prom_path:
+            os.makedirs(os.path.dirname(self.prom_path) or ".", exist_ok=True)
+            tmp_path = self.prom_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.render_prometheus())
+            os.replace(tmp_path, self.prom_path)
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.flush()
+
+
+def _env_enabled():
+    value = os.environ.get("BOVESPA_METRICS")
+    if value is None:
+        return METRICS_ENABLED
+    return value.lower() not in ("", "0", "false", "no")
+
+
+registry = MetricsRegistry(
+    enabled=_env_enabled(),
+    jsonl_path=os.path.join(PROJECT_ROOT, METRICS_JSONL_PATH),
+    prom_path=os.path.join(PROJECT_ROOT, METRICS_PROM_PATH),
+)
+atexit.register(registry.flush)
+
+
+def configure(enabled=None, jsonl_path=None, prom_path=None):
+    """Turns instrumentation on/off or redirects its outputs (e.g. to a benchmark directory)"""
+    if enabled is not None:
+        registry.enabled = enabled
+    if jsonl_path is not None:
+        with registry._lock:
+            if registry._jsonl is not None:
+                registry._jsonl.close()
+                registry._jsonl = None
+            registry.jsonl_path = jsonl_path
+    if prom_path is not None:
+        registry.prom_path = prom_path
+    return registry
+
+
+def span(name, **labels):
+    return registry.span(name, **labels)
+
+
+def increment(name, value=1, **labels):
+    registry.increment(name, value, **labels)
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    registry.observe(name, value, buckets, **labels)
+
+
+def flush():
+    registry.flush()
+
+
+def measure_overhead(iterations=200_000):
+    """Seconds per empty `with span(...)` block, disabled and enabled (without file output)"""
+    results = {}
+    for enabled in (False, True):
+        probe = MetricsRegistry(enabled=enabled)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with probe.span("probe"):
+                pass
+        results["enabled" if enabled else "disabled"] = (time.perf_counter() - started) / iterations
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline instrumentation utilities")
+    parser.add_argument("--overhead", action="store_true", help="Measure the cost of a span")
+    args = parser.parse_args()
+    if args.overhead:
+        for state, seconds in measure_overhead().items():
+            print(f"⏱️ span {state}: {seconds * 1e9:.0f} ns")
@@ -0,0 +1,321 @@
+"""
+Armazenamento compacto da carteira diária: snapshots periódicos + deltas por dia.
+
+Entre os rebalanceamentos quadrimestrais, a carteira de um dia difere da do dia
+anterior em poucos valores: mesmas ações, mesmos setores, nomes e tipos, quase
+sempre as mesmas quantidades teóricas. Só a participação acompanha os preços.
+Em vez de um CSV e um Parquet completos por pregão, o DeltaStore guarda:
+
+    DELTA_STORE_DIR/
+      meta.json                         segmentos (dia do snapshot, pregões e arquivos) e raiz bruta
+      snapshot-YYYY-MM-DD-<id>.parquet  carteira completa do primeiro dia do segmento
+      delta-YYYY-MM-DD-<id>.parquet     date, row e as colunas numéricas, uma linha por
+                                        (dia, linha do snapshot) alterada, nulo = sem mudança
+
+Um segmento novo (snapshot) começa quando a composição muda (linhas, códigos,
+setores, nomes ou tipos diferentes do dia anterior, ex. rebalanceamento), quando
+uma coluna numérica traz nulos, ou a cada DELTA_SNAPSHOT_INTERVAL pregões, o
+que limita o número de deltas aplicados numa reconstrução.
+
+Reconstruir um dia lê o snapshot e o delta do segmento (o último segmento
+lido fica em memória) e aplica, por coluna, o último valor de cada linha até
+aquele dia com uma atribuição vetorizada. O resultado é igual à tabela do
+Parquet bruto.
+
+É um formato opcional, ao lado de data/raw: construído com `build`, ele é
+associado àquela raiz, e `record_raw_partition` (b3_scraper) grava cada pregão
+que chega lá. Um dia anterior ao último (backfill) ou regravado refaz só o
+segmento em que cai. Os arquivos de segmento nunca são reescritos no lugar: cada
+gravação usa um nome novo, e a troca acontece na escrita atômica do meta.json.
+Se o gancho falhar, o store é marcado como desatualizado (`stale`): `get` se
+recusa a responder e `update` o reconstrói.
+
+    store = DeltaStore()
+    table = store.get(datetime.date(2024, 1, 2))
+
+Uso:
+    python -m src.query.delta_store build
+    python -m src.query.delta_store show 2024-01-02
+"""
+import argparse
+import bisect
+import datetime
+import json
+import os
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import DELTA_SNAPSHOT_INTERVAL, DELTA_STORE_DIR, PROJECT_ROOT
+from src.extraction.csv_converter import write_parquet
+from src.transform.partitions import raw_root
+
+
+def value_columns(schema):
+    """Numeric columns, the ones stored as deltas"""
+    return [field.name for field in schema if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)]
+
+
+def same_composition(previous, table):
+    """True when `table` can be stored as a delta of `previous` (same rows and non-numeric values, no nulls)"""
+    if previous is None or not previous.schema.equals(table.schema) or previous.num_rows != table.num_rows:
+        return False
+    values = value_columns(table.schema)
+    if any(t.column(name).null_count for t in (previous, table) for name in values):
+        return False
+    keys = [name for name in table.column_names if name not in values]
+    return previous.select(keys).equals(table.select(keys))
+
+
+class DeltaStore:
+    """Daily portfolios as per-segment snapshots plus columnar deltas"""
+
+    def __init__(self, root=None, snapshot_interval=DELTA_SNAPSHOT_INTERVAL):
+        self.root = root or os.path.join(PROJECT_ROOT, DELTA_STORE_DIR)
+        self.snapshot_interval = snapshot_interval
+        os.makedirs(self.root, exist_ok=True)
+        self.meta_path = os.path.join(self.root, "meta.json")
+        self.meta = self._read_meta()
+        self._segment = None  # (snapshot file, snapshot table, delta table or None)
+        self._garbage = []  # files replaced since the last commit, removed once meta.json no longer lists them
+
+    def _read_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {"raw_dir": None, "segments": []}
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _commit(self):
+        tmp_path = f"{self.meta_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.meta_path)
+        for name in self._garbage:
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+        self._garbage = []
+
+    def mark_stale(self, reason):
+        """Flags the store as out of date with its raw root: `get` refuses to answer and `update` rebuilds"""
+        # any half-applied change is dropped; its new files are orphans that `build` removes
+        self.meta = self._read_meta()
+        self.meta["stale"] = reason
+        self._segment, self._garbage = None, []
+        self._commit()
+
+    @property
+    def segments(self):
+        return self.meta["segments"]
+
+    def days(self):
+        return [datetime.date.fromisoformat(d) for segment in self.segments for d in segment["dates"]]
+
+    def last_date(self):
+        return datetime.date.fromisoformat(self.segments[-1]["dates"][-1]) if self.segments else None
+
+    def size_bytes(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.root) if entry.is_file())
+
+    def _files(self, segment):
+        """{kind: file name} of a segment (stores written before names were kept in meta.json use fixed names)"""
+        if "files" not in segment:
+            legacy = {kind: f"{kind}-{segment['snapshot']}.parquet" for kind in ("snapshot", "delta")}
+            segment["files"] = {kind: name for kind, name in legacy.items()
+                                if os.path.exists(os.path.join(self.root, name))}
+        return segment["files"]
+
+    # --- reading ---
+
+    def _load(self, segment):
+        files = self._files(segment)
+        if self._segment is None or self._segment[0] != files["snapshot"]:
+            deltas = pq.read_table(os.path.join(self.root, files["delta"])) if "delta" in files else None
+            self._segment = (files["snapshot"], pq.read_table(os.path.join(self.root, files["snapshot"])), deltas)
+        return self._segment[1], self._segment[2]
+
+    def get(self, day):
+        """Portfolio table of `day` (date or ISO string), rebuilt from its segment. KeyError if not stored"""
+        if self.meta.get("stale"):
+            raise RuntimeError(f"The delta store is stale ({self.meta['stale']}); run update or build")
+        iso = day if isinstance(day, str) else day.isoformat()
+        i = bisect.bisect_right([segment["snapshot"] for segment in self.segments], iso) - 1
+        if i < 0 or iso not in self.segments[i]["dates"]:
+            raise KeyError(f"{iso} is not in the delta store")
+        table, deltas = self._load(self.segments[i])
+        if deltas is None or iso == self.segments[i]["snapshot"]:
+            return table
+
+        # deltas are sorted by date, so the days up to `iso` are a prefix
+        upto = int(np.searchsorted(deltas.column("date").to_numpy(), np.datetime64(iso, "D"), "right"))
+        rows = deltas.column("row").to_numpy()[:upto]
+        for name in value_columns(table.schema):
+            column = deltas.column(name).slice(0, upto)
+            changed = ~column.is_null().to_numpy(zero_copy_only=False)
+            if not changed.any():
+                continue
+            changed_rows = rows[changed][::-1]
+            changed_values = column.drop_null().to_numpy()[::-1]
+            # latest change of each row (first occurrence in reversed order)
+            targets, latest = np.unique(changed_rows, return_index=True)
+            values = table.column(name).to_numpy().copy()
+            values[targets] = changed_values[latest]
+            field = table.schema.field(name)
+            table = table.set_column(table.schema.get_field_index(name), field, pa.array(values, field.type))
+        return table
+
+    # --- writing ---
+
+    def _write(self, segment, kind, table):
+        """
+        Writes a segment file under a new name. The file it replaces stays until the next
+        commit, so meta.json never points at a file that is being rewritten
+        """
+        files = self._files(segment)
+        name = f"{kind}-{segment['snapshot']}-{uuid.uuid4().hex[:8]}.parquet"
+        write_parquet(table, os.path.join(self.root, name))
+        if kind in files:
+            self._garbage.append(files[kind])
+        files[kind] = name
+
+    def _append_table(self, day, table):
+        """Adds `day` after the last stored day, as a delta of it or as a new segment"""
+        iso = day.isoformat()
+        segment = self.segments[-1] if self.segments else None
+        previous = self.get(segment["dates"][-1]) if segment else None
+
+        if (segment is None or len(segment["dates"]) >= self.snapshot_interval
+                or not same_composition(previous, table)):
+            segment = {"snapshot": iso, "dates": [iso], "files": {}}
+            self._write(segment, "snapshot", table)
+            self.segments.append(segment)
+            self._segment = (segment["files"]["snapshot"], table, None)
+        else:
+            names = value_columns(table.schema)
+            new = {name: table.column(name).to_numpy() for name in names}
+            changed = {name: new[name] != previous.column(name).to_numpy() for name in names}
+            rows = np.flatnonzero(np.logical_or.reduce(list(changed.values())))
+            delta = pa.table(
+                [pa.array(np.full(len(rows), np.datetime64(day, "D"))).cast(pa.date32()), pa.array(rows, pa.int32())]
+                + [pa.array(new[name][rows], table.schema.field(name).type, mask=~changed[name][rows])
+                   for name in names],
+                names=["date", "row"] + names,
+            )
+            snapshot_table, deltas = self._load(segment)
+            deltas = delta if deltas is None else pa.concat_tables([deltas, delta])
+            self._write(segment, "delta", deltas)
+            segment["dates"].append(iso)
+            self._segment = (segment["files"]["snapshot"], snapshot_table, deltas)
+
+    def _insert(self, day, table):
+        """
+        Stores or replaces a day that is not after the last one. Only the segment it falls in
+        is re-segmented; later segments start with their own snapshot and are left as they are
+        """
+        iso = day.isoformat()
+        i = max(0, bisect.bisect_right([segment["snapshot"] for segment in self.segments], iso) - 1)
+        segment = self.segments[i]
+        tables = {d: self.get(d) for d in segment["dates"] if d != iso}
+        tables[iso] = table
+        self._garbage.extend(self._files(segment).values())
+        later = self.segments[i + 1:]
+        del self.segments[i:]
+        self._segment = None
+        for d in sorted(tables):
+            self._append_table(datetime.date.fromisoformat(d), tables[d])
+        self.segments.extend(later)
+        self._segment = None
+
+    def append(self, day, raw_path, commit=True):
+        """
+        Stores one trading day: a day after the last one is appended; the last day or an
+        earlier one (e.g. from a backfill) is inserted into its segment
+        """
+        table = pq.read_table(raw_path)
+        last = self.last_date()
+        if last is None or day > last:
+            self._append_table(day, table)
+        else:
+            self._insert(day, table)
+        if commit:
+            self._commit()
+
+    def build(self, raw_dir=None):
+        """Stores every raw partition of `raw_dir` from scratch and ties the store to it"""
+        from src.catalog.partition_catalog import resolve_raw_partitions
+        raw_dir = os.path.abspath(raw_dir or raw_root())
+        # the previous files are removed only after the new meta.json is in place
+        self._garbage = [entry.name for entry in os.scandir(self.root)
+                         if entry.name.startswith(("snapshot-", "delta-"))]
+        self.meta = {"raw_dir": raw_dir, "segments": []}
+        self._segment = None
+        partitions = resolve_raw_partitions(raw_dir)
+        for day, path in partitions:
+            self.append(day, path, commit=False)
+        self._commit()
+        print(f"✅ Delta store built: {len(partitions)} days in {len(self.segments)} segments "
+              f"({self.size_bytes() / 1024:.1f} KB) from {raw_dir}")
+        return len(partitions)
+
+    def update(self, raw_dir=None):
+        """
+        Stores every raw partition missing from the store (a stale store is rebuilt).
+        Returns how many days were added
+        """
+        from src.catalog.partition_catalog import resolve_raw_partitions
+        raw_dir = raw_dir or self.meta["raw_dir"] or raw_root()
+        if self.meta.get("stale"):
+            print(f"♻️ Delta store is stale ({self.meta['stale']}); rebuilding")
+            return self.build(raw_dir)
+        known = {d for segment in self.segments for d in segment["dates"]}
+        added = 0
+        for day, path in resolve_raw_partitions(raw_dir):
+            if day.isoformat() not in known:
+                self.append(day, path, commit=False)
+                added += 1
+        self._commit()
+        return added
+
+
+def record_delta_partition(day, parquet_path, raw_dir, store_dir=None):
+    """
+    Writer hook: stores `day` when the project's delta store exists and was built from
+    `raw_dir`. A failure never fails the write; it marks the store stale, so reads refuse
+    to answer until `update` rebuilds it.
+    """
+    root = store_dir or os.path.join(PROJECT_ROOT, DELTA_STORE_DIR)
+    if not os.path.exists(os.path.join(root, "meta.json")):
+        return
+    store = None
+    try:
+        store = DeltaStore(root)
+        if store.meta["raw_dir"] == os.path.abspath(raw_dir):
+            store.append(day, parquet_path)
+    except Exception as e:
+        print(f"⚠️ Could not update the delta store for {day}: {e}")
+        if store is not None:
+            try:
+                store.mark_stale(f"{day} could not be stored: {e}")
+            except Exception as stale_error:
+                print(f"⚠️ Could not mark the delta store stale: {stale_error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daily portfolios as snapshots plus deltas")
+    parser.add_argument("command", choices=["build", "update", "show"])
+    parser.add_argument("day", nargs="?", type=datetime.date.fromisoformat)
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--store-dir", default=None)
+    args = parser.parse_args()
+
+    store = DeltaStore(args.store_dir)
+    if args.command == "build":
+        store.build(args.raw_dir)
+    elif args.command == "update":
+        added = store.update(args.raw_dir)
+        print(f"✅ Delta store: {added} day(s) appended, {len(store.segments)} segments")
+    else:
+        print(store.get(args.day or store.last_date()).to_pandas().to_string())
@@ -0,0 +1,238 @@
+"""
+Consultas SQL locais sobre data/refined e data/raw (substituto offline do Athena).
+
+Registra as tabelas no DuckDB embutido (dependência opcional), com
+particionamento Hive:
+
+    refined          data/refined/date=*/ticker=*/part-0.parquet  (date DATE, ticker VARCHAR)
+    raw              data/raw/date=*/<INDEX>Dia_DD-MM-YY.parquet   (date DATE + colunas da B3)
+    refined_compact  data/refined_compact/month=*/part-0.parquet   (se existir)
+
+Filtros em `date`/`ticker` podam diretórios antes da leitura. No compacto, a
+poda vem das estatísticas min/max dos row groups. Cada consulta devolve uma
+tabela Arrow com a latência e os bytes lidos do disco. Os bytes vêm de
+/proc/self/io, equivalente ao "data scanned" cobrado pelo Athena; em sistemas
+sem /proc o valor é None.
+
+Partições brutas deduplicadas (.ref.json, src/extraction/dedup.py) apontam
+para o Parquet de outro dia. Nesse caso a view `raw` junta os arquivos com a
+lista (arquivo, data) das partições, e cada dia aparece com a própria data.
+No `scan("raw")` cada arquivo entra uma vez só, com a data do diretório.
+
+Sem o DuckDB, `scan()` oferece a mesma poda via pyarrow.dataset (colunas +
+expressão de filtro), mas não aceita SQL.
+
+Uso:
+    python -m src.query.engine "SELECT ticker, avg(participacao_pct) FROM refined
+                                WHERE date BETWEEN '2024-01-01' AND '2024-01-31' GROUP BY 1"
+    python -m src.query.engine --scan refined --columns ticker participacao_pct --tickers PETR4 VALE3
+"""
+import argparse
+import datetime
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from src.catalog.partition_catalog import resolve_raw_partitions
+from src.transform.compaction import compact_root
+from src.transform.partitions import raw_root, refined_root
+from src.transform.refine import REFINED_PARTITIONING
+
+try:
+    import duckdb
+except ImportError:  # optional: only needed for SQL
+    duckdb = None
+
+RAW_PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+def bytes_read():
+    """Bytes this process has read through read()/pread() so far, or None where /proc is unavailable"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class QueryResult:
+    """Arrow table plus what it cost to produce"""
+
+    def __init__(self, table, seconds, bytes_scanned):
+        self.table = table
+        self.seconds = seconds
+        self.bytes_scanned = bytes_scanned
+
+    def summary(self):
+        scanned = "n/a" if self.bytes_scanned is None else f"{self.bytes_scanned / 1024:.1f} KB"
+        return f"{self.table.num_rows} rows in {self.seconds * 1000:.1f} ms, scanned {scanned}"
+
+
+def _measure(run):
+    before = bytes_read()
+    started = time.perf_counter()
+    table = run()
+    seconds = time.perf_counter() - started
+    after = bytes_read()
+    return QueryResult(table, seconds, None if before is None or after is None else after - before)
+
+
+def _sql_string(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _has_parquet(root):
+    return os.path.isdir(root) and any(name.startswith(("date=", "month=")) for name in os.listdir(root))
+
+
+class QueryEngine:
+    """Local datasets registered once; run `sql()` (DuckDB) or `scan()` (pyarrow) against them"""
+
+    def __init__(self, refined_dir=None, raw_dir=None, compact_dir=None):
+        self.refined_dir = refined_dir or refined_root()
+        self.raw_dir = raw_dir or raw_root()
+        self.compact_dir = compact_dir or compact_root()
+        self._connection = None
+
+    def raw_partitions(self):
+        return resolve_raw_partitions(self.raw_dir)
+
+    def raw_files(self):
+        """Distinct Parquet files behind the raw partitions (references share their snapshot's file)"""
+        return list(dict.fromkeys(path for _, path in self.raw_partitions()))
+
+    def tables(self):
+        """Names of the tables that have data"""
+        names = []
+        if _has_parquet(self.refined_dir):
+            names.append("refined")
+        if self.raw_files():
+            names.append("raw")
+        if _has_parquet(self.compact_dir):
+            names.append("refined_compact")
+        return names
+
+    def dataset(self, name):
+        """pyarrow dataset of a registered table (partition fields included)"""
+        if name == "refined":
+            return ds.dataset(self.refined_dir, format="parquet", partitioning=REFINED_PARTITIONING)
+        if name == "raw":
+            return ds.dataset(self.raw_files(), format="parquet", partitioning=RAW_PARTITIONING,
+                              partition_base_dir=self.raw_dir)
+        if name == "refined_compact":
+            return ds.dataset(self.compact_dir, format="parquet")
+        raise ValueError(f"Unknown table: {name}")
+
+    def connection(self):
+        if duckdb is None:
+            raise RuntimeError("SQL queries need DuckDB (pip install duckdb); use scan() for pyarrow-only reads")
+        if self._connection is None:
+            self._connection = duckdb.connect()
+            self.refresh()
+        return self._connection
+
+    def refresh(self):
+        """(Re)creates the views, picking up partitions written since the engine was opened"""
+        connection = self.connection()
+        tables = self.tables()
+        if "refined" in tables:
+            pattern = os.path.join(self.refined_dir, "date=*", "ticker=*", "*.parquet")
+            connection.execute(
+                f"CREATE OR REPLACE VIEW refined AS SELECT * FROM read_parquet({_sql_string(pattern)}, "
+                "hive_partitioning = true, hive_types = {'date': 'DATE', 'ticker': 'VARCHAR'})"
+            )
+        if "raw" in tables:
+            partitions = self.raw_partitions()
+            files = ", ".join(_sql_string(path) for path in dict.fromkeys(path for _, path in partitions))
+            if len(set(path for _, path in partitions)) == len(partitions):
+                connection.execute(
+                    f"CREATE OR REPLACE VIEW raw AS SELECT * FROM read_parquet([{files}], "
+                    "hive_partitioning = true, hive_types = {'date': 'DATE'})"
+                )
+            else:
+                # Some days reference another day's file: the date comes from the partition list
+                connection.register("raw_partitions", pa.table({
+                    "filename": [path for _, path in partitions],
+                    "date": pa.array([day for day, _ in partitions], pa.date32()),
+                }))
+                connection.execute(
+                    "CREATE OR REPLACE VIEW raw AS SELECT r.* EXCLUDE (filename), p.date "
+                    f"FROM read_parquet([{files}], hive_partitioning = false, filename = true) r "
+                    "JOIN raw_partitions p USING (filename)"
+                )
+        if "refined_compact" in tables:
+            pattern = os.path.join(self.compact_dir, "month=*", "*.parquet")
+            connection.execute(
+                f"CREATE OR REPLACE VIEW refined_compact AS SELECT * FROM read_parquet({_sql_string(pattern)}, "
+                "hive_partitioning = true, hive_types = {'month': 'VARCHAR'})"
+            )
+
+    def sql(self, query, params=None):
+        """Runs SQL against the registered views. Returns a QueryResult"""
+        connection = self.connection()
+
+        def run():
+            cursor = connection.execute(query, params or [])
+            # to_arrow_table() replaced fetch_arrow_table() in recent DuckDB releases
+            return cursor.to_arrow_table() if hasattr(cursor, "to_arrow_table") else cursor.fetch_arrow_table()
+
+        return _measure(run)
+
+    def scan(self, name, columns=None, filter=None):
+        """pyarrow-only read with column projection and partition/statistics pruning"""
+        dataset = self.dataset(name)
+        return _measure(lambda: dataset.to_table(columns=columns, filter=filter))
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def build_filter(start=None, end=None, tickers=None):
+    """pyarrow expression for a date range and/or ticker list (None when unrestricted)"""
+    expression = None
+    for part in (
+        ds.field("date") >= start if start else None,
+        ds.field("date") <= end if end else None,
+        ds.field("ticker").isin(tickers) if tickers else None,
+    ):
+        if part is not None:
+            expression = part if expression is None else expression & part
+    return expression
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query local refined/raw data with SQL (DuckDB) or pyarrow")
+    parser.add_argument("query", nargs="?", help="SQL over the refined, raw and refined_compact tables")
+    parser.add_argument("--scan", choices=["refined", "raw", "refined_compact"], help="pyarrow scan instead of SQL")
+    parser.add_argument("--columns", nargs="+", default=None)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--tickers", nargs="+", default=None)
+    parser.add_argument("--refined-dir", default=None)
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--compact-dir", default=None)
+    parser.add_argument("--limit", type=int, default=20, help="Rows to print")
+    args = parser.parse_args()
+    if not args.query and not args.scan:
+        parser.error("give a SQL query or --scan <table>")
+
+    with QueryEngine(args.refined_dir, args.raw_dir, args.compact_dir) as engine:
+        if args.scan:
+            result = engine.scan(args.scan, args.columns, build_filter(args.start, args.end, args.tickers))
+        else:
+            result = engine.sql(args.query)
+    print(result.table.slice(0, args.limit).to_pandas().to_string(index=False))
+    print(f"\n⏱️ {result.summary()}")
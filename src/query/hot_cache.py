@@ -0,0 +1,275 @@
+"""
+Cache quente dos últimos pregões refinados em Arrow IPC (memory map).
+
+O dashboard/notebook (Requisito 9) relê os últimos N pregões a cada refresh.
+Aqui cada janela "últimos N dias até D" é gravada uma vez como arquivo Arrow
+IPC sem compressão em HOT_CACHE_DIR. Uma leitura quente só abre o arquivo por
+memory map (sem decodificar Parquet nem copiar buffers).
+
+    cache = HotCache()
+    table = cache.load(days=60)          # janela mais recente
+
+Manutenção incremental: quando o refinamento grava um novo dia, `add_day`
+estende as janelas mais recentes. Lê só o dia novo, descarta o mais antigo e
+grava a nova janela. `add_days` faz o mesmo para um lote (ex.: `refine_all`),
+com uma única atualização do cache ao fim do lote. Reescrever um dia que já está em alguma janela invalida
+essas janelas. As janelas antigas continuam no disco e são removidas por LRU
+quando o total passa de HOT_CACHE_MAX_BYTES. O índice guarda a raiz refinada de
+origem; um cache construído a partir de outra raiz é descartado e reconstruído
+na próxima leitura.
+
+Uso:
+    python -m src.query.hot_cache --days 60          # aquece e mede leitura fria/quente
+"""
+import argparse
+import datetime
+import json
+import os
+import time
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from config.settings import (
+    CATALOG_ENABLED,
+    CATALOG_PATH,
+    HOT_CACHE_DEFAULT_DAYS,
+    HOT_CACHE_DIR,
+    HOT_CACHE_MAX_BYTES,
+    PROJECT_ROOT,
+)
+from src.query.reader import read_refined
+from src.transform.partitions import partition_date, refined_root
+
+INDEX_FILE = "index.json"
+
+
+def refined_dates(refined_dir):
+    """Sorted refined dates, from a synced catalog or the top-level date= directory names"""
+    catalog_file = os.path.join(PROJECT_ROOT, CATALOG_PATH)
+    if CATALOG_ENABLED and os.path.exists(catalog_file):
+        from src.catalog.partition_catalog import PartitionCatalog
+        with PartitionCatalog(catalog_file) as catalog:
+            if catalog.is_complete("refined", refined_dir):
+                return sorted({p["date"] for p in catalog.partitions("refined")})
+    try:
+        names = os.listdir(refined_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(day for day in (partition_date(name) for name in names) if day)
+
+
+class HotCache:
+    """Rolling windows of refined days stored as memory-mappable Arrow IPC files"""
+
+    def __init__(self, cache_dir=None, refined_dir=None, max_bytes=HOT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or os.path.join(PROJECT_ROOT, HOT_CACHE_DIR)
+        self.refined_dir = os.path.abspath(refined_dir or refined_root())
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        self._index_mtime = None
+        self._index = None
+        self._reload_index()
+
+    # --- index ---
+
+    def _reload_index(self):
+        """Re-reads index.json only when another process changed it (one stat per load)"""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except FileNotFoundError:
+            if self._index is None:
+                self._index = {"refined_dir": self.refined_dir, "latest": {}, "windows": {}}
+            return
+        if mtime != self._index_mtime:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+
+    def _check_root(self):
+        """Windows built from another refined root are dropped, so this cache is rebuilt from ours"""
+        built_for = self._index.get("refined_dir")
+        if built_for == self.refined_dir:
+            return
+        print(f"♻️ Hot cache in {self.cache_dir} was built from {built_for}; rebuilding from {self.refined_dir}")
+        for window in self._index["windows"].values():
+            self._remove_file(window["file"])
+        self._index = {"refined_dir": self.refined_dir, "latest": {}, "windows": {}}
+        self._save_index()
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+        self._index_mtime = os.stat(self.index_path).st_mtime_ns
+
+    @staticmethod
+    def _key(end, days):
+        return f"{end.isoformat()}:{days}"
+
+    def total_bytes(self):
+        return sum(w["bytes"] for w in self._index["windows"].values())
+
+    # --- windows ---
+
+    def _open(self, window):
+        with pa.memory_map(os.path.join(self.cache_dir, window["file"]), "r") as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def _write_window(self, table, dates, days):
+        """Writes one window file and registers it; evicts least recently used windows over budget"""
+        end = dates[-1]
+        name = f"window-{end.isoformat()}-{days}d-{uuid.uuid4().hex[:8]}.arrow"
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        key = self._key(end, days)
+        previous = self._index["windows"].get(key)
+        self._index["windows"][key] = {
+            "file": name,
+            "dates": [d.isoformat() for d in dates],
+            "rows": table.num_rows,
+            "bytes": os.path.getsize(path),
+            "last_access": time.time(),
+        }
+        if previous:
+            self._remove_file(previous["file"])
+        self._evict(keep=key)
+        self._save_index()
+        return key
+
+    def _remove_file(self, name):
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, keep):
+        windows = self._index["windows"]
+        for key, window in sorted(windows.items(), key=lambda item: item[1]["last_access"]):
+            if self.total_bytes() <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove_file(window["file"])
+            del windows[key]
+            self._index["latest"] = {d: k for d, k in self._index["latest"].items() if k != key}
+
+    def _build(self, days, end=None):
+        dates = [d for d in refined_dates(self.refined_dir) if end is None or d <= end][-days:]
+        if not dates:
+            raise FileNotFoundError(f"No refined partitions in {self.refined_dir}")
+        table = read_refined(date_range=(dates[0], dates[-1]), refined_dir=self.refined_dir)
+        table = table.sort_by([("date", "ascending"), ("ticker", "ascending")])
+        key = self._write_window(table, dates, days)
+        if end is None:
+            self._index["latest"][str(days)] = key
+            self._save_index()
+        return key
+
+    def load(self, days=HOT_CACHE_DEFAULT_DAYS, end=None):
+        """
+        The last `days` refined trading days up to `end` (latest when None) as a
+        pyarrow.Table memory-mapped from the cache, building the window on a miss.
+        """
+        self._reload_index()
+        self._check_root()
+        key = self._index["latest"].get(str(days)) if end is None else self._key(end, days)
+        window = self._index["windows"].get(key) if key else None
+        if window is None:
+            key = self._build(days, end)
+            window = self._index["windows"][key]
+        window["last_access"] = time.time()
+        return self._open(window)
+
+    def add_day(self, day):
+        """Called after `day` was (re)written in the refined layout (see `add_days`)"""
+        self.add_days([day])
+
+    def add_days(self, days):
+        """
+        Called after `days` were (re)written in the refined layout. Latest windows that end
+        before some of them are rolled forward reading only the new days they keep; windows
+        containing one of them are dropped.
+        """
+        isos = sorted({day.isoformat() for day in days})
+        if not isos:
+            return
+        self._reload_index()
+        self._check_root()
+        stale = [key for key, window in self._index["windows"].items()
+                 if any(window["dates"][0] <= iso <= window["dates"][-1] for iso in isos)]
+        for key in stale:
+            self._remove_file(self._index["windows"].pop(key)["file"])
+        self._index["latest"] = {d: k for d, k in self._index["latest"].items() if k not in stale}
+
+        for days, key in list(self._index["latest"].items()):
+            window = self._index["windows"].get(key)
+            if window is None:
+                continue
+            dates = (window["dates"] + [iso for iso in isos if iso > window["dates"][-1]])[-int(days):]
+            new = [iso for iso in dates if iso > window["dates"][-1]]
+            if not new:
+                continue
+            new_rows = read_refined(date_range=(new[0], new[-1]), refined_dir=self.refined_dir)
+            new_dates = pa.array([datetime.date.fromisoformat(iso) for iso in new], pa.date32())
+            new_rows = new_rows.filter(pc.is_in(new_rows["date"], value_set=new_dates))
+            new_rows = new_rows.sort_by([("date", "ascending"), ("ticker", "ascending")])
+            dates = [datetime.date.fromisoformat(iso) for iso in dates]
+            kept = self._open(window).filter(pc.field("date") >= dates[0])
+            table = pa.concat_tables([kept, new_rows.cast(kept.schema)])
+            self._index["latest"][days] = self._write_window(table, dates, int(days))
+        self._save_index()
+
+    def close(self):
+        """Persists the access times used by the LRU"""
+        if self._index is not None and os.path.exists(self.index_path):
+            self._save_index()
+
+
+def record_new_day(day, refined_dir):
+    """Writer hook: keeps the project's hot cache current when it exists and mirrors `refined_dir`"""
+    record_new_days([day], refined_dir)
+
+
+def record_new_days(days, refined_dir):
+    """Writer hook for a batch of refined days (one cache update for the whole batch)"""
+    index_path = os.path.join(PROJECT_ROOT, HOT_CACHE_DIR, INDEX_FILE)
+    if not days or not os.path.exists(index_path):
+        return
+    try:
+        cache = HotCache(refined_dir=refined_dir)
+        if cache._index.get("refined_dir") == cache.refined_dir:
+            cache.add_days(days)
+    except Exception as e:
+        label = days[0] if len(days) == 1 else f"{min(days)} → {max(days)}"
+        print(f"⚠️ Could not update the hot cache for {label}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm the hot cache and time cold/warm loads")
+    parser.add_argument("--days", type=int, default=HOT_CACHE_DEFAULT_DAYS)
+    parser.add_argument("--refined-dir", default=None)
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    cache = HotCache(args.cache_dir, args.refined_dir)
+    started = time.perf_counter()
+    table = cache.load(args.days)
+    cold = time.perf_counter() - started
+    warm = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        cache.load(args.days)
+        warm.append(time.perf_counter() - started)
+    cache.close()
+    warm.sort()
+    print(f"✅ {table.num_rows} rows ({args.days} days): first load {cold * 1000:.1f} ms, "
+          f"warm median {warm[len(warm) // 2] * 1000:.3f} ms, cache {cache.total_bytes() / 1024 / 1024:.1f} MB")
@@ -0,0 +1,290 @@
+"""
+Painel denso data × ação em arquivos NumPy mapeados em memória.
+
+Construído a partir dos Parquet brutos (data/raw/date=*/IBOVDia_*.parquet),
+com uma linha por pregão e uma coluna por ação:
+
+    PANEL_DIR/
+      meta.json                  linhas válidas, capacidade de colunas, colunas e dtypes
+      dates.npy                  datetime64[D], uma por linha
+      tickers.npy                códigos, um por coluna
+      quantidade_teorica-<capacidade>.bin   int64   (n_linhas, capacidade), 0 = fora da carteira
+      participacao_pct-<capacidade>.bin     float32 (n_linhas, capacidade), NaN = fora da carteira
+
+Os .bin são matrizes row-major, então acrescentar um pregão é só escrever uma
+linha no fim de cada arquivo. `meta.json` é gravado por último (de forma
+atômica) e é a referência de quantas linhas são válidas. Quando surge uma ação
+nova além da capacidade, as colunas são copiadas para arquivos com o dobro da
+largura, e os antigos só são apagados depois do novo meta.json.
+
+    panel = PanelStore()
+    panel.update()                                   # acrescenta os dias novos de data/raw
+    part = panel.values("participacao_pct")          # memmap (dias, ações)
+    media_20 = rolling(part, 20, "mean")
+    ranking = rank(part)                             # ranking entre ações a cada dia
+
+Uso:
+    python -m src.query.panel update
+    python -m src.query.panel show --tickers PETR4 VALE3 --window 20
+"""
+import argparse
+import json
+import os
+import uuid
+
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config.settings import PANEL_DIR, PROJECT_ROOT
+from src.extraction.csv_converter import PARTICIPATION_COLUMN, QUANTITY_COLUMN, TICKER_COLUMN
+from src.transform.partitions import raw_root
+
+# panel column -> (raw column, dtype, value for tickers outside the portfolio that day)
+PANEL_COLUMNS = {
+    "quantidade_teorica": (QUANTITY_COLUMN, "int64", 0),
+    "participacao_pct": (PARTICIPATION_COLUMN, "float32", np.nan),
+}
+INITIAL_CAPACITY = 128
+
+
+def _atomic_save(path, array):
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def daily_values(raw_path):
+    """(tickers, {panel column: values}) of one raw partition, summed per ticker"""
+    table = pq.read_table(raw_path, columns=[TICKER_COLUMN] + [raw for raw, _, _ in PANEL_COLUMNS.values()])
+    table = table.filter(pc.is_valid(table.column(TICKER_COLUMN)))
+    grouped = table.group_by([TICKER_COLUMN]).aggregate([(raw, "sum") for raw, _, _ in PANEL_COLUMNS.values()])
+    values = {
+        name: grouped.column(f"{raw}_sum").to_numpy(zero_copy_only=False).astype(dtype)
+        for name, (raw, dtype, _) in PANEL_COLUMNS.items()
+    }
+    return grouped.column(TICKER_COLUMN).to_pylist(), values
+
+
+class PanelStore:
+    """Append-only date × ticker matrices backed by memory-mapped files"""
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(PROJECT_ROOT, PANEL_DIR)
+        os.makedirs(self.root, exist_ok=True)
+        self.meta_path = os.path.join(self.root, "meta.json")
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+            self.dates = np.load(os.path.join(self.root, "dates.npy"))[:self.meta["rows"]]
+            self.tickers = [str(t) for t in np.load(os.path.join(self.root, "tickers.npy"))[:self.meta["tickers"]]]
+        else:
+            self.meta = {"rows": 0, "tickers": 0, "capacity": INITIAL_CAPACITY,
+                         "columns": {name: dtype for name, (_, dtype, _) in PANEL_COLUMNS.items()}}
+            self.dates = np.array([], dtype="datetime64[D]")
+            self.tickers = []
+        self._columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+    def _column_path(self, name, capacity=None):
+        # the width is part of the name so a widened copy never replaces the committed one in place
+        return os.path.join(self.root, f"{name}-{capacity or self.meta['capacity']}.bin")
+
+    def _row_bytes(self, name):
+        return np.dtype(self.meta["columns"][name]).itemsize * self.meta["capacity"]
+
+    # --- reading ---
+
+    def values(self, name):
+        """Read-only memmap of shape (days, tickers) for one panel column"""
+        rows, width = self.meta["rows"], len(self.tickers)
+        if rows == 0:
+            return np.empty((0, width), dtype=self.meta["columns"][name])
+        matrix = np.memmap(self._column_path(name), dtype=self.meta["columns"][name], mode="r",
+                           shape=(rows, self.meta["capacity"]))
+        return matrix[:, :width]
+
+    def ticker_index(self, tickers):
+        """Column positions of `tickers` (KeyError for unknown ones)"""
+        return np.array([self._columns[ticker] for ticker in tickers], dtype=np.int64)
+
+    def date_slice(self, start=None, end=None):
+        """Row slice covering [start, end] (dates or ISO strings)"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D"), "left"))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "D"), "right"))
+        return slice(lo, hi)
+
+    def last_date(self):
+        return self.dates[-1].astype(object) if len(self.dates) else None
+
+    # --- writing ---
+
+    def _grow(self, needed):
+        """
+        Copies every column into wider files once new tickers exceed the capacity.
+        Returns the old capacity, whose files are removed after the next commit.
+        """
+        old, capacity = self.meta["capacity"], self.meta["capacity"]
+        while capacity < needed:
+            capacity *= 2
+        rows = self.meta["rows"]
+        for name, (_, dtype, missing) in PANEL_COLUMNS.items():
+            widened = np.full((rows, capacity), missing, dtype=dtype)
+            if rows:
+                widened[:, :old] = np.memmap(self._column_path(name, old), dtype=dtype, mode="r", shape=(rows, old))
+            widened.tofile(self._column_path(name, capacity))
+        self.meta["capacity"] = capacity
+        return old
+
+    def _commit(self):
+        _atomic_save(os.path.join(self.root, "dates.npy"), self.dates)
+        _atomic_save(os.path.join(self.root, "tickers.npy"), np.array(self.tickers, dtype=str))
+        tmp_path = f"{self.meta_path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def append(self, day, raw_path):
+        """
+        Appends one trading day after the last one in the panel, or rewrites the row
+        of a day already stored. Earlier missing days need a rebuild (ValueError).
+        """
+        tickers, values = daily_values(raw_path)
+        day64 = np.datetime64(day, "D")
+        existing = int(np.searchsorted(self.dates, day64))
+        in_place = existing < len(self.dates) and self.dates[existing] == day64
+        if not in_place and existing < len(self.dates):
+            raise ValueError(f"{day} is before the last panel day {self.last_date()}; rebuild the panel")
+
+        for ticker in tickers:
+            if ticker not in self._columns:
+                self._columns[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+        replaced = self._grow(len(self.tickers)) if len(self.tickers) > self.meta["capacity"] else None
+        positions = self.ticker_index(tickers)
+
+        rows = self.meta["rows"]
+        for name, (_, dtype, missing) in PANEL_COLUMNS.items():
+            row = np.full(self.meta["capacity"], missing, dtype=dtype)
+            row[positions] = values[name]
+            with open(self._column_path(name), "r+b" if os.path.exists(self._column_path(name)) else "wb") as f:
+                f.seek((existing if in_place else rows) * self._row_bytes(name))
+                f.write(row.tobytes())
+                # drops a partial row left by an interrupted append
+                f.truncate((rows if in_place else rows + 1) * self._row_bytes(name))
+
+        if not in_place:
+            self.dates = np.append(self.dates, day64)
+            self.meta["rows"] = rows + 1
+        self.meta["tickers"] = len(self.tickers)
+        self._commit()
+        if replaced:
+            for name in PANEL_COLUMNS:
+                if os.path.exists(self._column_path(name, replaced)):
+                    os.remove(self._column_path(name, replaced))
+
+    def update(self, raw_dir=None):
+        """Appends every raw partition newer than the last panel day. Returns how many were added"""
+        from src.catalog.partition_catalog import resolve_raw_partitions
+        last = self.last_date()
+        partitions = resolve_raw_partitions(raw_dir or raw_root())
+        added = 0
+        for day, path in partitions:
+            if last is None or day > last:
+                self.append(day, path)
+                added += 1
+        return added
+
+
+# --- vectorized operations on (days, tickers) arrays, along the time axis unless noted ---
+
+def _as_float(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def rolling(values, window, how="mean", min_periods=None):
+    """
+    Rolling `how` ("sum", "mean" or "std") over `window` days, skipping NaN. A cell is
+    NaN when its window has fewer than `min_periods` valid values (default: the whole window).
+    """
+    values = _as_float(values)
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    pad = np.zeros((1, values.shape[1]))
+
+    def windowed(a):
+        cumulative = np.concatenate([pad, np.cumsum(a, axis=0)])
+        return cumulative[window:] - cumulative[:-window]
+
+    result = np.full(values.shape, np.nan)
+    if window > len(values):
+        return result
+    total, count = windowed(filled), windowed(valid.astype(np.float64))
+    enough = count >= (window if min_periods is None else max(min_periods, 1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if how == "sum":
+            out = total
+        elif how == "mean":
+            out = total / count
+        elif how == "std":
+            mean = total / count
+            variance = (windowed(filled * filled) - count * mean * mean) / (count - 1)
+            out = np.sqrt(np.clip(variance, 0.0, None))
+        else:
+            raise ValueError(f"Unknown rolling aggregation: {how}")
+    result[window - 1:] = np.where(enough, out, np.nan)
+    return result
+
+
+def diff(values, periods=1):
+    """values[t] - values[t - periods]; the first `periods` rows are NaN"""
+    values = _as_float(values)
+    result = np.full(values.shape, np.nan)
+    if periods < len(values):
+        result[periods:] = values[periods:] - values[:-periods]
+    return result
+
+
+def rank(values, descending=True):
+    """
+    Cross-sectional rank of each ticker within its day (1 = largest by default); ties
+    are broken by column order and NaN stays NaN.
+    """
+    values = _as_float(values)
+    keys = -values if descending else values
+    order = np.argsort(np.where(np.isnan(keys), np.inf, keys), axis=1, kind="stable")
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, np.arange(1, values.shape[1] + 1, dtype=np.float64)[None, :], axis=1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense date × ticker panel over data/raw")
+    parser.add_argument("command", choices=["update", "show"])
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--panel-dir", default=None)
+    parser.add_argument("--tickers", nargs="+", default=None)
+    parser.add_argument("--column", default="participacao_pct", choices=sorted(PANEL_COLUMNS))
+    parser.add_argument("--window", type=int, default=20)
+    parser.add_argument("--last", type=int, default=10, help="Days to print")
+    args = parser.parse_args()
+
+    panel = PanelStore(args.panel_dir)
+    if args.command == "update":
+        added = panel.update(args.raw_dir)
+        print(f"✅ Panel: {added} day(s) appended, {len(panel.dates)} days × {len(panel.tickers)} tickers")
+    else:
+        import pandas as pd
+        tickers = args.tickers or panel.tickers[:5]
+        columns = panel.ticker_index(tickers)
+        values = panel.values(args.column)
+        frames = {
+            args.column: np.asarray(values[-args.last:, columns], dtype=np.float64),
+            f"rolling_mean_{args.window}": rolling(values[:, columns], args.window)[-args.last:],
+            "rank": rank(values)[-args.last:, columns],
+        }
+        index = pd.DatetimeIndex(panel.dates[-args.last:])
+        for label, matrix in frames.items():
+            print(f"\n📊 {label}")
+            print(pd.DataFrame(matrix, index=index, columns=tickers).to_string())
@@ -0,0 +1,139 @@
+"""
+Leitura seletiva dos dados refinados com pushdown de filtros.
+
+    from src.query.reader import read_refined
+
+    table = read_refined(
+        columns=["date", "ticker", "participacao_pct"],
+        date_range=("2024-01-01", "2024-01-31"),
+        tickers=["PETR4", "VALE3"],
+        filters=[("participacao_pct", ">", 1.0)],
+    )
+
+Em vez de `pd.read_parquet` sobre arquivos inteiros:
+
+  * a lista de arquivos vem do catálogo de partições (quando sincronizado) ou
+    da poda de diretórios date=/ticker=, então só as partições pedidas são abertas;
+  * `filters` (expressão pyarrow ou lista no formato do pandas/pyarrow) é
+    avaliado contra as estatísticas min/max de cada row group antes da leitura;
+  * só as colunas pedidas são decodificadas;
+  * arquivos locais são lidos por memory map;
+  * `as_pandas=True` converte com split_blocks/self_destruct, sem cópia extra
+    da tabela Arrow.
+
+source="compact" lê a cópia mensal (REFINED_COMPACT_DIR). Os meses fora do
+intervalo são descartados pelo nome do diretório e o resto pelas estatísticas.
+"""
+import datetime
+import os
+
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from config.settings import CATALOG_ENABLED, CATALOG_PATH, PROJECT_ROOT
+from src.transform.compaction import compact_root
+from src.transform.partitions import partition_date, refined_root
+from src.transform.refine import REFINED_PARTITIONING, REFINED_SCHEMA
+
+MMAP_FILESYSTEM = pafs.LocalFileSystem(use_mmap=True)
+
+
+def _as_date(value):
+    if value is None or isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value)
+
+
+def build_expression(date_range=None, tickers=None, filters=None):
+    """Combines the date range, ticker list and extra filters into one pyarrow expression (or None)"""
+    start, end = (_as_date(v) for v in (date_range or (None, None)))
+    parts = []
+    if start:
+        parts.append(ds.field("date") >= start)
+    if end:
+        parts.append(ds.field("date") <= end)
+    if tickers:
+        parts.append(ds.field("ticker").isin(list(tickers)))
+    if filters is not None:
+        parts.append(filters if isinstance(filters, ds.Expression) else pq.filters_to_expression(filters))
+    expression = None
+    for part in parts:
+        expression = part if expression is None else expression & part
+    return expression
+
+
+def _catalog_files(refined_dir, start, end, tickers):
+    """Files of the requested partitions from a synced catalog, or None when the catalog can't answer"""
+    catalog_file = os.path.join(PROJECT_ROOT, CATALOG_PATH)
+    if not CATALOG_ENABLED or not os.path.exists(catalog_file):
+        return None
+    from src.catalog.partition_catalog import PartitionCatalog
+    with PartitionCatalog(catalog_file) as catalog:
+        if not catalog.is_complete("refined", refined_dir):
+            return None
+        return catalog.files("refined", start, end, tickers)
+
+
+def _listed_files(refined_dir, start, end, tickers):
+    """Prunes date=/ticker= directories by name, opening only the ones that match"""
+    wanted = set(tickers) if tickers else None
+    files = []
+    try:
+        entries = sorted(os.scandir(refined_dir), key=lambda e: e.name)
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        day = partition_date(entry.name)
+        if day is None or (start and day < start) or (end and day > end):
+            continue
+        for ticker_entry in os.scandir(entry.path):
+            if not ticker_entry.name.startswith("ticker="):
+                continue
+            if wanted is not None and ticker_entry.name[len("ticker="):] not in wanted:
+                continue
+            files.extend(os.path.join(ticker_entry.path, name) for name in os.listdir(ticker_entry.path)
+                         if name.endswith(".parquet"))
+    return files
+
+
+def refined_dataset(refined_dir=None, date_range=None, tickers=None, source="refined", compact_dir=None):
+    """Dataset restricted (by path) to the partitions that can hold rows of the request"""
+    start, end = (_as_date(v) for v in (date_range or (None, None)))
+    if source == "compact":
+        compact_dir = compact_dir or compact_root()
+        files = []
+        for name in sorted(os.listdir(compact_dir)) if os.path.isdir(compact_dir) else []:
+            if not name.startswith("month="):
+                continue
+            month = name[len("month="):]
+            if (start and month < start.strftime("%Y-%m")) or (end and month > end.strftime("%Y-%m")):
+                continue
+            month_dir = os.path.join(compact_dir, name)
+            files.extend(os.path.join(month_dir, f) for f in sorted(os.listdir(month_dir)) if f.endswith(".parquet"))
+        return ds.dataset(files, schema=REFINED_SCHEMA, format="parquet", filesystem=MMAP_FILESYSTEM)
+    if source != "refined":
+        raise ValueError(f"Unknown source: {source}")
+
+    refined_dir = os.path.abspath(refined_dir or refined_root())
+    files = _catalog_files(refined_dir, start, end, tickers)
+    if files is None:
+        files = _listed_files(refined_dir, start, end, tickers)
+    return ds.dataset(files, schema=REFINED_SCHEMA, format="parquet", filesystem=MMAP_FILESYSTEM,
+                      partitioning=REFINED_PARTITIONING, partition_base_dir=refined_dir)
+
+
+def read_refined(columns=None, date_range=None, tickers=None, filters=None, refined_dir=None,
+                 source="refined", compact_dir=None, as_pandas=False):
+    """
+    Reads refined rows for `date_range` (inclusive (start, end), dates or ISO strings)
+    and `tickers`, keeping only `columns` and rows matching `filters`.
+
+    Returns a pyarrow.Table, or a pandas DataFrame when as_pandas=True.
+    """
+    dataset = refined_dataset(refined_dir, date_range, tickers, source, compact_dir)
+    table = dataset.to_table(columns=columns, filter=build_expression(date_range, tickers, filters))
+    if as_pandas:
+        # Arrow buffers are released column by column while the DataFrame is built
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    return table
@@ -0,0 +1,205 @@
+"""
+Cubo materializado setor × dia para os gráficos do Requisito 9.
+
+Os gráficos de participação por "Setor de Atuação" ao longo do tempo
+agrupavam todas as linhas de todas as ações a cada renderização. Aqui os
+agregados ficam numa tabela SQLite (SECTOR_CUBE_PATH), uma linha por (dia, setor):
+
+    participacao_pct     soma da participação das ações do setor
+    quantidade_teorica   soma da quantidade teórica
+    constituintes        número de ações do setor na carteira do dia
+
+Quando uma partição bruta chega (conversão, referência de deduplicação ou
+sink local), `record_sector_day` substitui só as linhas daquele dia, numa
+transação. O cubo é construído uma vez com `build` e fica associado a essa
+raiz de dados brutos; árvores temporárias/benchmarks não o alteram.
+
+    cube = SectorCube()
+    df = cube.series("participacao_pct", start="2024-01-01", freq="month")   # datas × setores
+
+Uso:
+    python -m src.query.sector_cube build
+    python -m src.query.sector_cube show --measure participacao_pct --freq month
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config.settings import PROJECT_ROOT, SECTOR_CUBE_PATH
+from src.extraction.csv_converter import PARTICIPATION_COLUMN, QUANTITY_COLUMN, SECTOR_COLUMN, TICKER_COLUMN
+from src.transform.partitions import raw_root
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cube_info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sector_day (
+    date TEXT NOT NULL,
+    setor TEXT NOT NULL,
+    participacao_pct REAL NOT NULL,
+    quantidade_teorica INTEGER NOT NULL,
+    constituintes INTEGER NOT NULL,
+    PRIMARY KEY (date, setor)
+) WITHOUT ROWID
+"""
+
+MEASURES = ("participacao_pct", "quantidade_teorica", "constituintes")
+FREQUENCIES = {"day": "date", "month": "substr(date, 1, 7)", "year": "substr(date, 1, 4)"}
+
+
+def sector_aggregates(raw_path):
+    """[(setor, participation, quantity, constituents)] for one raw partition"""
+    table = pq.read_table(raw_path, columns=[SECTOR_COLUMN, TICKER_COLUMN, PARTICIPATION_COLUMN, QUANTITY_COLUMN])
+    table = table.filter(pc.is_valid(table.column(TICKER_COLUMN)))
+    grouped = table.group_by([SECTOR_COLUMN]).aggregate([
+        (PARTICIPATION_COLUMN, "sum"),
+        (QUANTITY_COLUMN, "sum"),
+        (TICKER_COLUMN, "count_distinct"),
+    ])
+    return list(zip(
+        (sector or "" for sector in grouped.column(SECTOR_COLUMN).to_pylist()),
+        (value or 0.0 for value in grouped.column(f"{PARTICIPATION_COLUMN}_sum").to_pylist()),
+        (value or 0 for value in grouped.column(f"{QUANTITY_COLUMN}_sum").to_pylist()),
+        grouped.column(f"{TICKER_COLUMN}_count_distinct").to_pylist(),
+    ))
+
+
+class SectorCube:
+    """Sector × day aggregates in SQLite, maintained one day at a time"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(PROJECT_ROOT, SECTOR_CUBE_PATH)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # --- maintenance ---
+
+    def raw_dir(self):
+        row = self.connection.execute("SELECT value FROM cube_info WHERE key = 'raw_dir'").fetchone()
+        return row[0] if row else None
+
+    def update_day(self, day, raw_path):
+        """Replaces the rows of `day` with the aggregates of its raw partition"""
+        rows = sector_aggregates(raw_path)
+        with self.connection:
+            self.connection.execute("DELETE FROM sector_day WHERE date = ?", (day.isoformat(),))
+            self.connection.executemany(
+                "INSERT INTO sector_day (date, setor, participacao_pct, quantidade_teorica, constituintes) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(day.isoformat(),) + row for row in rows],
+            )
+        return len(rows)
+
+    def days(self):
+        return [datetime.date.fromisoformat(d) for d, in
+                self.connection.execute("SELECT DISTINCT date FROM sector_day ORDER BY date")]
+
+    def build(self, raw_dir=None):
+        """Aggregates every raw partition and ties the cube to `raw_dir` (later writes there update it)"""
+        from src.catalog.partition_catalog import resolve_raw_partitions
+        raw_dir = os.path.abspath(raw_dir or raw_root())
+        partitions = resolve_raw_partitions(raw_dir)
+        with self.connection:
+            self.connection.execute("DELETE FROM sector_day")
+        for day, path in partitions:
+            self.update_day(day, path)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO cube_info (key, value) VALUES ('raw_dir', ?)", (raw_dir,))
+        print(f"✅ Sector cube built from {len(partitions)} partitions of {raw_dir}")
+        return len(partitions)
+
+    # --- queries ---
+
+    def query(self, measure="participacao_pct", start=None, end=None, sectors=None, freq="day"):
+        """
+        [(period, setor, value)] for `measure`. Periods coarser than a day average the
+        daily values of the period.
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: {measure}")
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency: {freq}")
+        period = FREQUENCIES[freq]
+        clauses, params = [], []
+        if start:
+            clauses.append("date >= ?")
+            params.append(str(start))
+        if end:
+            clauses.append("date <= ?")
+            params.append(str(end))
+        if sectors:
+            clauses.append(f"setor IN ({', '.join('?' for _ in sectors)})")
+            params.extend(sectors)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        value = measure if freq == "day" else f"avg({measure})"
+        group = "" if freq == "day" else "GROUP BY 1, 2"
+        return self.connection.execute(
+            f"SELECT {period}, setor, {value} FROM sector_day {where} {group} ORDER BY 1, 2", params
+        ).fetchall()
+
+    def series(self, measure="participacao_pct", start=None, end=None, sectors=None, freq="day"):
+        """pandas DataFrame (period × sector) ready to plot"""
+        import pandas as pd
+        df = pd.DataFrame(self.query(measure, start, end, sectors, freq), columns=["period", "setor", measure])
+        return df.pivot(index="period", columns="setor", values=measure)
+
+    def top_sectors(self, day=None, n=5, measure="participacao_pct"):
+        """Largest sectors by `measure` on `day` (latest day by default)"""
+        if measure not in MEASURES:
+            raise ValueError(f"Unknown measure: {measure}")
+        day = str(day) if day else self.connection.execute("SELECT max(date) FROM sector_day").fetchone()[0]
+        return self.connection.execute(
+            f"SELECT setor, {measure} FROM sector_day WHERE date = ? ORDER BY 2 DESC LIMIT ?", (day, n)
+        ).fetchall()
+
+
+def record_sector_day(day, raw_path, raw_dir, cube_path=None):
+    """
+    Writer hook: refreshes `day` in the project's cube when it exists and was built from
+    `raw_dir`. Failures never fail the write; `build` repairs the cube.
+    """
+    cube_file = cube_path or os.path.join(PROJECT_ROOT, SECTOR_CUBE_PATH)
+    if not os.path.exists(cube_file):
+        return
+    try:
+        with SectorCube(cube_file) as cube:
+            if cube.raw_dir() == os.path.abspath(raw_dir):
+                cube.update_day(day, raw_path)
+    except Exception as e:
+        print(f"⚠️ Could not update the sector cube for {day}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sector × day aggregate cube")
+    parser.add_argument("command", choices=["build", "show"])
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--cube", default=None)
+    parser.add_argument("--measure", choices=MEASURES, default="participacao_pct")
+    parser.add_argument("--freq", choices=sorted(FREQUENCIES), default="month")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--sectors", nargs="+", default=None)
+    args = parser.parse_args()
+
+    with SectorCube(args.cube) as cube:
+        if args.command == "build":
+            cube.build(args.raw_dir)
+        else:
+            print(cube.series(args.measure, args.start, args.end, args.sectors, args.freq).to_string())
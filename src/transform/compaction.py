@@ -0,0 +1,137 @@
+"""
+Compactação dos dados refinados em arquivos maiores, otimizados para consulta.
+
+O layout exigido pelo Requisito 6 (date=*/ticker=*/part-0.parquet) gera ~90
+arquivos minúsculos por pregão. A compactação reescreve cada mês desse layout
+em um único arquivo REFINED_COMPACT_DIR/month=YYYY-MM/part-0.parquet, com as
+colunas date e ticker materializadas, linhas ordenadas por (date, ticker) e row
+groups dimensionados para que as estatísticas min/max permitam pular dados.
+
+O layout por data/ação continua sendo a saída oficial do refinamento; a cópia
+compacta é trocada de forma atômica por mês e registrada no manifesto
+(tabela compacted_months), de modo que só meses alterados são refeitos.
+
+Uso:
+    python -m src.transform.compaction [--start 2024-01-01] [--end 2024-12-31] [--force]
+"""
+import argparse
+import datetime
+import os
+import time
+from collections import defaultdict
+
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config.settings import (
+    COMPACT_ROW_GROUP_SIZE,
+    PARQUET_COMPRESSION,
+    PARQUET_COMPRESSION_LEVEL,
+    PROJECT_ROOT,
+    REFINED_COMPACT_DIR,
+)
+from src.transform.manifest import RefineManifest
+from src.transform.partitions import atomic_replace_dir, partition_date, refined_root, staging_dir
+from src.transform.refine import REFINED_PARTITIONING, REFINED_SCHEMA
+
+COMPACT_FILE_NAME = "part-0.parquet"
+DICTIONARY_COLUMNS = ["ticker", "acao", "tipo", "setor"]
+
+
+def compact_root():
+    return os.path.join(PROJECT_ROOT, REFINED_COMPACT_DIR)
+
+
+def refined_months(refined_dir, start=None, end=None):
+    """{'YYYY-MM': [date directories]} for refined partitions in [start, end]"""
+    months = defaultdict(list)
+    try:
+        entries = list(os.scandir(refined_dir))
+    except FileNotFoundError:
+        return {}
+    for entry in entries:
+        day = partition_date(entry.name)
+        if day is None or not entry.is_dir():
+            continue
+        if (start and day < start) or (end and day > end):
+            continue
+        months[day.strftime("%Y-%m")].append(entry.path)
+    return {month: sorted(paths) for month, paths in sorted(months.items())}
+
+
+def _month_files(date_directories):
+    files = []
+    for date_directory in date_directories:
+        for root, _, names in os.walk(date_directory):
+            files.extend(os.path.join(root, name) for name in names if name.endswith(".parquet"))
+    return sorted(files)
+
+
+def source_signature(date_directories):
+    """Changes whenever a date partition of the month is added, removed or swapped"""
+    newest = max(os.stat(path).st_mtime_ns for path in date_directories)
+    return f"{len(date_directories)}:{newest}"
+
+
+def compact_month(month, date_directories, refined_dir, compact_dir, row_group_size=COMPACT_ROW_GROUP_SIZE):
+    """Rewrites one month of refined partitions into a single sorted Parquet file"""
+    files = _month_files(date_directories)
+    dataset = ds.dataset(files, format="parquet", partitioning=REFINED_PARTITIONING,
+                         partition_base_dir=refined_dir)
+    table = dataset.to_table().select(REFINED_SCHEMA.names)
+    table = table.cast(REFINED_SCHEMA).sort_by([("date", "ascending"), ("ticker", "ascending")])
+
+    os.makedirs(compact_dir, exist_ok=True)
+    staging = staging_dir(compact_dir, month)
+    pq.write_table(
+        table,
+        os.path.join(staging, COMPACT_FILE_NAME),
+        compression=PARQUET_COMPRESSION,
+        compression_level=PARQUET_COMPRESSION_LEVEL,
+        use_dictionary=DICTIONARY_COLUMNS,
+        write_statistics=True,
+        row_group_size=row_group_size,
+    )
+    target = os.path.join(compact_dir, f"month={month}")
+    atomic_replace_dir(staging, target)
+    return {"month": month, "path": target, "source_files": len(files), "rows": table.num_rows}
+
+
+def compact(refined_dir=None, compact_dir=None, start=None, end=None, manifest_path=None, force=False):
+    """Compacts every month in [start, end] whose refined partitions changed since the last run"""
+    refined_dir = refined_dir or refined_root()
+    compact_dir = compact_dir or compact_root()
+    months = refined_months(refined_dir, start, end)
+
+    started = time.perf_counter()
+    results = []
+    with RefineManifest(manifest_path, refined_dir) as manifest:
+        for month, date_directories in months.items():
+            signature = source_signature(date_directories)
+            previous = manifest.get_compaction(month)
+            target = os.path.join(compact_dir, f"month={month}")
+            if (not force and previous and previous["source_signature"] == signature
+                    and os.path.exists(os.path.join(target, COMPACT_FILE_NAME))):
+                continue
+            result = compact_month(month, date_directories, refined_dir, compact_dir)
+            manifest.record_compaction(month, result["path"], len(date_directories),
+                                       result["source_files"], result["rows"], signature)
+            results.append(result)
+
+    elapsed = time.perf_counter() - started
+    source_files = sum(r["source_files"] for r in results)
+    print(f"✅ Compacted {len(results)} of {len(months)} months: "
+          f"{source_files} files → {len(results)} files in {elapsed:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact refined partitions into one file per month")
+    parser.add_argument("--refined-dir", default=None)
+    parser.add_argument("--compact-dir", default=None)
+    parser.add_argument("--manifest", default=None)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    compact(args.refined_dir, args.compact_dir, args.start, args.end, args.manifest, args.force)
@@ -0,0 +1,63 @@
+"""
+Refinamento incremental guiado pelo manifesto.
+
+Só partições brutas novas ou alteradas (checksum diferente do manifesto) são
+refinadas. Quando o gatilho informa as chaves que chegaram (ex.: o evento S3 do
+`lambda_handler`), apenas as datas dessas chaves são examinadas, então o custo
+de cada execução depende do volume novo e não do histórico.
+
+Uso:
+    python -m src.transform.incremental                         # varre data/raw
+    python -m src.transform.incremental raw/date=2024-01-02/IBOVDia_02-01-24.parquet
+"""
+import argparse
+import time
+
+from src.catalog.partition_catalog import resolve_raw_partitions
+from src.transform.manifest import RefineManifest
+from src.transform.partitions import dates_from_keys, raw_partition_path, raw_root
+from src.transform.refine import refine_partition
+
+
+def refine_incremental(raw_dir=None, refined_dir=None, manifest_path=None, keys=None, force=False):
+    """
+    Refines new/changed raw partitions and records them in the manifest.
+
+    Args:
+        keys: optional S3 keys or paths; when given only their dates are considered
+        force: refine the selected partitions even if the manifest says they are current
+    """
+    raw_dir = raw_dir or raw_root()
+    if keys:
+        partitions = [(day, raw_partition_path(day, raw_dir)) for day in dates_from_keys(keys)]
+        partitions = [(day, path) for day, path in partitions if path]
+    else:
+        partitions = resolve_raw_partitions(raw_dir)
+
+    started = time.perf_counter()
+    results = []
+    with RefineManifest(manifest_path, refined_dir) as manifest:
+        entries = manifest.entries()
+        for day, raw_path in partitions:
+            needs_refine, checksum = manifest.needs_refine(day, raw_path, entries.get(day))
+            if not needs_refine and not force:
+                continue
+            result = refine_partition(day, raw_path, refined_dir)
+            # The refined partition is already swapped in; only then is it recorded
+            manifest.record(day, raw_path, checksum, result["raw_rows"], result["rows"])
+            results.append(result)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Incremental refine: {len(results)} of {len(partitions)} partitions refined in {elapsed:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refine only new or changed raw partitions")
+    parser.add_argument("keys", nargs="*", help="S3 keys or paths containing date=YYYY-MM-DD")
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--refined-dir", default=None)
+    parser.add_argument("--manifest", default=None)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+    refine_incremental(args.raw_dir, args.refined_dir, args.manifest, args.keys, args.force)
@@ -0,0 +1,166 @@
+"""
+Manifesto persistente (SQLite) das partições brutas já refinadas.
+
+Para cada partição data/raw/date=YYYY-MM-DD guarda o arquivo de origem, o
+checksum SHA-256, tamanho/mtime (para detectar mudanças sem reler o arquivo),
+o número de linhas e o momento do refinamento.
+
+O manifesto padrão acompanha a raiz refinada: REFINE_MANIFEST_PATH para
+data/refined e <refined_dir>_manifest.sqlite para qualquer outra raiz, para que
+refinar em outro diretório nunca marque partições no manifesto do projeto.
+"""
+import datetime
+import hashlib
+import os
+import sqlite3
+
+from config.settings import PROJECT_ROOT, REFINE_MANIFEST_PATH
+from src.transform.partitions import refined_root
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refined_partitions (
+    date TEXT PRIMARY KEY,
+    raw_path TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    refined_rows INTEGER NOT NULL,
+    refined_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS compacted_months (
+    month TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    source_partitions INTEGER NOT NULL,
+    source_files INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    source_signature TEXT NOT NULL,
+    compacted_at TEXT NOT NULL
+)
+"""
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_manifest_path(refined_dir=None):
+    """The project manifest for the project's refined root, a sibling file for any other root"""
+    refined_dir = os.path.abspath(refined_dir or refined_root())
+    if refined_dir == os.path.abspath(refined_root()):
+        return os.path.join(PROJECT_ROOT, REFINE_MANIFEST_PATH)
+    return refined_dir.rstrip(os.sep) + "_manifest.sqlite"
+
+
+class RefineManifest:
+    """Acesso ao manifesto de refinamento"""
+
+    def __init__(self, path=None, refined_dir=None):
+        self.path = path or default_manifest_path(refined_dir)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def get(self, day):
+        row = self.connection.execute(
+            "SELECT raw_path, checksum, size, mtime_ns, row_count, refined_rows, refined_at "
+            "FROM refined_partitions WHERE date = ?",
+            (day.isoformat(),),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("raw_path", "checksum", "size", "mtime_ns", "row_count", "refined_rows", "refined_at")
+        return dict(zip(keys, row))
+
+    def entries(self):
+        """{date: entry} for every refined partition"""
+        rows = self.connection.execute("SELECT date, checksum, size, mtime_ns FROM refined_partitions")
+        return {
+            datetime.date.fromisoformat(d): {"checksum": c, "size": s, "mtime_ns": m}
+            for d, c, s, m in rows
+        }
+
+    def needs_refine(self, day, raw_path, entry=None):
+        """
+        Returns (needs refine, checksum or None). Unchanged size and mtime skip the
+        hash entirely; a touched file with identical content only refreshes the stat.
+        """
+        entry = entry if entry is not None else self.get(day)
+        stat = os.stat(raw_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return False, entry["checksum"]
+        checksum = file_checksum(raw_path)
+        if entry and entry["checksum"] == checksum:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE refined_partitions SET size = ?, mtime_ns = ? WHERE date = ?",
+                    (stat.st_size, stat.st_mtime_ns, day.isoformat()),
+                )
+            return False, checksum
+        return True, checksum
+
+    def record(self, day, raw_path, checksum, row_count, refined_rows):
+        stat = os.stat(raw_path)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO refined_partitions "
+                "(date, raw_path, checksum, size, mtime_ns, row_count, refined_rows, refined_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    day.isoformat(),
+                    raw_path,
+                    checksum,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    row_count,
+                    refined_rows,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                ),
+            )
+
+    def forget(self, day):
+        with self.connection:
+            self.connection.execute("DELETE FROM refined_partitions WHERE date = ?", (day.isoformat(),))
+
+    def get_compaction(self, month):
+        row = self.connection.execute(
+            "SELECT path, source_partitions, source_files, rows, source_signature, compacted_at "
+            "FROM compacted_months WHERE month = ?",
+            (month,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("path", "source_partitions", "source_files", "rows", "source_signature", "compacted_at")
+        return dict(zip(keys, row))
+
+    def record_compaction(self, month, path, source_partitions, source_files, rows, source_signature):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO compacted_months "
+                "(month, path, source_partitions, source_files, rows, source_signature, compacted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    month,
+                    path,
+                    source_partitions,
+                    source_files,
+                    rows,
+                    source_signature,
+                    datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                ),
+            )
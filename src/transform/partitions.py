@@ -0,0 +1,148 @@
+"""
+Descoberta de partições date=YYYY-MM-DD e troca atômica de diretórios.
+
+Uma partição bruta idêntica à anterior (src/extraction/dedup.py) guarda só
+<INDEX>Dia_DD-MM-YY.ref.json, que aponta para o Parquet do snapshot original.
+A descoberta resolve essa referência: o dia aparece com o caminho do arquivo
+referenciado.
+
+Cada índice tem a sua raiz bruta: o índice padrão (B3_DEFAULT_INDEX) usa
+data/raw/date=*, os demais data/raw/index=<INDEX>/date=* (no S3, o mesmo sufixo
+index=<INDEX>/ depois de S3_PREFIX_RAW). Assim a descoberta, os ganchos de
+escrita e a deduplicação do índice padrão nunca veem arquivos de outro índice.
+Sem `root`, a descoberta usa a raiz do índice pedido.
+"""
+import datetime
+import json
+import os
+import re
+import shutil
+import uuid
+
+from config.settings import B3_DEFAULT_INDEX, PROJECT_ROOT, RAW_DATA_DIR, REFINED_DATA_DIR
+
+REFERENCE_SUFFIX = ".ref.json"
+
+
+def raw_root(index=B3_DEFAULT_INDEX):
+    return index_raw_root(os.path.join(PROJECT_ROOT, RAW_DATA_DIR), index)
+
+
+def index_raw_root(base, index=B3_DEFAULT_INDEX):
+    """Raw root of `index` under `base`: base itself for the default index, base/index=<INDEX> otherwise"""
+    return base if index == B3_DEFAULT_INDEX else os.path.join(base, f"index={index}")
+
+
+def index_raw_prefix(prefix, index=B3_DEFAULT_INDEX):
+    """S3 counterpart of index_raw_root: raw/ for the default index, raw/index=<INDEX>/ otherwise"""
+    return prefix if index == B3_DEFAULT_INDEX else f"{prefix}index={index}/"
+
+
+def refined_root():
+    return os.path.join(PROJECT_ROOT, REFINED_DATA_DIR)
+
+
+def partition_date(directory_name):
+    """'date=2024-01-02' -> datetime.date(2024, 1, 2); None for anything else"""
+    if not directory_name.startswith("date="):
+        return None
+    try:
+        return datetime.date.fromisoformat(directory_name[len("date="):])
+    except ValueError:
+        return None
+
+
+def raw_file_pattern(index=B3_DEFAULT_INDEX, extension="parquet"):
+    """Matches the canonical <INDEX>Dia_DD-MM-YY.<ext> file (not the _<view> variants)"""
+    return re.compile(rf"^{re.escape(index)}Dia_\d{{2}}-\d{{2}}-\d{{2}}\.{extension}$")
+
+
+def raw_reference_pattern(index=B3_DEFAULT_INDEX):
+    """Matches the <INDEX>Dia_DD-MM-YY.ref.json left by deduplication in place of the Parquet"""
+    return re.compile(rf"^{re.escape(index)}Dia_\d{{2}}-\d{{2}}-\d{{2}}{re.escape(REFERENCE_SUFFIX)}$")
+
+
+def read_raw_reference(reference_path):
+    """Parquet file a dedup reference points to, or None when it (or its target) is missing"""
+    try:
+        with open(reference_path, "r", encoding="utf-8") as f:
+            target = json.load(f)["target"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    target = os.path.normpath(os.path.join(os.path.dirname(reference_path), target))
+    return target if os.path.exists(target) else None
+
+
+def list_raw_partitions(root=None, index=B3_DEFAULT_INDEX, start=None, end=None):
+    """
+    Sorted list of (date, parquet path) for raw partitions that have the
+    canonical Parquet file, optionally restricted to [start, end].
+    """
+    root = root or raw_root(index)
+    pattern = raw_file_pattern(index)
+    reference = raw_reference_pattern(index)
+    partitions = []
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return partitions
+    for entry in entries:
+        day = partition_date(entry.name)
+        if day is None or not entry.is_dir():
+            continue
+        if (start and day < start) or (end and day > end):
+            continue
+        found = None
+        for name in os.listdir(entry.path):
+            if pattern.match(name):
+                found = os.path.join(entry.path, name)
+                break
+            if reference.match(name):
+                found = read_raw_reference(os.path.join(entry.path, name))
+        if found:
+            partitions.append((day, found))
+    return sorted(partitions)
+
+
+def raw_partition_path(day, root=None, index=B3_DEFAULT_INDEX):
+    """Canonical Parquet file of a single raw partition, looking only inside its date= directory"""
+    date_directory = os.path.join(root or raw_root(index), f"date={day.isoformat()}")
+    path = os.path.join(date_directory, f"{index}Dia_{day.strftime('%d-%m-%y')}.parquet")
+    if os.path.exists(path):
+        return path
+    return read_raw_reference(os.path.join(date_directory, f"{index}Dia_{day.strftime('%d-%m-%y')}{REFERENCE_SUFFIX}"))
+
+
+def dates_from_keys(keys):
+    """Partition dates referenced by S3 keys or local paths containing a date=YYYY-MM-DD segment"""
+    dates = set()
+    for key in keys:
+        for segment in key.replace("\\", "/").split("/"):
+            day = partition_date(segment)
+            if day:
+                dates.add(day)
+                break
+    return sorted(dates)
+
+
+def staging_dir(root, label):
+    """A unique hidden directory next to the final location (same filesystem, so rename is atomic)"""
+    path = os.path.join(root, f".staging-{label}-{uuid.uuid4().hex[:8]}")
+    os.makedirs(path)
+    return path
+
+
+def atomic_replace_dir(staging_path, target_path):
+    """
+    Swaps `staging_path` into `target_path`. Readers see either the old or the new
+    directory; the old one is moved aside first and removed after the swap.
+    """
+    parent = os.path.dirname(target_path)
+    os.makedirs(parent, exist_ok=True)
+    trash_path = None
+    if os.path.exists(target_path):
+        trash_path = os.path.join(parent, f".trash-{os.path.basename(target_path)}-{uuid.uuid4().hex[:8]}")
+        os.replace(target_path, trash_path)
+    os.replace(staging_path, target_path)
+    if trash_path:
+        shutil.rmtree(trash_path, ignore_errors=True)
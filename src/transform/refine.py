@@ -0,0 +1,263 @@
+"""
+Refinamento local: as transformações do job Glue `bovespa-etl-job` em pyarrow.
+
+Para cada partição bruta data/raw/date=YYYY-MM-DD/IBOVDia_DD-MM-YY.parquet:
+
+    A. Agrupamento/soma: por (date, ticker) soma a quantidade teórica e a
+       participação, conta os registros e soma a participação do setor no dia.
+    B. Renomeia "Qtde. Teórica" -> quantidade_teorica e
+       "Part. (%)" -> participacao_pct.
+    C. Cálculo com datas: data do último rebalanceamento quadrimestral
+       (jan/mai/set) e dias decorridos desde ele.
+
+A saída vai para data/refined/date=YYYY-MM-DD/ticker=XXXX/part-0.parquet
+(particionamento por data e ação, Requisito 6). Cada partição de data é
+escrita em um diretório temporário e trocada de forma atômica.
+
+`refine_all` divide a lista de partições em blocos contíguos e os distribui
+num ProcessPoolExecutor (REFINE_MAX_WORKERS processos). Entre processos só
+trafegam caminhos e pequenos resumos (com o checksum da partição bruta), nunca
+tabelas. Manifesto de refinamento e catálogo são atualizados no processo
+principal, à medida que os blocos terminam, então um `refine_incremental` depois
+de um reprocessamento completo não refaz nada; o cache quente é atualizado uma
+única vez, ao fim. Sem --manifest, o manifesto segue a raiz refinada (ver
+`src.transform.manifest`).
+
+Uso:
+    python -m src.transform.refine [--start 2024-01-01] [--end 2024-12-31] [--workers 8]
+"""
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config.settings import (
+    PARQUET_COMPRESSION,
+    PARQUET_COMPRESSION_LEVEL,
+    REFINE_MAX_WORKERS,
+    REFINE_SHARDS_PER_WORKER,
+)
+from src.extraction.csv_converter import (
+    ASSET_COLUMN,
+    PARTICIPATION_COLUMN,
+    QUANTITY_COLUMN,
+    SECTOR_COLUMN,
+    TICKER_COLUMN,
+    TYPE_COLUMN,
+)
+from src.transform.manifest import RefineManifest, file_checksum
+from src.transform.partitions import (
+    atomic_replace_dir,
+    raw_root,
+    refined_root,
+    staging_dir,
+)
+
+REBALANCE_MONTHS = (1, 5, 9)
+
+# Transformação B
+RENAMED_COLUMNS = {
+    QUANTITY_COLUMN: "quantidade_teorica",
+    PARTICIPATION_COLUMN: "participacao_pct",
+}
+
+REFINED_SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("ticker", pa.string()),
+    ("acao", pa.string()),
+    ("tipo", pa.string()),
+    ("setor", pa.string()),
+    ("quantidade_teorica", pa.int64()),
+    ("participacao_pct", pa.float64()),
+    ("num_registros", pa.int64()),
+    ("participacao_setor_pct", pa.float64()),
+    ("data_rebalanceamento", pa.date32()),
+    ("dias_desde_rebalanceamento", pa.int32()),
+])
+
+PARTITION_COLUMNS = ["date", "ticker"]
+REFINED_PARTITIONING = ds.partitioning(
+    pa.schema([("date", pa.date32()), ("ticker", pa.string())]), flavor="hive"
+)
+
+
+def rebalance_date(day):
+    """First day of the quadrimestral portfolio period (Jan/May/Sep) containing `day`"""
+    return datetime.date(day.year, max(m for m in REBALANCE_MONTHS if m <= day.month), 1)
+
+
+def _column_or_null(table, name, type_=pa.string()):
+    if name in table.column_names:
+        return table.column(name)
+    return pa.nulls(table.num_rows, type_)
+
+
+def refine_table(raw_table, day):
+    """Applies transformations A, B and C to one day of raw data. Returns a table in REFINED_SCHEMA"""
+    base = pa.table({
+        "ticker": _column_or_null(raw_table, TICKER_COLUMN),
+        "acao": _column_or_null(raw_table, ASSET_COLUMN),
+        "tipo": _column_or_null(raw_table, TYPE_COLUMN),
+        "setor": _column_or_null(raw_table, SECTOR_COLUMN),
+        QUANTITY_COLUMN: pc.cast(_column_or_null(raw_table, QUANTITY_COLUMN, pa.int64()), pa.int64()),
+        PARTICIPATION_COLUMN: pc.cast(_column_or_null(raw_table, PARTICIPATION_COLUMN, pa.float64()), pa.float64()),
+    })
+    base = base.filter(pc.is_valid(base.column("ticker")))
+
+    # A: agrupamento por ação e soma/contagem
+    grouped = base.group_by(["ticker", "acao", "tipo", "setor"]).aggregate([
+        (QUANTITY_COLUMN, "sum"),
+        (PARTICIPATION_COLUMN, "sum"),
+        (QUANTITY_COLUMN, "count", pc.CountOptions(mode="all")),
+    ])
+    by_sector = base.group_by(["setor"]).aggregate([(PARTICIPATION_COLUMN, "sum")])
+    by_sector = by_sector.select(["setor", f"{PARTICIPATION_COLUMN}_sum"]).rename_columns(
+        ["setor", "participacao_setor_pct"]
+    )
+    grouped = grouped.join(by_sector, keys="setor", join_type="left outer")
+
+    # B: renomear duas colunas
+    output_names = {
+        f"{QUANTITY_COLUMN}_sum": RENAMED_COLUMNS[QUANTITY_COLUMN],
+        f"{PARTICIPATION_COLUMN}_sum": RENAMED_COLUMNS[PARTICIPATION_COLUMN],
+        f"{QUANTITY_COLUMN}_count": "num_registros",
+    }
+    grouped = grouped.rename_columns([output_names.get(name, name) for name in grouped.column_names])
+
+    # C: cálculo com datas
+    period_start = rebalance_date(day)
+    n = grouped.num_rows
+    refined = pa.table({
+        "date": pa.array([day] * n, pa.date32()),
+        "ticker": grouped.column("ticker"),
+        "acao": grouped.column("acao"),
+        "tipo": grouped.column("tipo"),
+        "setor": grouped.column("setor"),
+        "quantidade_teorica": grouped.column("quantidade_teorica"),
+        "participacao_pct": grouped.column("participacao_pct"),
+        "num_registros": grouped.column("num_registros"),
+        "participacao_setor_pct": grouped.column("participacao_setor_pct"),
+        "data_rebalanceamento": pa.array([period_start] * n, pa.date32()),
+        "dias_desde_rebalanceamento": pa.array([(day - period_start).days] * n, pa.int32()),
+    }).cast(REFINED_SCHEMA)
+    return refined.sort_by([("ticker", "ascending")])
+
+
+def write_refined_partition(refined, day, root=None):
+    """Writes date=<day>/ticker=*/part-0.parquet through a staging directory and swaps it in atomically"""
+    root = root or refined_root()
+    os.makedirs(root, exist_ok=True)
+    staging = staging_dir(root, day.isoformat())
+    ds.write_dataset(
+        refined.drop(["date"]),
+        staging,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("ticker", pa.string())]), flavor="hive"),
+        basename_template="part-{i}.parquet",
+        file_options=ds.ParquetFileFormat().make_write_options(
+            compression=PARQUET_COMPRESSION, compression_level=PARQUET_COMPRESSION_LEVEL
+        ),
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    target = os.path.join(root, f"date={day.isoformat()}")
+    atomic_replace_dir(staging, target)
+    return target
+
+
+def _after_refine(day, target, root, hot_cache=True):
+    """Writer hooks: partition catalog and (unless a batch updates it once at the end) hot cache"""
+    from src.catalog.partition_catalog import record_partition
+    record_partition("refined", day, target, root)
+    if hot_cache:
+        from src.query.hot_cache import record_new_day
+        record_new_day(day, root)
+
+
+def refine_partition(day, raw_path, root=None, hooks=True):
+    """Refines a single raw partition. Returns a summary dict"""
+    started = time.perf_counter()
+    raw_table = pq.read_table(raw_path)
+    refined = refine_table(raw_table, day)
+    target = write_refined_partition(refined, day, root)
+    if hooks:
+        _after_refine(day, target, root or refined_root())
+    return {
+        "date": day,
+        "raw_path": raw_path,
+        "refined_path": target,
+        "raw_rows": raw_table.num_rows,
+        "rows": refined.num_rows,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def refine_shard(shard, refined_dir=None):
+    """
+    Worker entry point: refines a list of (date, raw path) without the writer hooks.
+    Each summary carries the raw file's checksum for the manifest
+    """
+    return [dict(refine_partition(day, path, refined_dir, hooks=False), checksum=file_checksum(path))
+            for day, path in shard]
+
+
+def shard_partitions(partitions, workers, shards_per_worker=REFINE_SHARDS_PER_WORKER):
+    """Contiguous shards, a few per worker so a slow shard does not leave the others idle"""
+    size = max(1, -(-len(partitions) // (workers * shards_per_worker)))
+    return [partitions[i:i + size] for i in range(0, len(partitions), size)]
+
+
+def refine_all(raw_dir=None, refined_dir=None, start=None, end=None, max_workers=REFINE_MAX_WORKERS,
+               manifest_path=None):
+    """
+    Refines every raw partition in [start, end] (all of them by default) with up to max_workers
+    processes, recording each one in the refine manifest once it is swapped in
+    """
+    from src.catalog.partition_catalog import resolve_raw_partitions
+    partitions = resolve_raw_partitions(raw_dir or raw_root(), start=start, end=end)
+    workers = max(1, min(max_workers, len(partitions)))
+    print(f"🧪 Refining {len(partitions)} raw partitions with {workers} worker(s)...")
+    started = time.perf_counter()
+    root = refined_dir or refined_root()
+    results = []
+    with RefineManifest(manifest_path, root) as manifest:
+        def finished(result):
+            _after_refine(result["date"], result["refined_path"], root, hot_cache=False)
+            manifest.record(result["date"], result["raw_path"], result["checksum"], result["raw_rows"], result["rows"])
+            results.append(result)
+
+        if workers == 1:
+            for result in refine_shard(partitions, refined_dir):
+                finished(result)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(refine_shard, shard, refined_dir)
+                           for shard in shard_partitions(partitions, workers)]
+                for future in as_completed(futures):
+                    for result in future.result():
+                        finished(result)
+    results.sort(key=lambda r: r["date"])
+    # One hot cache update for the whole run instead of one per partition
+    from src.query.hot_cache import record_new_days
+    record_new_days([r["date"] for r in results], root)
+    elapsed = time.perf_counter() - started
+    rows = sum(r["rows"] for r in results)
+    print(f"✅ Refined {len(results)} partitions ({rows} rows) in {elapsed:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Glue refine transformations locally")
+    parser.add_argument("--raw-dir", default=None)
+    parser.add_argument("--refined-dir", default=None)
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--workers", type=int, default=REFINE_MAX_WORKERS)
+    parser.add_argument("--manifest", default=None)
+    args = parser.parse_args()
+    refine_all(args.raw_dir, args.refined_dir, args.start, args.end, args.workers, args.manifest)
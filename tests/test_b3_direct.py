@@ -0,0 +1,113 @@
+import base64
+import contextlib
+import datetime
+import http.server
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from benchmarks.synthetic import generate_days, render_csv
+from src.extraction import b3_direct, b3_scraper, backfill
+from src.ingestion.sinks import LocalSink
+
+DAY = datetime.date(2024, 1, 2)
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the two B3 endpoints from the server's `csv` and `header_date` fixtures"""
+
+    def do_GET(self):
+        path, _, encoded = self.path.rpartition("/")
+        params = json.loads(base64.b64decode(encoded))
+        self.server.requests.append((path + "/", params))
+        if path + "/" == b3_direct.DOWNLOAD_PORTFOLIO_DAY_PATH:
+            body = json.dumps(base64.b64encode(self.server.csv).decode("ascii")).encode("ascii")
+        elif path + "/" == b3_direct.PORTFOLIO_DAY_PATH:
+            body = json.dumps({"header": {"date": self.server.header_date}, "results": []}).encode("utf-8")
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DirectDownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        _, rows = next(generate_days(1, start=DAY))
+        self.csv = render_csv(DAY, rows)
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.server.csv, self.server.header_date, self.server.requests = self.csv, "02/01/2024", []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.raw_dir = tempfile.mkdtemp(prefix="b3-direct-")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.raw_dir, ignore_errors=True)
+
+    def test_fetch_portfolio_csv(self):
+        file_basename, content = b3_direct.fetch_portfolio_csv(base_url=self.base_url)
+        self.assertEqual(file_basename, "IBOVDia_02-01-24.csv")
+        self.assertEqual(content, self.csv)
+        self.assertEqual(self.server.requests, [(b3_direct.DOWNLOAD_PORTFOLIO_DAY_PATH,
+                                                 {"index": "IBOV", "language": "pt-br", "segment": "2"})])
+
+    def test_date_from_json_header_when_csv_has_none(self):
+        self.server.csv = self.csv.split(b"\n", 1)[1]
+        file_basename, _ = b3_direct.fetch_portfolio_csv(base_url=self.base_url)
+        self.assertEqual(file_basename, "IBOVDia_02-01-24.csv")
+        self.assertEqual(self.server.requests[-1][0], b3_direct.PORTFOLIO_DAY_PATH)
+
+    def test_download_file_direct(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            csv_path, parquet_path = b3_scraper.download_file_direct(base_url=self.base_url,
+                                                                     base_download_path=self.raw_dir)
+        directory = os.path.join(self.raw_dir, "date=2024-01-02")
+        self.assertEqual(csv_path, os.path.join(directory, "IBOVDia_02-01-24.csv"))
+        self.assertEqual(parquet_path, os.path.join(directory, "IBOVDia_02-01-24.parquet"))
+        with open(csv_path, "rb") as f:
+            self.assertEqual(f.read(), self.csv)
+
+    def test_memory_mode_paths(self):
+        directory = os.path.join(self.raw_dir, "date=2024-01-02")
+        for keep_csv, expected_csv in ((False, None), (True, os.path.join(directory, "IBOVDia_02-01-24.csv"))):
+            with self.subTest(keep_csv=keep_csv), contextlib.redirect_stdout(io.StringIO()):
+                csv_path, parquet_path = b3_scraper.extract_daily_portfolio(
+                    mode="memory", base_url=self.base_url, sinks=[LocalSink(self.raw_dir)], keep_csv=keep_csv)
+                self.assertEqual(csv_path, expected_csv)
+                self.assertEqual(parquet_path, os.path.join(directory, "IBOVDia_02-01-24.parquet"))
+
+    def test_payload_date_mismatch(self):
+        # the server answers a historical request with another day's portfolio
+        requested = DAY + datetime.timedelta(days=1)
+        fetcher = backfill.direct_fetcher(base_url=self.base_url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = backfill.backfill(requested, requested, fetcher=fetcher, base_download_path=self.raw_dir,
+                                        rate=0, retries=1)
+        self.assertEqual([r["status"] for r in results], ["unavailable"])
+        self.assertEqual(self.server.requests[0][1]["date"], requested.isoformat())
+        self.assertEqual(os.listdir(self.raw_dir), [])
+
+    def test_one_session_per_thread(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(b3_direct.get_session()))
+        thread.start()
+        thread.join()
+        self.assertIs(b3_direct.get_session(), b3_direct.get_session())
+        self.assertIsNot(sessions[0], b3_direct.get_session())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from benchmarks.synthetic import csv_filename, generate_days, render_csv
+from src.catalog import ticker_index
+from src.extraction import b3_scraper, backfill
+from src.extraction.trading_calendar import trading_days
+from src.query import delta_store
+from src.transform.partitions import REFERENCE_SUFFIX, read_raw_reference
+
+START, END = datetime.date(2024, 1, 2), datetime.date(2024, 1, 31)
+
+
+class ConcurrentBackfillTest(unittest.TestCase):
+    """Backfilling with several workers leaves the same raw tree and stores as a serial run"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="backfill-")
+        self.days = list(trading_days(START, END))
+        generated = [rows for _, rows in generate_days(len(self.days), n_tickers=20)]
+        # every third day repeats the previous day's data, so dedup turns it into a reference
+        self.rows = [generated[i - 1] if i % 3 == 2 else generated[i] for i in range(len(self.days))]
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def fetch(self, day):
+        i = self.days.index(day)
+        # later days answer first, so downloads finish out of order
+        time.sleep((len(self.days) - i) * 0.002)
+        return csv_filename(day), render_csv(day, self.rows[i])
+
+    def _run(self, name, max_workers):
+        raw_dir = os.path.join(self.root, name, "raw")
+        index_path = os.path.join(self.root, name, "ticker_index.npz")
+        store_dir = os.path.join(self.root, name, "delta_store")
+        with mock.patch.object(ticker_index, "TICKER_INDEX_PATH", index_path), \
+                mock.patch.object(delta_store, "DELTA_STORE_DIR", store_dir), \
+                contextlib.redirect_stdout(io.StringIO()):
+            # the stores are built from the first day, then kept current by the writer hooks
+            directory = os.path.join(raw_dir, f"date={self.days[0].isoformat()}")
+            os.makedirs(directory)
+            csv_path = os.path.join(directory, csv_filename(self.days[0]))
+            with open(csv_path, "wb") as f:
+                f.write(render_csv(self.days[0], self.rows[0]))
+            b3_scraper.convert_csv_to_parquet(csv_path)
+            ticker_index.TickerIndex(index_path).build(raw_dir)
+            delta_store.DeltaStore(store_dir).build(raw_dir)
+
+            results = backfill.backfill(START, END, fetcher=self.fetch, base_download_path=raw_dir,
+                                        max_workers=max_workers, rate=0, retries=1)
+        self.assertEqual({r["status"] for r in results}, {"downloaded"})
+        return raw_dir, ticker_index.TickerIndex(index_path), delta_store.DeltaStore(store_dir)
+
+    def _references(self, raw_dir):
+        found = {}
+        for directory, _, names in os.walk(raw_dir):
+            for name in names:
+                if name.endswith(REFERENCE_SUFFIX):
+                    target = read_raw_reference(os.path.join(directory, name))
+                    found[name] = os.path.relpath(target, raw_dir)
+        return found
+
+    def test_matches_serial_run(self):
+        serial_dir, serial_index, serial_store = self._run("serial", max_workers=1)
+        parallel_dir, parallel_index, parallel_store = self._run("parallel", max_workers=4)
+
+        references = self._references(serial_dir)
+        self.assertEqual(len(references), len(self.days) // 3)
+        self.assertEqual(self._references(parallel_dir), references)
+
+        self.assertEqual(len(parallel_index.file_dates), len(self.days))
+        for name in ("tickers", "offsets", "file_id", "row_group", "row", "file_dates"):
+            np.testing.assert_array_equal(getattr(parallel_index, name), getattr(serial_index, name), err_msg=name)
+        self.assertEqual([os.path.relpath(path, parallel_dir) for path in parallel_index.file_paths],
+                         [os.path.relpath(path, serial_dir) for path in serial_index.file_paths])
+
+        self.assertEqual(parallel_store.days(), self.days)
+        self.assertEqual([(segment["snapshot"], segment["dates"]) for segment in parallel_store.segments],
+                         [(segment["snapshot"], segment["dates"]) for segment in serial_store.segments])
+        for day in self.days:
+            self.assertTrue(parallel_store.get(day).equals(serial_store.get(day)))
+
+
+class FailedDayTest(unittest.TestCase):
+    """A day that fails every attempt is given up right after the last one, without a final backoff"""
+
+    def test_no_sleep_after_last_attempt(self):
+        def fetch(day):
+            raise ConnectionError("unreachable")
+
+        raw_dir = tempfile.mkdtemp(prefix="backfill-")
+        try:
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = backfill.backfill(START, START, fetcher=fetch, base_download_path=raw_dir,
+                                            rate=0, retries=2)
+            elapsed = time.perf_counter() - started
+        finally:
+            shutil.rmtree(raw_dir, ignore_errors=True)
+        self.assertEqual([r["status"] for r in results], ["failed"])
+        # one 1 s backoff between the two attempts, not another 2 s after the second
+        self.assertLess(elapsed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
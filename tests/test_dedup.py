@@ -0,0 +1,53 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic import csv_filename, generate_days, render_csv
+from src.extraction.b3_scraper import convert_csv_to_parquet
+from src.transform.partitions import REFERENCE_SUFFIX, list_raw_partitions
+
+
+class ReferenceKeepsCsvTest(unittest.TestCase):
+    """A download whose data equals the previous day's becomes a reference, and its CSV stays in place"""
+
+    def setUp(self):
+        self.raw_dir = tempfile.mkdtemp(prefix="dedup-")
+        _, self.rows = next(generate_days(1))
+
+    def tearDown(self):
+        shutil.rmtree(self.raw_dir, ignore_errors=True)
+
+    def _store(self, day):
+        directory = os.path.join(self.raw_dir, f"date={day.isoformat()}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, csv_filename(day))
+        with open(path, "wb") as f:
+            f.write(render_csv(day, self.rows))
+        return path
+
+    def _convert(self, csv_path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return convert_csv_to_parquet(csv_path)
+
+    def test_reference(self):
+        first, second = datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)
+        first_parquet = self._convert(self._store(first))
+        second_csv = self._store(second)
+
+        self.assertEqual(self._convert(second_csv), first_parquet)
+        self.assertTrue(os.path.exists(second_csv))
+        self.assertTrue(os.path.exists(second_csv[:-len(".csv")] + REFERENCE_SUFFIX))
+        self.assertFalse(os.path.exists(second_csv[:-len(".csv")] + ".parquet"))
+
+        # downloading the reference day again leaves it unchanged, CSV included
+        self.assertEqual(self._convert(self._store(second)), first_parquet)
+        self.assertTrue(os.path.exists(second_csv))
+        self.assertEqual(list_raw_partitions(self.raw_dir), [(first, first_parquet), (second, first_parquet)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import write_raw_tree
+from src.extraction.b3_scraper import convert_csv_to_parquet
+from src.query.delta_store import DeltaStore, record_delta_partition
+from src.transform.partitions import list_raw_partitions
+
+
+class DeltaStoreOrderTest(unittest.TestCase):
+    """Days stored out of order (a backfill) or written again read back as their raw Parquet"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="delta-store-")
+        self.raw_dir, self.store_dir = os.path.join(self.root, "raw"), os.path.join(self.root, "store")
+        with contextlib.redirect_stdout(io.StringIO()):
+            # enough days for several segments and a rebalance
+            for csv_path in write_raw_tree(self.raw_dir, 90, n_tickers=20):
+                convert_csv_to_parquet(csv_path)
+        self.partitions = list_raw_partitions(self.raw_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def assertMatchesRaw(self, store, partitions):
+        self.assertEqual(store.days(), [day for day, _ in partitions])
+        for day, path in partitions:
+            self.assertTrue(store.get(day).equals(pq.read_table(path)), day)
+        referenced = {name for segment in store.segments for name in segment["files"].values()}
+        self.assertEqual(set(os.listdir(self.store_dir)), referenced | {"meta.json"})
+
+    def test_out_of_order_days(self):
+        store = DeltaStore(self.store_dir, snapshot_interval=5)
+        shuffled = list(self.partitions)
+        random.Random(7).shuffle(shuffled)
+        for day, path in shuffled:
+            store.append(day, path)
+        self.assertMatchesRaw(DeltaStore(self.store_dir), self.partitions)
+
+    def test_rewritten_days(self):
+        store = DeltaStore(self.store_dir, snapshot_interval=5)
+        for day, path in self.partitions:
+            store.append(day, path)
+        # the last day and a day in the middle of a segment get another day's data
+        expected = dict(self.partitions)
+        for day, source in ((self.partitions[-1][0], self.partitions[0][1]),
+                            (self.partitions[42][0], self.partitions[41][1])):
+            store.append(day, source)
+            expected[day] = source
+        self.assertMatchesRaw(DeltaStore(self.store_dir), sorted(expected.items()))
+
+    def test_failed_hook_marks_the_store_stale(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            DeltaStore(self.store_dir).build(self.raw_dir)
+            record_delta_partition(self.partitions[10][0], os.path.join(self.root, "missing.parquet"),
+                                   self.raw_dir, self.store_dir)
+        store = DeltaStore(self.store_dir)
+        with self.assertRaises(RuntimeError):
+            store.get(self.partitions[0][0])
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.update()
+        self.assertMatchesRaw(DeltaStore(self.store_dir), self.partitions)
+
+
+if __name__ == "__main__":
+    unittest.main()
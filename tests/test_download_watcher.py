@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.extraction.download_watcher import DownloadWatcher
+
+
+class DownloadAlreadyPresentTest(unittest.TestCase):
+    """A download that finished before wait() is returned right away, not at max_wait"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="watcher-")
+        self.path = os.path.join(self.directory, "IBOVDia_02-01-24.csv")
+        with open(self.path, "wb") as f:
+            f.write(b"IBOV - Carteira do Dia 02/01/24\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _wait(self, use_inotify):
+        # the snapshot of existing files was taken before the download started
+        with DownloadWatcher(self.directory, existing_files=set(), use_inotify=use_inotify) as watcher:
+            started = time.perf_counter()
+            found = watcher.wait(max_wait=5)
+            return found, time.perf_counter() - started, watcher.metrics["backend"]
+
+    def test_polling(self):
+        found, elapsed, backend = self._wait(use_inotify=False)
+        self.assertEqual(found, self.path)
+        self.assertEqual(backend, "polling")
+        self.assertLess(elapsed, 2)
+
+    def test_inotify(self):
+        found, elapsed, backend = self._wait(use_inotify=True)
+        self.assertEqual(found, self.path)
+        self.assertLess(elapsed, 2)
+        if backend != "inotify":
+            self.skipTest("inotify is not available here")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.synthetic import write_raw_tree
+from src.extraction.b3_scraper import convert_csv_to_parquet
+from src.query import hot_cache
+from src.query.hot_cache import HotCache
+from src.query.reader import read_refined
+from src.transform.partitions import list_raw_partitions
+from src.transform.refine import refine_all
+
+
+class HotCacheRootTest(unittest.TestCase):
+    """A cache directory built from one refined root is rebuilt when read for another"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="hot-cache-")
+        self.cache_dir = os.path.join(self.root, "cache")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name, seed in (("a", 1), ("b", 2)):
+                raw_dir = os.path.join(self.root, f"raw-{name}")
+                for csv_path in write_raw_tree(raw_dir, 4, n_tickers=20, seed=seed):
+                    convert_csv_to_parquet(csv_path)
+                refine_all(raw_dir, os.path.join(self.root, f"refined-{name}"), max_workers=1,
+                           manifest_path=os.path.join(self.root, f"manifest-{name}.sqlite"))
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _load(self, name):
+        cache = HotCache(self.cache_dir, os.path.join(self.root, f"refined-{name}"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            table = cache.load(days=3)
+        cache.close()
+        return table
+
+    def test_other_root_is_rebuilt(self):
+        first_a = self._load("a")
+        first_b = self._load("b")
+        self.assertFalse(first_a.equals(first_b))
+        self.assertTrue(first_b.equals(self._load("b")))
+        self.assertTrue(first_a.equals(self._load("a")))
+        self.assertEqual(len([n for n in os.listdir(self.cache_dir) if n.endswith(".arrow")]), 1)
+
+
+class RefineAllHotCacheTest(unittest.TestCase):
+    """refine_all updates the project's hot cache once per run, leaving the windows a rebuild gives"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="hot-cache-")
+        self.raw_dir, self.refined_dir = os.path.join(self.root, "raw"), os.path.join(self.root, "refined")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for csv_path in write_raw_tree(self.raw_dir, 8, n_tickers=20):
+                convert_csv_to_parquet(csv_path)
+        self.days = [day for day, _ in list_raw_partitions(self.raw_dir)]
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _refine(self, **kwargs):
+        with mock.patch.object(HotCache, "add_days", autospec=True, side_effect=HotCache.add_days) as add_days, \
+                contextlib.redirect_stdout(io.StringIO()):
+            refine_all(self.raw_dir, self.refined_dir, **kwargs)
+        self.assertEqual(add_days.call_count, 1)
+
+    def assertLatest(self, days, cached):
+        cache = HotCache(refined_dir=self.refined_dir)
+        self.assertEqual(str(days) in cache._index["latest"], cached)
+        with contextlib.redirect_stdout(io.StringIO()):
+            table = cache.load(days=days)
+        expected = read_refined(date_range=(self.days[-days], self.days[-1]), refined_dir=self.refined_dir)
+        self.assertTrue(table.equals(expected.sort_by([("date", "ascending"), ("ticker", "ascending")])))
+
+    def test_one_update_per_run(self):
+        with mock.patch.object(hot_cache, "HOT_CACHE_DIR", os.path.join(self.root, "cache")):
+            with contextlib.redirect_stdout(io.StringIO()):
+                refine_all(self.raw_dir, self.refined_dir, end=self.days[4], max_workers=1)
+                HotCache(refined_dir=self.refined_dir).load(days=3)
+            # three new days roll the window forward, then a full rebuild drops and rebuilds it
+            self._refine(start=self.days[5], max_workers=2)
+            self.assertLatest(3, cached=True)
+            self._refine(max_workers=2)
+            self.assertLatest(3, cached=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+from benchmarks.bench_import_time import CHECKS, import_profile, startup_packages
+from config.settings import IMPORT_TIME_BUDGET_MS
+
+
+class ImportTimeTest(unittest.TestCase):
+    """`python -X importtime` budget, and no heavy dependency imported as a side effect"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.startup = startup_packages()
+
+    def test_b3_scraper_does_not_import_heavy_dependencies(self):
+        _, packages = import_profile("src.extraction.b3_scraper")
+        eager = {"selenium", "requests", "pandas", "numpy"} & (packages - self.startup)
+        self.assertEqual(eager, set())
+
+    def test_budget(self):
+        for module, forbidden in CHECKS.items():
+            with self.subTest(module=module):
+                # best of three fresh interpreters, to keep a busy machine from failing the suite
+                samples = [import_profile(module) for _ in range(3)]
+                best_ms = min(cumulative for cumulative, _ in samples) / 1000
+                self.assertLessEqual(best_ms, IMPORT_TIME_BUDGET_MS)
+                self.assertEqual(set(forbidden) & (samples[0][1] - self.startup), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import boto3
+from botocore.stub import ANY, Stubber
+
+from benchmarks.synthetic import csv_filename, generate_days, render_csv
+from config.settings import S3_BUCKET_RAW, S3_PREFIX_RAW
+from src.catalog.partition_catalog import PartitionCatalog, export_to_glue
+from src.extraction.b3_scraper import convert_csv_to_parquet
+
+FIRST, SECOND = datetime.date(2024, 1, 2), datetime.date(2024, 1, 3)
+
+
+class GlueExportReferenceTest(unittest.TestCase):
+    """A dedup reference day is exported with the S3 location of the snapshot it points to"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="catalog-")
+        self.raw_dir = os.path.join(self.root, "raw")
+        _, rows = next(generate_days(1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for day in (FIRST, SECOND):
+                directory = os.path.join(self.raw_dir, f"date={day.isoformat()}")
+                os.makedirs(directory)
+                path = os.path.join(directory, csv_filename(day))
+                with open(path, "wb") as f:
+                    f.write(render_csv(day, rows))
+                convert_csv_to_parquet(path)
+        self.catalog_path = os.path.join(self.root, "catalog.sqlite")
+        with contextlib.redirect_stdout(io.StringIO()), PartitionCatalog(self.catalog_path) as catalog:
+            catalog.sync("raw", self.raw_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_reference_location(self):
+        glue = boto3.client("glue", region_name="us-east-1",
+                            aws_access_key_id="testing", aws_secret_access_key="testing")
+        requests = []
+        glue.meta.events.register("provide-client-params.glue.BatchCreatePartition",
+                                  lambda params, **kwargs: requests.append(params))
+        with Stubber(glue) as stubber:
+            stubber.add_response("batch_create_partition", {"Errors": []},
+                                 {"DatabaseName": ANY, "TableName": ANY, "PartitionInputList": ANY})
+            with contextlib.redirect_stdout(io.StringIO()):
+                created, existing = export_to_glue("raw", self.catalog_path, glue=glue)
+            stubber.assert_no_pending_responses()
+
+        locations = {tuple(p["Values"]): p["StorageDescriptor"]["Location"]
+                     for p in requests[0]["PartitionInputList"]}
+        snapshot = f"s3://{S3_BUCKET_RAW}/{S3_PREFIX_RAW}date={FIRST.isoformat()}/"
+        self.assertEqual((created, existing), (2, 0))
+        self.assertEqual(locations, {(FIRST.isoformat(),): snapshot, (SECOND.isoformat(),): snapshot})
+
+
+if __name__ == "__main__":
+    unittest.main()
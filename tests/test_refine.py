@@ -0,0 +1,58 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.synthetic import write_raw_tree
+from src.extraction.b3_scraper import convert_csv_to_parquet
+from src.transform.incremental import refine_incremental
+from src.transform.manifest import RefineManifest, default_manifest_path
+from src.transform.refine import refine_all
+
+
+class RefineAllManifestTest(unittest.TestCase):
+    """A full rebuild records every partition, so the next incremental run has nothing to do"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="refine-")
+        self.raw_dir, self.refined_dir = os.path.join(self.root, "raw"), os.path.join(self.root, "refined")
+        self.manifest_path = os.path.join(self.root, "manifest.sqlite")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for csv_path in write_raw_tree(self.raw_dir, 6, n_tickers=20):
+                convert_csv_to_parquet(csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _check(self, max_workers):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = refine_all(self.raw_dir, self.refined_dir, max_workers=max_workers,
+                                 manifest_path=self.manifest_path)
+            incremental = refine_incremental(self.raw_dir, self.refined_dir, manifest_path=self.manifest_path)
+        with RefineManifest(self.manifest_path) as manifest:
+            entries = manifest.entries()
+        self.assertEqual(len(results), 6)
+        self.assertEqual(sorted(entries), [r["date"] for r in results])
+        self.assertEqual(incremental, [])
+
+    def test_serial(self):
+        self._check(max_workers=1)
+
+    def test_parallel(self):
+        self._check(max_workers=3)
+
+    def test_default_manifest_follows_the_refined_dir(self):
+        manifest_path = default_manifest_path(self.refined_dir)
+        self.assertEqual(os.path.dirname(manifest_path), self.root)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = refine_all(self.raw_dir, self.refined_dir, max_workers=1)
+            incremental = refine_incremental(self.raw_dir, self.refined_dir)
+        with RefineManifest(manifest_path) as manifest:
+            self.assertEqual(sorted(manifest.entries()), [r["date"] for r in results])
+        self.assertEqual(incremental, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
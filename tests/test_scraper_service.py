@@ -0,0 +1,70 @@
+import contextlib
+import datetime
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.synthetic import generate_days, render_csv
+from src.extraction import scraper_service
+from src.extraction.scraper_service import ScraperService, segment_filename
+from src.transform.partitions import index_raw_root, list_raw_partitions
+
+DAY = datetime.date(2024, 1, 2)
+
+
+class FakeSession:
+    """Stands in for BrowserSession: 'downloads' a synthetic portfolio named like the browser does"""
+
+    def __init__(self, session_id, download_dir):
+        self.session_id = session_id
+        self.download_dir = download_dir
+        self.jobs_served = 0
+        self.startup_seconds = 0.0
+        os.makedirs(download_dir, exist_ok=True)
+
+    def download(self, index, segment_view):
+        _, rows = next(generate_days(1, start=DAY))
+        name = segment_filename(f"{index}Dia_{DAY.strftime('%d-%m-%y')}.csv", segment_view)
+        path = os.path.join(self.download_dir, name)
+        with open(path, "wb") as f:
+            f.write(render_csv(DAY, rows))
+        self.jobs_served += 1
+        return path
+
+    def close(self):
+        pass
+
+
+class IndexLayoutTest(unittest.TestCase):
+    """Other indexes are stored under their own raw root, never inside the default index's partitions"""
+
+    def setUp(self):
+        self.raw_dir = tempfile.mkdtemp(prefix="scraper-service-")
+
+    def tearDown(self):
+        shutil.rmtree(self.raw_dir, ignore_errors=True)
+
+    def test_other_index_has_its_own_root(self):
+        with mock.patch.object(scraper_service, "BrowserSession", FakeSession), \
+                contextlib.redirect_stdout(io.StringIO()):
+            with ScraperService(pool_size=2, base_download_path=self.raw_dir) as service:
+                results = service.run([("IBOV", "setor"), ("SMLL", "setor"), ("SMLL", "codigo")])
+
+        smll_dir = index_raw_root(self.raw_dir, "SMLL")
+        self.assertEqual(smll_dir, os.path.join(self.raw_dir, "index=SMLL"))
+        self.assertEqual([os.path.relpath(r["csv_path"], self.raw_dir) for r in results], [
+            os.path.join("date=2024-01-02", "IBOVDia_02-01-24.csv"),
+            os.path.join("index=SMLL", "date=2024-01-02", "SMLLDia_02-01-24.csv"),
+            os.path.join("index=SMLL", "date=2024-01-02", "SMLLDia_02-01-24_codigo.csv"),
+        ])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.raw_dir, "date=2024-01-02"))),
+                         ["IBOVDia_02-01-24.csv", "IBOVDia_02-01-24.parquet"])
+        self.assertEqual(list_raw_partitions(self.raw_dir), [(DAY, results[0]["parquet_path"])])
+        self.assertEqual(list_raw_partitions(smll_dir, "SMLL"), [(DAY, results[1]["parquet_path"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from src.query.sector_cube import SectorCube
+
+
+class MeasureValidationTest(unittest.TestCase):
+    """Only the cube's measures reach the SQL, in every query method"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="sector-cube-")
+        self.cube = SectorCube(os.path.join(self.root, "cube.sqlite"))
+
+    def tearDown(self):
+        self.cube.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_unknown_measure(self):
+        for measure in ("volume", "1; DROP TABLE sector_day; --"):
+            with self.subTest(measure=measure):
+                with self.assertRaises(ValueError):
+                    self.cube.top_sectors(measure=measure)
+                with self.assertRaises(ValueError):
+                    self.cube.query(measure=measure)
+        self.assertEqual(self.cube.top_sectors(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
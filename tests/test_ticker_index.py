@@ -0,0 +1,108 @@
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import write_raw_tree
+from src.catalog.ticker_index import TickerIndex, record_ticker_partition
+from src.extraction.b3_scraper import convert_csv_to_parquet
+from src.extraction.csv_converter import TICKER_COLUMN
+from src.transform.partitions import list_raw_partitions
+
+
+class TickerIndexTest(unittest.TestCase):
+    """Incremental updates, in any order, give the index `build` gives, and both match the Parquet files"""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="ticker-index-")
+        self.raw_dir = os.path.join(self.root, "raw")
+        with contextlib.redirect_stdout(io.StringIO()):
+            # enough days for rebalances to add and drop tickers
+            for csv_path in write_raw_tree(self.raw_dir, 130, n_tickers=30):
+                convert_csv_to_parquet(csv_path)
+        self.partitions = list_raw_partitions(self.raw_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _built(self):
+        index = TickerIndex(os.path.join(self.root, "built.npz"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            index.build(self.raw_dir)
+        return index
+
+    def assertMatchesParquet(self, index):
+        """Every occurrence points at its ticker, and each ticker's run is in (date, row group, row) order"""
+        expected = set()
+        for day, path in self.partitions:
+            parquet = pq.ParquetFile(path)
+            for group in range(parquet.num_row_groups):
+                for row, ticker in enumerate(parquet.read_row_group(group, columns=[TICKER_COLUMN]).column(0)):
+                    if ticker.is_valid:
+                        expected.add((ticker.as_py(), day.toordinal(), group, row))
+        found = []
+        for i, ticker in enumerate(index.tickers):
+            run = slice(index.offsets[i], index.offsets[i + 1])
+            occurrences = [(str(ticker), int(index.file_dates[f]), int(g), int(r))
+                           for f, g, r in zip(index.file_id[run], index.row_group[run], index.row[run])]
+            self.assertEqual(occurrences, sorted(occurrences))
+            found.extend(occurrences)
+        self.assertEqual(len(found), len(expected))
+        self.assertEqual(set(found), expected)
+
+    def assertSameIndex(self, index, expected):
+        # file ids follow the order days were added, so compare what they point to
+        for name in ("tickers", "offsets", "row_group", "row"):
+            np.testing.assert_array_equal(getattr(index, name), getattr(expected, name), err_msg=name)
+        np.testing.assert_array_equal(index.file_dates[index.file_id], expected.file_dates[expected.file_id])
+        self.assertEqual(dict(zip(index.file_dates.tolist(), index.file_paths.tolist())),
+                         dict(zip(expected.file_dates.tolist(), expected.file_paths.tolist())))
+
+    def test_build(self):
+        self.assertMatchesParquet(self._built())
+
+    def test_new_days_in_any_order(self):
+        index = TickerIndex(os.path.join(self.root, "index.npz"))
+        index.add_partitions(self.partitions[60:100])
+        # new latest days one at a time, then a backfill of earlier days in shuffled order
+        for partition in self.partitions[100:]:
+            index.add_partitions([partition])
+        earlier = self.partitions[:60]
+        random.Random(3).shuffle(earlier)
+        for partition in earlier:
+            index.add_partitions([partition])
+        self.assertSameIndex(index, self._built())
+        self.assertMatchesParquet(index)
+
+    def test_replacing_a_day(self):
+        index = TickerIndex(os.path.join(self.root, "index.npz"))
+        index.add_partitions(self.partitions)
+        index.add_partitions([self.partitions[50]])
+        self.assertSameIndex(index, self._built())
+
+    def test_concurrent_writers(self):
+        index_path = os.path.join(self.root, "index.npz")
+        index = TickerIndex(index_path)
+        index.add_partitions(self.partitions[:100])
+        index.root = os.path.abspath(self.raw_dir)
+        index.save()
+
+        threads = [threading.Thread(target=record_ticker_partition, args=(day, path, self.raw_dir, index_path))
+                   for day, path in self.partitions[100:]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertSameIndex(TickerIndex(index_path), self._built())
+        self.assertFalse(os.path.exists(index_path + ".lock"))
+
+
+if __name__ == "__main__":
+    unittest.main()
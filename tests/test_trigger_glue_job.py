@@ -0,0 +1,108 @@
+import importlib
+import json
+import unittest
+
+import boto3
+from botocore.stub import Stubber
+
+trigger = importlib.import_module("src.lambda.trigger_glue_job")
+
+BUCKET = "bovespa-raw-data"
+
+
+def s3_record(key, etag="etag-1", bucket=BUCKET):
+    return {"s3": {"bucket": {"name": bucket}, "object": {"key": key, "eTag": etag, "sequencer": "0A"}}}
+
+
+def parquet_key(day):
+    return f"raw/date={day}/IBOVDia_{day[8:10]}-{day[5:7]}-{day[2:4]}.parquet"
+
+
+class TriggerGlueJobTest(unittest.TestCase):
+
+    def setUp(self):
+        self.glue = boto3.client("glue", region_name="us-east-1",
+                                 aws_access_key_id="testing", aws_secret_access_key="testing")
+        self.stubber = Stubber(self.glue)
+        self.stubber.activate()
+        self.store = trigger.InMemoryIdempotencyStore()
+        self.backoff = trigger.BASE_BACKOFF_SECONDS
+        trigger.BASE_BACKOFF_SECONDS = 0
+
+    def tearDown(self):
+        trigger.BASE_BACKOFF_SECONDS = self.backoff
+        self.stubber.deactivate()
+
+    def _invoke(self, event):
+        return trigger.lambda_handler(event, None, glue=self.glue, store=self.store)
+
+    def _expect_run(self, keys, run_id="jr_1"):
+        partitions = sorted({trigger.partition_of(key) for key in keys})
+        self.stubber.add_response("start_job_run", {"JobRunId": run_id}, {
+            "JobName": "bovespa-etl-job",
+            "Arguments": {
+                "--S3_BUCKET": BUCKET,
+                "--S3_KEY": keys[0],
+                "--S3_KEYS": json.dumps(keys),
+                "--PARTITIONS": ",".join(partitions),
+            },
+        })
+
+    def test_records_are_coalesced_into_one_run(self):
+        keys = [parquet_key("2024-01-02"), parquet_key("2024-01-03"), parquet_key("2024-01-04")]
+        self._expect_run(keys)
+        # the second key arrives through SQS
+        event = {"Records": [s3_record(keys[0]), {"body": json.dumps({"Records": [s3_record(keys[1])]})},
+                             s3_record(keys[2])]}
+
+        body = json.loads(self._invoke(event)["body"])
+
+        self.stubber.assert_no_pending_responses()
+        self.assertEqual(len(body["jobRuns"]), 1)
+        self.assertEqual(body["jobRuns"][0]["partitions"], ["date=2024-01-02", "date=2024-01-03", "date=2024-01-04"])
+
+    def test_duplicate_keys(self):
+        key = parquet_key("2024-01-02")
+        self._expect_run([key])
+        body = json.loads(self._invoke({"Records": [s3_record(key), s3_record(key)]})["body"])
+        self.assertEqual(body["jobRunId"], "jr_1")
+
+        # redelivery of the same object version starts nothing
+        body = json.loads(self._invoke({"Records": [s3_record(key)]})["body"])
+        self.assertIsNone(body["jobRunId"])
+        self.assertEqual(body["skippedKeys"], 1)
+
+        # a changed re-upload of the same key is refined again
+        self._expect_run([key], "jr_2")
+        body = json.loads(self._invoke({"Records": [s3_record(key, etag="etag-2")]})["body"])
+        self.assertEqual(body["jobRunId"], "jr_2")
+        self.stubber.assert_no_pending_responses()
+
+    def test_concurrent_runs_exceeded_backs_off(self):
+        key = parquet_key("2024-01-02")
+        self.stubber.add_client_error("start_job_run", "ConcurrentRunsExceededException")
+        self.stubber.add_client_error("start_job_run", "ConcurrentRunsExceededException")
+        self._expect_run([key])
+
+        body = json.loads(self._invoke({"Records": [s3_record(key)]})["body"])
+
+        self.assertEqual(body["jobRunId"], "jr_1")
+        self.stubber.assert_no_pending_responses()
+
+    def test_exhausted_backoff_raises_and_releases_claims(self):
+        key = parquet_key("2024-01-02")
+        for _ in range(trigger.MAX_START_ATTEMPTS):
+            self.stubber.add_client_error("start_job_run", "ConcurrentRunsExceededException")
+
+        with self.assertRaises(Exception) as raised:
+            self._invoke({"Records": [s3_record(key)]})
+
+        self.assertEqual(trigger._error_code(raised.exception), "ConcurrentRunsExceededException")
+        self.assertEqual(self.store.claims, {})
+        # the redelivered event starts the job
+        self._expect_run([key])
+        self.assertEqual(json.loads(self._invoke({"Records": [s3_record(key)]})["body"])["jobRunId"], "jr_1")
+
+
+if __name__ == "__main__":
+    unittest.main()